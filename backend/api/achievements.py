@@ -0,0 +1,106 @@
+"""Achievement rules and their evaluator.
+
+Every achievement is a rule: once a user's ``metric`` reaches ``threshold``
+they earn the named achievement. Views call ``evaluate`` once per event with
+the metric that changed, so only that metric's rules are checked.
+
+``Achievement`` rows are created on first use and kept in an in-process
+cache; it is cleared whenever an achievement is saved or deleted.
+"""
+import threading
+from collections import namedtuple
+
+from django.db import transaction
+from django.db.models import F
+
+from .models import Achievement, UserAchievement, UserPoints
+from .points import award_points
+
+Rule = namedtuple('Rule', ['metric', 'threshold', 'name', 'description', 'points'])
+
+BOOKS_RATED = 'books_rated'
+REVIEWS_WRITTEN = 'reviews_written'
+FAVORITES_ADDED = 'favorites_added'
+READLIST_ADDITIONS = 'readlist_additions'
+BOOKS_FINISHED = 'books_finished'
+
+RULES = [
+    Rule(BOOKS_RATED, 10, "Opinionated", "Rated 10 books", 15),
+    Rule(REVIEWS_WRITTEN, 5, "Reviewer", "Wrote 5 book reviews", 20),
+    Rule(REVIEWS_WRITTEN, 15, "Critic", "Wrote 15 book reviews", 35),
+    Rule(REVIEWS_WRITTEN, 30, "Literary Voice", "Wrote 30 book reviews", 50),
+    Rule(FAVORITES_ADDED, 5, "Collector", "Added 5 books to favorites", 10),
+    Rule(FAVORITES_ADDED, 25, "Enthusiast", "Added 25 books to favorites", 25),
+    Rule(FAVORITES_ADDED, 50, "Book Lover", "Added 50 books to favorites", 50),
+    Rule(READLIST_ADDITIONS, 20, "Organized Reader", "Added 20 books to readlists", 25),
+    Rule(BOOKS_FINISHED, 3, "Beginner Reader", "Finished reading 3 books", 15),
+    Rule(BOOKS_FINISHED, 10, "Avid Reader", "Finished reading 10 books", 30),
+    Rule(BOOKS_FINISHED, 25, "Bookworm", "Finished reading 25 books", 75),
+]
+
+RULES_BY_METRIC = {}
+for _rule in RULES:
+    RULES_BY_METRIC.setdefault(_rule.metric, []).append(_rule)
+
+_definitions = {}
+_definitions_lock = threading.Lock()
+
+
+def clear_cache():
+    with _definitions_lock:
+        _definitions.clear()
+
+
+def _remember(achievements):
+    with _definitions_lock:
+        _definitions.update(achievements)
+
+
+def definitions(rules):
+    """The ``Achievement`` for each rule by name, creating missing ones"""
+    with _definitions_lock:
+        found = {rule.name: _definitions[rule.name] for rule in rules if rule.name in _definitions}
+
+    missing = [rule for rule in rules if rule.name not in found]
+    if missing:
+        loaded = {achievement.name: achievement
+                  for achievement in Achievement.objects.filter(name__in=[rule.name for rule in missing])}
+        for rule in missing:
+            if rule.name not in loaded:
+                loaded[rule.name], _ = Achievement.objects.get_or_create(
+                    name=rule.name, defaults={'description': rule.description, 'points': rule.points}
+                )
+        # Only cache rows that are committed, so a rolled back creation is never reused
+        transaction.on_commit(lambda: _remember(loaded))
+        found.update(loaded)
+    return found
+
+
+def evaluate(user, metric, value):
+    """Award the achievements for ``metric`` that ``value`` has reached and the user lacks.
+
+    Returns ``(messages, points)`` for the newly earned achievements.
+    """
+    rules = [rule for rule in RULES_BY_METRIC.get(metric, []) if value >= rule.threshold]
+    if not rules:
+        return [], 0
+
+    achievements = definitions(rules)
+    earned = set(UserAchievement.objects.filter(
+        user=user, achievement__in=achievements.values()
+    ).values_list('achievement_id', flat=True))
+
+    messages = []
+    points = 0
+    for rule in rules:
+        achievement = achievements[rule.name]
+        if achievement.id in earned:
+            continue
+        _, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
+        if created:
+            award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
+            # The leaderboard reads the count from the points row award_points just ensured
+            UserPoints.objects.filter(user=user).update(achievement_count=F('achievement_count') + 1)
+            messages.append(f"🏆 {achievement.name}: {achievement.description}!")
+            points += achievement.points
+    return messages, points
@@ -1,6 +1,22 @@
 from django.apps import AppConfig
+from django.db.models.signals import post_delete, post_migrate, post_save
+
+
+def install_catalog_index(sender, using='default', **kwargs):
+    from .catalog import install_fts
+    install_fts(using)
+
+
+def clear_achievement_cache(sender, **kwargs):
+    from .achievements import clear_cache
+    clear_cache()
 
 
 class ApiConfig(AppConfig):
     default_auto_field = 'django.db.models.BigAutoField'
     name = 'api'
+
+    def ready(self):
+        post_migrate.connect(install_catalog_index, sender=self)
+        post_save.connect(clear_achievement_cache, sender='api.Achievement')
+        post_delete.connect(clear_achievement_cache, sender='api.Achievement')
@@ -0,0 +1,230 @@
+"""Enrichment of the NYT bestseller list with Google Books metadata.
+
+The enriched list is stored as a ``BestsellerSnapshot`` per NYT list date and
+refreshed by the ``refresh_bestsellers`` management command, so requests only
+read the latest snapshot.
+"""
+from concurrent.futures import ThreadPoolExecutor, wait
+
+import requests
+from django.conf import settings
+from django.core.cache import cache
+
+from . import upstream
+from .books import save_volume
+from .identifiers import known_resolutions, record_resolutions
+from .models import BestsellerSnapshot, Book
+
+SNAPSHOT_CACHE_KEY = 'bestsellers:latest'
+
+# Marks an ISBN that has not been resolved yet
+UNRESOLVED = object()
+
+
+class BestsellerFetchError(Exception):
+    pass
+
+
+def _volume_details(item):
+    volume_info = item['volumeInfo']
+    return {
+        'google_books_id': item['id'],
+        # Kept so a resolved volume can be saved as a Book for later refreshes
+        'volume_info': volume_info,
+        'description': volume_info.get('description', ''),
+        'categories': volume_info.get('categories', []),
+        'image': volume_info.get('imageLinks', {}).get('thumbnail', ''),
+        'year': volume_info.get('publishedDate', 'N/A')[:4] if volume_info.get('publishedDate') else 'N/A'
+    }
+
+
+def _first_volume(params):
+    """Return details of the first Google Books volume matching ``params``, or {}"""
+    google_response = upstream.google_books_get(params=params)
+    google_response.raise_for_status()
+
+    google_data = google_response.json()
+    if not google_data.get('items'):
+        return {}
+    return _volume_details(google_data['items'][0])
+
+
+def _volume_by_id(google_books_id):
+    google_response = upstream.google_books_get(google_books_id)
+    google_response.raise_for_status()
+    return _volume_details(google_response.json())
+
+
+def _local_details(book):
+    return {
+        'google_books_id': book.google_books_id,
+        'description': book.description or '',
+        'categories': book.genre.split(', ') if book.genre else [],
+        'image': book.image or '',
+        'year': book.year or 'N/A'
+    }
+
+
+def _isbn(book):
+    return book.get('primary_isbn13') or book.get('primary_isbn10')
+
+
+def lookup_google_info(book, resolution=UNRESOLVED, local_book=None):
+    """Find the Google Books volume for one NYT list entry.
+
+    ``resolution`` is the stored google_books_id for the entry's ISBN, None for
+    a stored miss, or UNRESOLVED when the ISBN has not been looked up yet.
+    ``local_book`` is the saved ``Book`` for a stored resolution, if any.
+
+    Returns ``(google_book_info, isbn_result)`` where ``isbn_result`` is the
+    outcome of a fresh ISBN query, or UNRESOLVED when none was made.
+    """
+    isbn_result = UNRESOLVED
+    try:
+        isbn = _isbn(book)
+        google_book_info = {}
+        if local_book is not None:
+            google_book_info = _local_details(local_book)
+        elif resolution is not UNRESOLVED and resolution:
+            google_book_info = _volume_by_id(resolution)
+        elif isbn and resolution is UNRESOLVED:
+            # First try the ISBN for a precise match, remembering the outcome
+            try:
+                google_book_info = _first_volume({'q': f"isbn:{isbn}"})
+                isbn_result = google_book_info.get('google_books_id')
+            except requests.RequestException:
+                pass
+
+        # Fallback to title+author search only if ISBN search failed or no ISBN
+        if not google_book_info:
+            google_book_info = _first_volume({'q': f"{book['title']} {book['author']}"})
+        return google_book_info, isbn_result
+    except (requests.RequestException, ValueError, KeyError):
+        return {}, isbn_result
+
+
+def format_bestseller(book, google_book_info):
+    # Use NYT image if Google Books doesn't have one or has an invalid one
+    book_image = book['book_image']
+    if google_book_info.get('image'):
+        # Validate Google image URL before using it
+        google_image = google_book_info['image']
+        if google_image and len(google_image) > 10:  # Basic validation
+            book_image = google_image
+
+    # Ensure all image URLs use https
+    if book_image and book_image.startswith('http:'):
+        book_image = book_image.replace('http:', 'https:')
+
+    return {
+        'rank': book['rank'],
+        'title': book['title'],
+        'author': book['author'],
+        'description': google_book_info.get('description', book['description']),
+        'google_books_id': google_book_info.get('google_books_id', ''),
+        'genre': ', '.join(google_book_info.get('categories', [])),
+        'image': book_image,
+        'year': google_book_info.get('year', ''),
+        'amazon_link': book['amazon_product_url'],
+        'weeks_on_list': book['weeks_on_list']
+    }
+
+
+def _save_resolved_volumes(isbns, resolutions, results):
+    """Save volumes fetched for a resolved ISBN as Books, so the next refresh reads them locally"""
+    for isbn, (google_book_info, isbn_result) in zip(isbns, results):
+        resolved = isbn_result if isbn_result is not UNRESOLVED else resolutions.get(isbn)
+        volume_info = google_book_info.get('volume_info')
+        if resolved and volume_info and google_book_info['google_books_id'] == resolved:
+            save_volume(resolved, volume_info)
+
+
+def enrich_bestsellers(nyt_books, deadline=None):
+    """Look up every NYT entry on Google Books concurrently.
+
+    Entries whose lookup has not finished within ``deadline`` seconds are
+    returned with NYT data only.
+    """
+    if deadline is None:
+        deadline = settings.BESTSELLER_ENRICH_DEADLINE
+
+    # Database reads happen here so the worker threads only touch the network
+    isbns = [_isbn(book) for book in nyt_books]
+    resolutions = known_resolutions(isbns)
+    local_books = Book.objects.in_bulk(
+        [google_books_id for google_books_id in resolutions.values() if google_books_id],
+        field_name='google_books_id'
+    )
+
+    executor = ThreadPoolExecutor(max_workers=settings.BESTSELLER_ENRICH_WORKERS)
+    try:
+        futures = []
+        for book, isbn in zip(nyt_books, isbns):
+            resolution = resolutions.get(isbn, UNRESOLVED)
+            futures.append(executor.submit(lookup_google_info, book, resolution, local_books.get(resolution)))
+        done, _ = wait(futures, timeout=deadline)
+    finally:
+        # Do not block the response on stragglers
+        executor.shutdown(wait=False, cancel_futures=True)
+
+    results = [future.result() if future in done else ({}, UNRESOLVED) for future in futures]
+    record_resolutions({
+        isbn: isbn_result
+        for isbn, (_, isbn_result) in zip(isbns, results)
+        if isbn and isbn_result is not UNRESOLVED
+    })
+    _save_resolved_volumes(isbns, resolutions, results)
+
+    return [format_bestseller(book, google_book_info) for book, (google_book_info, _) in zip(nyt_books, results)]
+
+
+def snapshot_payload(snapshot):
+    return {
+        'books': snapshot.books,
+        'list_update_date': snapshot.list_update_date,
+    }
+
+
+def refresh_snapshot(force=False, deadline=None):
+    """Store an enriched snapshot of the current NYT list.
+
+    Google Books enrichment only runs when NYT has published a list date that
+    is not stored yet, or when ``force`` is set. Returns ``(snapshot, refreshed)``.
+    """
+    response = upstream.get(settings.NYT_BESTSELLERS_URL, params={'api-key': settings.NYT_API_KEY})
+    if response.status_code != 200:
+        raise BestsellerFetchError('Failed to fetch bestsellers')
+
+    results = response.json()['results']
+    list_name = results.get('list_name_encoded') or 'hardcover-fiction'
+    list_date = results.get('published_date') or results['updated']
+
+    snapshot = BestsellerSnapshot.objects.filter(list_name=list_name, list_date=list_date).first()
+    refreshed = snapshot is None or force
+    if refreshed:
+        snapshot, _ = BestsellerSnapshot.objects.update_or_create(
+            list_name=list_name,
+            list_date=list_date,
+            defaults={
+                'books': enrich_bestsellers(results['books'], deadline=deadline),
+                'list_update_date': results['updated'],
+            }
+        )
+
+    cache.set(SNAPSHOT_CACHE_KEY, snapshot_payload(snapshot), settings.BESTSELLER_CACHE_TTL)
+    return snapshot, refreshed
+
+
+def latest_bestsellers():
+    """Return the newest stored list, building the first snapshot if none exists"""
+    payload = cache.get(SNAPSHOT_CACHE_KEY)
+    if payload is not None:
+        return payload
+
+    snapshot = BestsellerSnapshot.objects.order_by('-list_date', '-fetched_at').first()
+    if snapshot is None:
+        snapshot, _ = refresh_snapshot()
+
+    payload = snapshot_payload(snapshot)
+    cache.set(SNAPSHOT_CACHE_KEY, payload, settings.BESTSELLER_CACHE_TTL)
+    return payload
@@ -0,0 +1,67 @@
+"""Keeping saved ``Book`` metadata in sync with Google Books."""
+import logging
+import threading
+from datetime import timedelta
+
+import requests
+from django.conf import settings
+from django.db import connection
+from django.utils import timezone
+
+from . import upstream
+from .identifiers import isbns_from_volume, record_resolutions
+from .models import Book
+
+logger = logging.getLogger(__name__)
+
+
+def is_fresh(book):
+    """Whether the book's metadata was refreshed within BOOK_METADATA_TTL"""
+    if book.metadata_refreshed_at is None:
+        return False
+    return timezone.now() - book.metadata_refreshed_at < timedelta(seconds=settings.BOOK_METADATA_TTL)
+
+
+def save_volume(google_books_id, volume_info):
+    """Create or update the Book for a Google Books ``volumeInfo`` dict"""
+    title = volume_info.get('title', 'No Title')
+    authors = volume_info.get('authors', ['Unknown Author'])
+    description = volume_info.get('description', 'No Description')
+    categories = volume_info.get('categories', ['Unknown Genre'])
+    image_links = volume_info.get('imageLinks', {})
+    published_date = volume_info.get('publishedDate', '')
+    isbns = isbns_from_volume(volume_info)
+
+    book, _ = Book.objects.update_or_create(
+        google_books_id=google_books_id,
+        defaults={
+            'title': title,
+            'author': ', '.join(authors),
+            'description': description,
+            'genre': ', '.join(categories),
+            'image': image_links.get('thumbnail', ''),
+            'year': published_date[:4] if published_date else 'N/A',
+            'isbn10': isbns['isbn10'],
+            'isbn13': isbns['isbn13'],
+            'metadata_refreshed_at': timezone.now()
+        }
+    )
+    record_resolutions({isbn: google_books_id for isbn in isbns.values()})
+    return book
+
+
+def _refresh(google_books_id):
+    try:
+        response = upstream.google_books_get(google_books_id)
+        volume_info = response.json().get('volumeInfo') if response.status_code == 200 else None
+        if volume_info:
+            save_volume(google_books_id, volume_info)
+    except (requests.RequestException, ValueError):
+        logger.warning("Background metadata refresh failed for %s", google_books_id, exc_info=True)
+    finally:
+        connection.close()
+
+
+def refresh_in_background(google_books_id):
+    """Refresh a stale book on a separate thread so the request does not wait for Google Books"""
+    threading.Thread(target=_refresh, args=(google_books_id,), daemon=True).start()
@@ -0,0 +1,129 @@
+"""Local full-text search over the books users have already saved.
+
+On SQLite the ``Book`` table is mirrored into an FTS5 index that triggers keep
+in sync on every insert, update and delete. Other databases fall back to a
+plain ``icontains`` lookup.
+"""
+import re
+
+from django.db import connections
+from django.db.models import Q
+
+from .models import Book
+
+FTS_TABLE = 'api_book_fts'
+FTS_COLUMNS = ('title', 'author', 'genre', 'description')
+
+# bm25 weights, in FTS_COLUMNS order
+FTS_WEIGHTS = (10.0, 5.0, 2.0, 1.0)
+
+FILTER_COLUMNS = {
+    'title': 'title',
+    'author': 'author',
+    'genre': 'genre',
+}
+
+_FTS_SCHEMA = [
+    f"""CREATE VIRTUAL TABLE IF NOT EXISTS {FTS_TABLE} USING fts5(
+        title, author, genre, description,
+        content='api_book', content_rowid='id', tokenize='unicode61 remove_diacritics 2'
+    )""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ai AFTER INSERT ON api_book BEGIN
+        INSERT INTO {FTS_TABLE}(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END""",
+    f"""CREATE TRIGGER IF NOT EXISTS {FTS_TABLE}_ad AFTER DELETE ON api_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+    END""",
+    # Only changes to indexed columns touch the FTS row; rating and freshness
+    # updates do not. Dropped first so databases with the older trigger get this one.
+    f"DROP TRIGGER IF EXISTS {FTS_TABLE}_au",
+    f"""CREATE TRIGGER {FTS_TABLE}_au AFTER UPDATE OF title, author, genre, description ON api_book BEGIN
+        INSERT INTO {FTS_TABLE}({FTS_TABLE}, rowid, title, author, genre, description)
+        VALUES ('delete', old.id, old.title, old.author, old.genre, old.description);
+        INSERT INTO {FTS_TABLE}(rowid, title, author, genre, description)
+        VALUES (new.id, new.title, new.author, new.genre, new.description);
+    END""",
+]
+
+
+def install_fts(using='default'):
+    """Create the FTS5 index and its sync triggers, then rebuild it from ``api_book``.
+
+    Safe to run repeatedly. It runs after every ``migrate`` because SQLite
+    migrations that rebuild ``api_book`` also drop the triggers attached to it.
+    """
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+
+    with connection.cursor() as cursor:
+        for statement in _FTS_SCHEMA:
+            cursor.execute(statement)
+        cursor.execute(f"INSERT INTO {FTS_TABLE}({FTS_TABLE}) VALUES ('rebuild')")
+    return True
+
+
+def fts_available(using='default'):
+    connection = connections[using]
+    if connection.vendor != 'sqlite':
+        return False
+    return FTS_TABLE in connection.introspection.table_names()
+
+
+def _match_expression(query, filter_type):
+    """Turn free text into an FTS5 prefix query, quoting every token"""
+    tokens = re.findall(r'\w+', query)
+    if not tokens:
+        return None
+
+    expression = ' '.join(f'"{token}"*' for token in tokens)
+    column = FILTER_COLUMNS.get(filter_type)
+    if column:
+        return f'{{{column}}} : ({expression})'
+    return expression
+
+
+def _fallback_search(query, filter_type, limit):
+    fields = [FILTER_COLUMNS[filter_type]] if filter_type in FILTER_COLUMNS else list(FTS_COLUMNS)
+    books = Book.objects.all()
+    for token in re.findall(r'\w+', query):
+        token_filter = Q()
+        for field in fields:
+            token_filter |= Q(**{f'{field}__icontains': token})
+        books = books.filter(token_filter)
+    return list(books.order_by('title')[:limit])
+
+
+def search_local_books(query, filter_type='title', limit=40):
+    """Return saved books matching ``query``, best match first"""
+    if not re.search(r'\w', query):
+        return []
+
+    if not fts_available():
+        books = _fallback_search(query, filter_type, limit)
+    else:
+        weights = ', '.join(str(weight) for weight in FTS_WEIGHTS)
+        with connections['default'].cursor() as cursor:
+            cursor.execute(
+                f"SELECT rowid FROM {FTS_TABLE} WHERE {FTS_TABLE} MATCH %s "
+                f"ORDER BY bm25({FTS_TABLE}, {weights}) LIMIT %s",
+                [_match_expression(query, filter_type), limit]
+            )
+            ranked_ids = [row[0] for row in cursor.fetchall()]
+        books_by_id = Book.objects.in_bulk(ranked_ids)
+        books = [books_by_id[book_id] for book_id in ranked_ids if book_id in books_by_id]
+
+    return [
+        {
+            'google_books_id': book.google_books_id,
+            'title': book.title,
+            'genre': book.genre or 'Unknown Genre',
+            'author': book.author or 'Unknown Author',
+            'year': book.year or 'N/A',
+            'description': book.description or 'No Description',
+            'image': book.image or '',
+        }
+        for book in books
+    ]
@@ -0,0 +1,84 @@
+"""Per-user activity counters stored in ``UserCounters``.
+
+Write paths call ``bump`` with the change they made, inside the same
+transaction, or ``refresh`` when a bulk write or cascade makes the change
+hard to know. Reads use ``get`` instead of counting the source tables.
+A user's row is created from the source tables the first time it is needed.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import Count, F
+
+from .models import Rating, ReadlistBook, Review, UserBookStatus, UserCounters, UserFollow
+
+FIELDS = [
+    'ratings', 'reviews', 'replies', 'books_finished', 'favorites', 'readlist_additions', 'followers', 'following'
+]
+
+
+def _source(field):
+    """The rows counted by ``field`` and the lookup of their user.
+
+    Migration 0011 backfilled from a frozen copy of this mapping; changing a
+    source here needs a data migration that recounts the field.
+    """
+    return {
+        'ratings': (Rating.objects.all(), 'user_id'),
+        'reviews': (Review.objects.filter(parent__isnull=True), 'user_id'),
+        'replies': (Review.objects.filter(parent__isnull=False), 'user_id'),
+        'books_finished': (UserBookStatus.objects.filter(status='FINISHED'), 'user_id'),
+        'favorites': (ReadlistBook.objects.filter(readlist__is_favorites=True), 'readlist__user_id'),
+        'readlist_additions': (ReadlistBook.objects.filter(readlist__is_favorites=False), 'readlist__user_id'),
+        'followers': (UserFollow.objects.all(), 'followed_id'),
+        'following': (UserFollow.objects.all(), 'follower_id'),
+    }[field]
+
+
+def compute(user_ids=None, fields=FIELDS):
+    """Count ``fields`` from the source tables as ``{user_id: {field: count}}``"""
+    counts = {}
+    if user_ids is not None:
+        counts = {user_id: dict.fromkeys(fields, 0) for user_id in user_ids}
+
+    for field in fields:
+        rows, user_lookup = _source(field)
+        if user_ids is not None:
+            rows = rows.filter(**{f'{user_lookup}__in': user_ids})
+        for user_id, total in rows.values_list(user_lookup).annotate(total=Count('pk')).order_by():
+            counts.setdefault(user_id, dict.fromkeys(fields, 0))[field] = total
+    return counts
+
+
+def _create(user_id):
+    """Create a user's row from the source tables; returns None if it already exists"""
+    try:
+        with transaction.atomic():
+            return UserCounters.objects.create(user_id=user_id, **compute([user_id])[user_id])
+    except IntegrityError:
+        return None
+
+
+def get(user):
+    """The user's counters, created from the source tables on first use"""
+    counters = UserCounters.objects.filter(user=user).first()
+    return counters or _create(user.pk) or UserCounters.objects.get(user=user)
+
+
+def bump(user, **deltas):
+    """Apply ``field=delta`` changes for a write made in the current transaction"""
+    user_id = getattr(user, 'pk', user)
+    changes = {field: F(field) + delta for field, delta in deltas.items() if delta}
+    if not changes:
+        return
+    if UserCounters.objects.filter(user_id=user_id).update(**changes):
+        return
+    # A new row is counted after the write, so it already includes the change
+    if _create(user_id) is None:
+        UserCounters.objects.filter(user_id=user_id).update(**changes)
+
+
+def refresh(user_ids, fields=FIELDS):
+    """Recount ``fields`` for the given users from the source tables"""
+    user_ids = set(user_ids)
+    for user_id, values in compute(user_ids, fields).items():
+        if not UserCounters.objects.filter(user_id=user_id).update(**values):
+            _create(user_id)
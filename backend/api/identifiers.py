@@ -0,0 +1,59 @@
+"""ISBN to Google Books volume resolution backed by the ``BookIdentifier`` table."""
+from datetime import timedelta
+
+from django.conf import settings
+from django.db.models import Q
+from django.utils import timezone
+
+from .models import BookIdentifier
+
+
+def isbns_from_volume(volume_info):
+    """Extract ISBN-10/ISBN-13 from a Google Books ``volumeInfo`` dict"""
+    isbns = {'isbn10': None, 'isbn13': None}
+    for identifier in volume_info.get('industryIdentifiers', []):
+        if identifier.get('type') == 'ISBN_10':
+            isbns['isbn10'] = identifier.get('identifier')
+        elif identifier.get('type') == 'ISBN_13':
+            isbns['isbn13'] = identifier.get('identifier')
+    return isbns
+
+
+def known_resolutions(isbns):
+    """Map each already resolved ISBN to its google_books_id, or None for a known miss.
+
+    ISBNs that were never looked up, or whose negative result has expired,
+    are left out so callers know to ask Google Books.
+    """
+    isbns = [isbn for isbn in isbns if isbn]
+    if not isbns:
+        return {}
+
+    rows = BookIdentifier.objects.filter(isbn__in=isbns).filter(
+        Q(google_books_id__isnull=False) | Q(expires_at__gt=timezone.now())
+    ).values_list('isbn', 'google_books_id')
+    return dict(rows)
+
+
+def record_resolutions(resolutions):
+    """Store ``{isbn: google_books_id or None}`` lookups, replacing older ones"""
+    resolutions = {isbn: google_books_id for isbn, google_books_id in resolutions.items() if isbn}
+    if not resolutions:
+        return
+
+    now = timezone.now()
+    negative_expiry = now + timedelta(seconds=settings.ISBN_NEGATIVE_TTL)
+    BookIdentifier.objects.bulk_create(
+        [
+            BookIdentifier(
+                isbn=isbn,
+                google_books_id=google_books_id,
+                resolved_at=now,
+                expires_at=None if google_books_id else negative_expiry,
+            )
+            for isbn, google_books_id in resolutions.items()
+        ],
+        update_conflicts=True,
+        unique_fields=['isbn'],
+        update_fields=['google_books_id', 'resolved_at', 'expires_at'],
+    )
@@ -0,0 +1,147 @@
+"""Leaderboard reads over ``UserPoints``.
+
+Users are ordered by points (highest first) and then by user id, which the
+``userpoints_rank_idx`` index serves directly. Ranks are competition ranks:
+a user's rank is one more than the number of users with more points, so tied
+users share a rank. Achievement counts come from the denormalized
+``UserPoints.achievement_count``, so no query is needed per entry.
+
+Known limit: ``rank_for`` and ``around`` count the users ahead of a score on
+the index, which reads O(rank) index entries per call. That is cheap near
+the top of the board but grows for low-ranked users; a per-score rollup
+would be needed to read ranks in O(log n).
+
+The following-scoped board ranks a user among the people they follow. Its
+pages are cached per user under a version token that is replaced on follow,
+unfollow and when the user is awarded points. An award does not replace the
+tokens of the awardee's followers, which would cost a write per follower, so
+followers see the new score within LEADERBOARD_FOLLOWING_CACHE_TTL.
+"""
+import uuid
+
+from django.conf import settings
+from django.core.cache import cache
+from django.db.models import Q
+
+from .models import UserFollow, UserPoints
+
+
+def entry(user_points, rank):
+    return {
+        'rank': rank,
+        'username': user_points.user.username,
+        'level': user_points.level,
+        'total_points': user_points.total_points,
+        'achievements': user_points.achievement_count
+    }
+
+
+def rank_for(total_points):
+    """Rank of a score: one more than the number of users with more points; reads O(rank) index entries"""
+    return UserPoints.objects.filter(total_points__gt=total_points).count() + 1
+
+
+def ranked(rows, first_position, first_rank):
+    """Entries for consecutive leaderboard rows, the first of which is at ``first_position``"""
+    entries = []
+    previous = None
+    for offset, user_points in enumerate(rows):
+        if previous is None:
+            rank = first_rank
+        elif user_points.total_points != previous.total_points:
+            rank = first_position + offset
+        entries.append(entry(user_points, rank))
+        previous = user_points
+    return entries
+
+
+def _after(total_points, user_id):
+    return Q(total_points__lt=total_points) | Q(total_points=total_points, user_id__gt=user_id)
+
+
+def _before(total_points, user_id):
+    return Q(total_points__gt=total_points) | Q(total_points=total_points, user_id__lt=user_id)
+
+
+def _rows(queryset):
+    return queryset.select_related('user').only(
+        'user_id', 'total_points', 'level', 'achievement_count', 'user__username'
+    )
+
+
+def top(limit, after=None, scope=None):
+    """One page of the leaderboard and the cursor values for the next one.
+
+    ``after`` is ``(total_points, user_id, rank, position)`` of the last entry
+    on the previous page, so each page is a single index range read.
+    ``scope`` restricts the board to a ``UserPoints`` queryset.
+    Returns ``(entries, last)`` where ``last`` is None on the final page.
+    """
+    rows = _rows((scope if scope is not None else UserPoints.objects).order_by('-total_points', 'user_id'))
+    first_position = first_rank = 1
+    if after:
+        total_points, user_id, rank, position = after
+        rows = rows.filter(_after(total_points, user_id))
+        first_position = position + 1
+    rows = list(rows[:limit + 1])
+
+    if after and rows:
+        # The first row continues the previous page's tie if it has the same score
+        first_rank = rank if rows[0].total_points == total_points else first_position
+
+    has_more = len(rows) > limit
+    entries = ranked(rows[:limit], first_position, first_rank)
+    if not has_more or not entries:
+        return entries, None
+    last = rows[limit - 1]
+    return entries, (last.total_points, last.user_id, entries[-1]['rank'], first_position + limit - 1)
+
+
+def around(user_points, neighbours):
+    """The user's rank with up to ``neighbours`` entries on each side of them"""
+    total_points, user_id = user_points.total_points, user_points.user_id
+    rank = rank_for(total_points)
+    position = rank + UserPoints.objects.filter(total_points=total_points, user_id__lt=user_id).count()
+
+    above = list(_rows(UserPoints.objects.filter(_before(total_points, user_id))).order_by(
+        'total_points', '-user_id'
+    )[:neighbours])[::-1]
+    below = list(_rows(UserPoints.objects.filter(_after(total_points, user_id))).order_by(
+        '-total_points', 'user_id'
+    )[:neighbours])
+
+    rows = above + [user_points] + below
+    first_position = position - len(above)
+    first_rank = rank if rows[0].total_points == total_points else rank_for(rows[0].total_points)
+    return rank, ranked(rows, first_position, first_rank)
+
+
+def following_scope(user_id):
+    """The user and everyone they follow, as one subquery on the follow index"""
+    followed = UserFollow.objects.filter(follower_id=user_id).values('followed_id')
+    return UserPoints.objects.filter(Q(user_id__in=followed) | Q(user_id=user_id))
+
+
+def _version_key(user_id):
+    return f'leaderboard:following:version:{user_id}'
+
+
+def following_top(user_id, limit, cursor=None):
+    """``top`` over ``following_scope``, cached per user for LEADERBOARD_FOLLOWING_CACHE_TTL.
+
+    ``cursor`` is the decoded cursor; it is part of the cache key.
+    """
+    version = cache.get(_version_key(user_id), '')
+    after = ':'.join(str(value) for value in cursor) if cursor else ''
+    key = f'leaderboard:following:{user_id}:{version}:{limit}:{after}'
+    page = cache.get(key)
+    if page is None:
+        page = top(limit, cursor, scope=following_scope(user_id))
+        cache.set(key, page, settings.LEADERBOARD_FOLLOWING_CACHE_TTL)
+    return page
+
+
+def invalidate_following(user_ids):
+    """Give each user's following board a new version so their cached pages are no longer read"""
+    if user_ids:
+        cache.set_many({_version_key(user_id): uuid.uuid4().hex for user_id in user_ids}, None)
@@ -0,0 +1,30 @@
+from datetime import timedelta
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+from django.utils import timezone
+
+from api.points_history import compact
+
+
+class Command(BaseCommand):
+    help = "Fold points history rows older than the retention window into daily and weekly rollups"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--days', type=int, default=settings.POINTS_HISTORY_RETENTION_DAYS,
+                            help="Keep individual history rows for this many days")
+        parser.add_argument('--dry-run', action='store_true', help="Report how many rows would be folded")
+
+    def handle(self, *args, **options):
+        # Cut at midnight so a day's rows are folded together
+        cutoff = (timezone.localtime() - timedelta(days=options['days'])).replace(
+            hour=0, minute=0, second=0, microsecond=0
+        )
+        rows, rollups = compact(cutoff, dry_run=options['dry_run'])
+
+        if options['dry_run']:
+            self.stdout.write(self.style.SUCCESS(f"Found {rows} history row(s) older than {cutoff:%Y-%m-%d}"))
+        else:
+            self.stdout.write(self.style.SUCCESS(
+                f"Folded {rows} history row(s) older than {cutoff:%Y-%m-%d} into {rollups} rollup(s)"
+            ))
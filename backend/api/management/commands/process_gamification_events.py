@@ -0,0 +1,40 @@
+import time
+
+from django.conf import settings
+from django.core.management.base import BaseCommand
+
+from api.outbox import pending_events, process_batch
+
+
+class Command(BaseCommand):
+    help = "Apply queued gamification events (points, achievements, Done Reading) in batches"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--batch-size', type=int, default=settings.GAMIFICATION_BATCH_SIZE)
+        parser.add_argument('--once', action='store_true', help="Drain the queue once and exit instead of polling")
+        parser.add_argument('--interval', type=float, default=2.0, help="Seconds to wait when the queue is empty")
+        parser.add_argument('--dry-run', action='store_true', help="Report pending events without applying them")
+
+    def handle(self, *args, **options):
+        batch_size = options['batch_size']
+        if options['dry_run']:
+            pending = len(pending_events(batch_size))
+            self.stdout.write(self.style.SUCCESS(f"Found {pending} pending event(s) in the next batch"))
+            return
+
+        total_processed = total_failed = 0
+        while True:
+            processed, failed = process_batch(batch_size)
+            total_processed += processed
+            total_failed += failed
+            if processed or failed:
+                self.stdout.write(f"Processed {processed} event(s), {failed} failed")
+
+            # A full batch means more may be waiting
+            if processed + failed == batch_size:
+                continue
+            if options['once']:
+                break
+            time.sleep(options['interval'])
+
+        self.stdout.write(self.style.SUCCESS(f"Processed {total_processed} event(s), {total_failed} failed"))
@@ -0,0 +1,27 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Readlist
+from api.readlist_order import dense_readlist_ids, rebalance
+
+
+class Command(BaseCommand):
+    help = "Renumber the book order keys of readlists whose neighbouring keys have become too close"
+
+    def add_arguments(self, parser):
+        parser.add_argument(
+            '--dry-run', action='store_true', help="Report dense readlists without renumbering them"
+        )
+
+    def handle(self, *args, **options):
+        # Only readlists with a gap below ORDER_MIN_GAP are loaded
+        dense = list(Readlist.objects.filter(id__in=list(dense_readlist_ids())).only('id', 'name').order_by('id'))
+
+        for readlist in dense:
+            self.stdout.write(f"Readlist {readlist.id} ({readlist.name})")
+            if not options['dry_run']:
+                with transaction.atomic():
+                    rebalance(readlist)
+
+        action = "Found" if options['dry_run'] else "Rebalanced"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(dense)} readlist(s) with dense order keys"))
@@ -0,0 +1,34 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.models import Book
+from api.ratings import AGGREGATE_FIELDS, compute_aggregates
+
+
+class Command(BaseCommand):
+    help = "Recompute per-book rating aggregates from Rating rows and report books that had drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        expected = compute_aggregates()
+        empty = dict.fromkeys(AGGREGATE_FIELDS, 0)
+
+        drifted = []
+        for book in Book.objects.only('id', 'title', *AGGREGATE_FIELDS).iterator():
+            correct = expected.get(book.id, empty)
+            if any(getattr(book, field) != correct[field] for field in AGGREGATE_FIELDS):
+                drifted.append((book, correct))
+
+        for book, correct in drifted:
+            self.stdout.write(f"Book {book.id} ({book.title}): stored {book.rating_count} ratings, "
+                              f"actual {correct['rating_count']}")
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                for book, correct in drifted:
+                    Book.objects.filter(pk=book.pk).update(**correct)
+
+        action = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifted)} book(s) with drifted rating aggregates"))
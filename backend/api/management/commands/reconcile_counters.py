@@ -0,0 +1,38 @@
+from django.core.management.base import BaseCommand
+from django.db import transaction
+
+from api.counters import FIELDS, compute
+from api.models import UserCounters
+
+
+class Command(BaseCommand):
+    help = "Recompute per-user activity counters from their source tables and report users that had drifted"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--dry-run', action='store_true', help="Report drift without fixing it")
+
+    def handle(self, *args, **options):
+        expected = compute()
+        empty = dict.fromkeys(FIELDS, 0)
+
+        drifted = []
+        for user_counters in UserCounters.objects.select_related('user').iterator():
+            correct = expected.get(user_counters.user_id, empty)
+            changes = {
+                field: (getattr(user_counters, field), correct[field])
+                for field in FIELDS if getattr(user_counters, field) != correct[field]
+            }
+            if changes:
+                drifted.append((user_counters, correct, changes))
+
+        for user_counters, _, changes in drifted:
+            details = ", ".join(f"{field} {stored} -> {actual}" for field, (stored, actual) in changes.items())
+            self.stdout.write(f"User {user_counters.user_id} ({user_counters.user.username}): {details}")
+
+        if not options['dry_run']:
+            with transaction.atomic():
+                for user_counters, correct, _ in drifted:
+                    UserCounters.objects.filter(pk=user_counters.pk).update(**correct)
+
+        action = "Found" if options['dry_run'] else "Fixed"
+        self.stdout.write(self.style.SUCCESS(f"{action} {len(drifted)} user(s) with drifted activity counters"))
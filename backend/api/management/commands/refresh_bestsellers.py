@@ -0,0 +1,22 @@
+from django.core.management.base import BaseCommand, CommandError
+
+from api.bestsellers import BestsellerFetchError, refresh_snapshot
+
+
+class Command(BaseCommand):
+    help = "Fetch the current NYT bestseller list and store an enriched snapshot when it has changed"
+
+    def add_arguments(self, parser):
+        parser.add_argument('--force', action='store_true', help="Re-run Google Books enrichment for the current list")
+        parser.add_argument('--deadline', type=float, help="Seconds to wait for Google Books lookups")
+
+    def handle(self, *args, **options):
+        try:
+            snapshot, refreshed = refresh_snapshot(force=options['force'], deadline=options['deadline'])
+        except BestsellerFetchError as e:
+            raise CommandError(str(e))
+
+        if refreshed:
+            self.stdout.write(self.style.SUCCESS(f"Stored {len(snapshot.books)} books for {snapshot}"))
+        else:
+            self.stdout.write(f"{snapshot} is already up to date")
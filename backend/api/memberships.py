@@ -0,0 +1,103 @@
+"""Readlist membership changes that keep ``Readlist.book_count`` in step.
+
+Inserts and deletes of ``ReadlistBook`` rows go through these helpers so a
+readlist's size, and its owner's favorites and readlist addition counters,
+can be read without counting rows.
+"""
+from collections import defaultdict
+
+from django.db import transaction
+from django.db.models import Count, F, Max, OuterRef, Subquery
+from django.db.models.functions import Coalesce
+
+from . import counters
+from .models import Readlist, ReadlistBook
+from .readlist_order import key_between
+
+MEMBERSHIP_COUNTERS = ['favorites', 'readlist_additions']
+
+
+def _counter(readlist):
+    return 'favorites' if readlist.is_favorites else 'readlist_additions'
+
+
+def _append_key(readlist_ids):
+    """The key after the last book of each readlist, so new memberships go to the end"""
+    last = dict(
+        ReadlistBook.objects.filter(readlist_id__in=readlist_ids).values('readlist_id').annotate(
+            last=Max('order')
+        ).values_list('readlist_id', 'last').order_by()
+    )
+    return {readlist_id: key_between(last.get(readlist_id), None) for readlist_id in readlist_ids}
+
+
+def _apply_counts(readlists, delta):
+    """Move ``book_count`` and the owners' membership counters by ``delta`` for each readlist"""
+    Readlist.objects.filter(id__in=[readlist.id for readlist in readlists]).update(
+        book_count=F('book_count') + delta
+    )
+    deltas = defaultdict(lambda: defaultdict(int))
+    for readlist in readlists:
+        deltas[readlist.user_id][_counter(readlist)] += delta
+    for user_id, changes in deltas.items():
+        counters.bump(user_id, **changes)
+
+
+def add_book(readlist, book):
+    """Add a book to the end of a readlist; returns whether it was not already there"""
+    with transaction.atomic():
+        _, created = ReadlistBook.objects.get_or_create(
+            readlist=readlist, book=book, defaults={'order': lambda: _append_key([readlist.pk])[readlist.pk]}
+        )
+        if created:
+            Readlist.objects.filter(pk=readlist.pk).update(book_count=F('book_count') + 1)
+            counters.bump(readlist.user_id, **{_counter(readlist): 1})
+    return created
+
+
+def remove_book(readlist, book):
+    """Remove a book from a readlist; returns whether it was there"""
+    with transaction.atomic():
+        removed, _ = ReadlistBook.objects.filter(readlist=readlist, book=book).delete()
+        if removed:
+            Readlist.objects.filter(pk=readlist.pk).update(book_count=F('book_count') - removed)
+            counters.bump(readlist.user_id, **{_counter(readlist): -removed})
+    return bool(removed)
+
+
+def add_to_readlists(book, readlists):
+    """Append a book to several readlists that do not hold it yet, with one insert"""
+    if not readlists:
+        return
+    with transaction.atomic():
+        keys = _append_key([readlist.id for readlist in readlists])
+        ReadlistBook.objects.bulk_create(
+            [ReadlistBook(readlist_id=readlist.id, book=book, order=keys[readlist.id]) for readlist in readlists]
+        )
+        _apply_counts(readlists, 1)
+
+
+def remove_from_readlists(book, readlists):
+    """Remove a book from several readlists that hold it, with one delete"""
+    if not readlists:
+        return
+    with transaction.atomic():
+        ReadlistBook.objects.filter(readlist_id__in=[readlist.id for readlist in readlists], book=book).delete()
+        _apply_counts(readlists, -1)
+
+
+def refresh_owner_counters(readlist_ids):
+    """Recount the membership counters of the readlists' owners after an import"""
+    counters.refresh(
+        Readlist.objects.filter(id__in=readlist_ids).values_list('user_id', flat=True).distinct(),
+        MEMBERSHIP_COUNTERS
+    )
+
+
+def recount(readlist_ids=None):
+    """Recompute book_count from ReadlistBook rows in a single UPDATE"""
+    counts = ReadlistBook.objects.filter(readlist=OuterRef('pk')).order_by().values('readlist').annotate(
+        total=Count('id')
+    ).values('total')
+    readlists = Readlist.objects.all() if readlist_ids is None else Readlist.objects.filter(id__in=readlist_ids)
+    return readlists.update(book_count=Coalesce(Subquery(counts), 0))
@@ -0,0 +1,27 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:18
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0003_userbookstatus_finished_points_awarded_and_more'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BestsellerSnapshot',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('list_name', models.CharField(max_length=100)),
+                ('list_date', models.CharField(max_length=20)),
+                ('list_update_date', models.CharField(blank=True, max_length=20)),
+                ('books', models.JSONField(default=list)),
+                ('fetched_at', models.DateTimeField(auto_now=True)),
+            ],
+            options={
+                'unique_together': {('list_name', 'list_date')},
+            },
+        ),
+    ]
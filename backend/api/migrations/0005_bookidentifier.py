@@ -0,0 +1,33 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:20
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0004_bestsellersnapshot'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='BookIdentifier',
+            fields=[
+                ('id', models.BigAutoField(auto_created=True, primary_key=True, serialize=False, verbose_name='ID')),
+                ('isbn', models.CharField(max_length=13, unique=True)),
+                ('google_books_id', models.CharField(blank=True, db_index=True, max_length=100, null=True)),
+                ('resolved_at', models.DateTimeField(auto_now=True)),
+                ('expires_at', models.DateTimeField(blank=True, null=True)),
+            ],
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='isbn10',
+            field=models.CharField(blank=True, db_index=True, max_length=10, null=True),
+        ),
+        migrations.AlterField(
+            model_name='book',
+            name='isbn13',
+            field=models.CharField(blank=True, db_index=True, max_length=13, null=True),
+        ),
+    ]
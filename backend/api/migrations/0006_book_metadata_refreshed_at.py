@@ -0,0 +1,18 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:22
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0005_bookidentifier'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='book',
+            name='metadata_refreshed_at',
+            field=models.DateTimeField(blank=True, null=True),
+        ),
+    ]
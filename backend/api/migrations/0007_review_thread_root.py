@@ -0,0 +1,39 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:23
+
+from collections import defaultdict
+
+import django.db.models.deletion
+from django.db import migrations, models
+
+
+def set_thread_roots(apps, schema_editor):
+    Review = apps.get_model('api', 'Review')
+    parents = dict(Review.objects.values_list('id', 'parent_id'))
+
+    replies_by_root = defaultdict(list)
+    for review_id, parent_id in parents.items():
+        if parent_id is None:
+            continue
+        root_id = parent_id
+        while parents.get(root_id) is not None:
+            root_id = parents[root_id]
+        replies_by_root[root_id].append(review_id)
+
+    for root_id, reply_ids in replies_by_root.items():
+        Review.objects.filter(id__in=reply_ids).update(thread_root_id=root_id)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0006_book_metadata_refreshed_at'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='review',
+            name='thread_root',
+            field=models.ForeignKey(blank=True, null=True, on_delete=django.db.models.deletion.CASCADE, related_name='thread_replies', to='api.review'),
+        ),
+        migrations.RunPython(set_thread_roots, migrations.RunPython.noop),
+    ]
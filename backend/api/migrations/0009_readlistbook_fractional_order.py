@@ -0,0 +1,22 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:32
+
+from django.db import migrations, models
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0008_book_rating_aggregates'),
+    ]
+
+    operations = [
+        migrations.AlterField(
+            model_name='readlistbook',
+            name='order',
+            field=models.FloatField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='readlistbook',
+            index=models.Index(fields=['readlist', 'order', 'id'], name='readlistbook_order_idx'),
+        ),
+    ]
@@ -0,0 +1,28 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:35
+
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_book_counts(apps, schema_editor):
+    Readlist = apps.get_model('api', 'Readlist')
+    ReadlistBook = apps.get_model('api', 'ReadlistBook')
+    rows = ReadlistBook.objects.values('readlist_id').annotate(book_count=Count('id'))
+    for row in rows:
+        Readlist.objects.filter(pk=row['readlist_id']).update(book_count=row['book_count'])
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0009_readlistbook_fractional_order'),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='readlist',
+            name='book_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.RunPython(fill_book_counts, migrations.RunPython.noop),
+    ]
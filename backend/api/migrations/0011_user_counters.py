@@ -0,0 +1,63 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:42
+
+import django.db.models.deletion
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_user_counters(apps, schema_editor):
+    User = apps.get_model(*settings.AUTH_USER_MODEL.split('.'))
+    Rating = apps.get_model('api', 'Rating')
+    Review = apps.get_model('api', 'Review')
+    UserBookStatus = apps.get_model('api', 'UserBookStatus')
+    ReadlistBook = apps.get_model('api', 'ReadlistBook')
+    UserFollow = apps.get_model('api', 'UserFollow')
+    UserCounters = apps.get_model('api', 'UserCounters')
+
+    # A frozen copy of counters._source as it was when the table was added.
+    # Migrations only see historical models, so this cannot import the live
+    # mapping; a later change to a source needs its own migration to recount.
+    sources = {
+        'ratings': (Rating.objects.all(), 'user_id'),
+        'reviews': (Review.objects.filter(parent__isnull=True), 'user_id'),
+        'replies': (Review.objects.filter(parent__isnull=False), 'user_id'),
+        'books_finished': (UserBookStatus.objects.filter(status='FINISHED'), 'user_id'),
+        'favorites': (ReadlistBook.objects.filter(readlist__is_favorites=True), 'readlist__user_id'),
+        'readlist_additions': (ReadlistBook.objects.filter(readlist__is_favorites=False), 'readlist__user_id'),
+        'followers': (UserFollow.objects.all(), 'followed_id'),
+        'following': (UserFollow.objects.all(), 'follower_id'),
+    }
+    counts = {user_id: {} for user_id in User.objects.values_list('id', flat=True)}
+    for field, (rows, user_lookup) in sources.items():
+        for user_id, total in rows.values_list(user_lookup).annotate(total=Count('pk')).order_by():
+            counts[user_id][field] = total
+    UserCounters.objects.bulk_create(
+        [UserCounters(user_id=user_id, **values) for user_id, values in counts.items()], batch_size=500
+    )
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0010_readlist_book_count'),
+        ('auth', '0012_alter_user_first_name_max_length'),
+    ]
+
+    operations = [
+        migrations.CreateModel(
+            name='UserCounters',
+            fields=[
+                ('user', models.OneToOneField(on_delete=django.db.models.deletion.CASCADE, primary_key=True, related_name='counters', serialize=False, to=settings.AUTH_USER_MODEL)),
+                ('ratings', models.PositiveIntegerField(default=0)),
+                ('reviews', models.PositiveIntegerField(default=0)),
+                ('replies', models.PositiveIntegerField(default=0)),
+                ('books_finished', models.PositiveIntegerField(default=0)),
+                ('favorites', models.PositiveIntegerField(default=0)),
+                ('readlist_additions', models.PositiveIntegerField(default=0)),
+                ('followers', models.PositiveIntegerField(default=0)),
+                ('following', models.PositiveIntegerField(default=0)),
+            ],
+        ),
+        migrations.RunPython(fill_user_counters, migrations.RunPython.noop),
+    ]
@@ -0,0 +1,35 @@
+# Generated by Django 5.1.2 on 2026-10-18 06:49
+
+from django.conf import settings
+from django.db import migrations, models
+from django.db.models import Count
+
+
+def fill_achievement_counts(apps, schema_editor):
+    UserAchievement = apps.get_model('api', 'UserAchievement')
+    UserPoints = apps.get_model('api', 'UserPoints')
+
+    counts = UserAchievement.objects.values_list('user_id').annotate(total=Count('pk')).order_by()
+    for user_id, total in counts:
+        UserPoints.objects.filter(user_id=user_id).update(achievement_count=total)
+
+
+class Migration(migrations.Migration):
+
+    dependencies = [
+        ('api', '0012_gamification_event'),
+        migrations.swappable_dependency(settings.AUTH_USER_MODEL),
+    ]
+
+    operations = [
+        migrations.AddField(
+            model_name='userpoints',
+            name='achievement_count',
+            field=models.PositiveIntegerField(default=0),
+        ),
+        migrations.AddIndex(
+            model_name='userpoints',
+            index=models.Index(fields=['-total_points', 'user'], name='userpoints_rank_idx'),
+        ),
+        migrations.RunPython(fill_achievement_counts, migrations.RunPython.noop),
+    ]
@@ -6,15 +6,46 @@ class Book(models.Model):
     title = models.CharField(max_length=150)
     author = models.CharField(max_length=150)
     description = models.TextField(blank=True, null=True)
-    isbn10 = models.CharField(max_length=10, blank=True, null=True)
-    isbn13 = models.CharField(max_length=13, blank=True, null=True)
+    isbn10 = models.CharField(max_length=10, blank=True, null=True, db_index=True)
+    isbn13 = models.CharField(max_length=13, blank=True, null=True, db_index=True)
     genre = models.CharField(max_length=100, blank=True, null=True)
     image = models.URLField(max_length=200, blank=True, null=True)
     year = models.CharField(max_length=4, blank=True, null=True)
+    metadata_refreshed_at = models.DateTimeField(blank=True, null=True)
+    # Rating aggregates kept in step with Rating rows by rate_book
+    rating_count = models.PositiveIntegerField(default=0)
+    rating_sum = models.PositiveIntegerField(default=0)
+    rating_1 = models.PositiveIntegerField(default=0)
+    rating_2 = models.PositiveIntegerField(default=0)
+    rating_3 = models.PositiveIntegerField(default=0)
+    rating_4 = models.PositiveIntegerField(default=0)
+    rating_5 = models.PositiveIntegerField(default=0)
 
     def __str__(self):
         return self.title
 
+    @property
+    def average_rating(self):
+        return round(self.rating_sum / self.rating_count, 1) if self.rating_count else 0
+
+    @property
+    def rating_histogram(self):
+        return {value: getattr(self, f'rating_{value}') for value in range(1, 6)}
+
+class BookIdentifier(models.Model):
+    """Resolution of an ISBN to a Google Books volume.
+
+    A null google_books_id records that Google Books had no match; such
+    negative entries are retried once expires_at has passed.
+    """
+    isbn = models.CharField(max_length=13, unique=True)
+    google_books_id = models.CharField(max_length=100, blank=True, null=True, db_index=True)
+    resolved_at = models.DateTimeField(auto_now=True)
+    expires_at = models.DateTimeField(blank=True, null=True)
+
+    def __str__(self):
+        return f"ISBN {self.isbn} -> {self.google_books_id or 'not found'}"
+
 class Profile(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE)
     bio = models.TextField(max_length=500, blank=True)
@@ -52,42 +83,59 @@ class Review(models.Model):
     review_text = models.TextField()
     updated_at = models.DateTimeField(auto_now=True)
     parent = models.ForeignKey('self', on_delete=models.CASCADE, null=True, blank=True, related_name='replies')
+    # Top-level review of the thread this reply belongs to (null for top-level reviews)
+    thread_root = models.ForeignKey(
+        'self', on_delete=models.CASCADE, null=True, blank=True, related_name='thread_replies'
+    )
 
     def __str__(self):
         return f"{self.book.title} review by {self.user.username}"
 
+    def save(self, *args, **kwargs):
+        if self.parent_id and not self.thread_root_id:
+            self.thread_root_id = self.parent.thread_root_id or self.parent_id
+        super().save(*args, **kwargs)
+
+    def thread_tree(self):
+        """Serialize the whole thread this review belongs to with one query"""
+        root_id = self.thread_root_id or self.id
+        thread = Review.objects.filter(
+            models.Q(id=root_id) | models.Q(thread_root_id=root_id)
+        ).select_related('user').order_by('id')
+        return build_review_tree(thread)
+
     def get_replies(self):
-        replies_data = []
-        for reply in self.replies.all():
-            reply_data = {
-                'id': reply.id,
-                'user': {
-                    'id': reply.user.id,
-                    'username': reply.user.username
-                },
-                'review_text': reply.review_text,
-                'added_date': reply.added_date,
-                'updated_at': reply.updated_at,
-                'parent': self.id,
-                'replies': reply.get_replies()
-            }
-            replies_data.append(reply_data)
-        return replies_data
+        return self.thread_tree()[self.id]['replies']
     
     def to_dict(self):
-        return {
-            'id': self.id,
+        return self.thread_tree()[self.id]
+
+def build_review_tree(reviews):
+    """Assemble reviews into nested reply dicts in memory.
+
+    Returns a dict of every review's serialized node keyed by id, in the
+    order given. Top-level reviews are the nodes whose 'parent' is None.
+    """
+    nodes = {}
+    for review in reviews:
+        nodes[review.id] = {
+            'id': review.id,
             'user': {
-                'id': self.user.id,
-                'username': self.user.username
+                'id': review.user.id,
+                'username': review.user.username
             },
-            'review_text': self.review_text,
-            'added_date': self.added_date,
-            'updated_at': self.updated_at,
-            'parent': self.parent.id if self.parent else None,
-            'replies': self.get_replies()
+            'review_text': review.review_text,
+            'added_date': review.added_date,
+            'updated_at': review.updated_at,
+            'parent': review.parent_id,
+            'replies': []
         }
 
+    for node in nodes.values():
+        if node['parent'] in nodes:
+            nodes[node['parent']]['replies'].append(node)
+    return nodes
+
 class UserBookStatus(models.Model):
     STATUS_CHOICES = [
         ('NOT_STARTED', 'Not Started'),
@@ -123,6 +171,8 @@ class Readlist(models.Model):
     is_favorites = models.BooleanField(default=False) 
     books = models.ManyToManyField(Book, through="ReadlistBook", related_name="readlists")
     shared_with = models.ManyToManyField(User, related_name="shared_readlists", blank=True)  
+    # Maintained by api.memberships
+    book_count = models.PositiveIntegerField(default=0)
     
     def __str__(self):
         return f"{self.name} ({self.user.username})"
@@ -130,11 +180,13 @@ class Readlist(models.Model):
 class ReadlistBook(models.Model):
     readlist = models.ForeignKey(Readlist, on_delete=models.CASCADE, related_name="readlist_books") 
     book = models.ForeignKey(Book, on_delete=models.CASCADE)
-    order = models.PositiveIntegerField(default=0)
+    # Fractional key, see api.readlist_order
+    order = models.FloatField(default=0)
 
     class Meta:
         unique_together = ('readlist', 'book')
         ordering = ['order']
+        indexes = [models.Index(fields=['readlist', 'order', 'id'], name='readlistbook_order_idx')]
 
     def __str__(self):
         return f"{self.book.title} in {self.readlist.name}"
@@ -187,19 +239,88 @@ class UserPoints(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='points')
     total_points = models.PositiveIntegerField(default=0)
     level = models.PositiveIntegerField(default=1)
-    
+    # Number of UserAchievement rows, kept for the leaderboard by api.achievements
+    achievement_count = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        indexes = [
+            # Leaderboard order, also used to count the users ahead of a score
+            models.Index(fields=['-total_points', 'user'], name='userpoints_rank_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}: {self.total_points} points (Level {self.level})"
 
+class UserCounters(models.Model):
+    """Per-user activity counts, kept in step with their source tables by api.counters"""
+    user = models.OneToOneField(User, on_delete=models.CASCADE, primary_key=True, related_name='counters')
+    ratings = models.PositiveIntegerField(default=0)
+    reviews = models.PositiveIntegerField(default=0)
+    replies = models.PositiveIntegerField(default=0)
+    books_finished = models.PositiveIntegerField(default=0)
+    favorites = models.PositiveIntegerField(default=0)
+    # Books in the user's readlists other than Favorites
+    readlist_additions = models.PositiveIntegerField(default=0)
+    followers = models.PositiveIntegerField(default=0)
+    following = models.PositiveIntegerField(default=0)
+
+    def __str__(self):
+        return f"Activity counters for {self.user.username}"
+
 class PointsHistory(models.Model):
     user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_history')
     amount = models.IntegerField()
     description = models.CharField(max_length=255)
     timestamp = models.DateTimeField(auto_now_add=True)
-    
+
+    class Meta:
+        indexes = [
+            # Newest-first history pages, keyed by (timestamp, id)
+            models.Index(fields=['user', '-timestamp', '-id'], name='pointshistory_user_time_idx'),
+        ]
+
     def __str__(self):
         return f"{self.user.username}: {self.amount} points for {self.description}"
 
+class PointsRollup(models.Model):
+    """Daily or weekly point totals for history rows folded in by compact_points_history"""
+    DAY = 'day'
+    WEEK = 'week'
+    PERIOD_CHOICES = [(DAY, 'Day'), (WEEK, 'Week')]
+
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='points_rollups')
+    period = models.CharField(max_length=4, choices=PERIOD_CHOICES)
+    # The day, or the Monday the week starts on
+    period_start = models.DateField()
+    points = models.IntegerField(default=0)
+    entries = models.PositiveIntegerField(default=0)
+
+    class Meta:
+        unique_together = ('user', 'period', 'period_start')
+
+    def __str__(self):
+        return f"{self.user.username}: {self.points} points for the {self.period} of {self.period_start}"
+
+class GamificationEvent(models.Model):
+    """Outbox entry for the points and achievements a user action earns, applied by api.outbox"""
+    user = models.ForeignKey(User, on_delete=models.CASCADE, related_name='gamification_events')
+    kind = models.CharField(max_length=50)
+    payload = models.JSONField(default=dict)
+    created_at = models.DateTimeField(auto_now_add=True)
+    processed_at = models.DateTimeField(null=True, blank=True)
+    # What the processed event awarded: {'achievements': [...], 'points': n}
+    result = models.JSONField(null=True, blank=True)
+    attempts = models.PositiveIntegerField(default=0)
+    last_error = models.TextField(blank=True)
+
+    class Meta:
+        indexes = [
+            models.Index(fields=['processed_at', 'id'], name='gamificationevent_pending_idx'),
+        ]
+
+    def __str__(self):
+        return f"{self.kind} for {self.user.username}"
+
 class ReadingStreak(models.Model):
     user = models.OneToOneField(User, on_delete=models.CASCADE, related_name='reading_streak')
     current_streak = models.PositiveIntegerField(default=0)
@@ -207,4 +328,17 @@ class ReadingStreak(models.Model):
     last_read_date = models.DateField(null=True, blank=True)
     
     def __str__(self):
-        return f"{self.user.username}: {self.current_streak} days streak"
\ No newline at end of file
+        return f"{self.user.username}: {self.current_streak} days streak"
+
+class BestsellerSnapshot(models.Model):
+    list_name = models.CharField(max_length=100)
+    list_date = models.CharField(max_length=20)
+    list_update_date = models.CharField(max_length=20, blank=True)
+    books = models.JSONField(default=list)
+    fetched_at = models.DateTimeField(auto_now=True)
+
+    class Meta:
+        unique_together = ('list_name', 'list_date')
+
+    def __str__(self):
+        return f"{self.list_name} bestsellers for {self.list_date}"
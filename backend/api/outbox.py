@@ -0,0 +1,190 @@
+"""Transactional outbox for gamification side effects.
+
+Views record a ``GamificationEvent`` in the same transaction as the user's
+action. The points, history rows, achievement checks and Done Reading upkeep
+that the action implies are applied by ``process``: right after the action
+when GAMIFICATION_ASYNC is off, otherwise by the
+``process_gamification_events`` worker. Events that still fail after the
+inline attempts stay pending, so the worker is needed in both modes.
+"""
+import logging
+
+from django.conf import settings
+from django.db import DatabaseError, transaction
+from django.db.models import F
+from django.utils import timezone
+
+from . import achievements, counters
+from .memberships import add_book, remove_book
+from .models import Book, GamificationEvent, Readlist, UserBookStatus
+from .points import award_points
+
+logger = logging.getLogger(__name__)
+
+BOOK_RATED = 'book_rated'
+REVIEW_CREATED = 'review_created'
+REPLY_CREATED = 'reply_created'
+READLIST_BOOKS_ADDED = 'readlist_books_added'
+BOOK_STATUS_CHANGED = 'book_status_changed'
+
+
+class EventError(Exception):
+    """A handler failure that a later attempt may not hit; the event is retried"""
+
+
+# Failures that leave an event pending for another attempt. Anything else is a
+# bug in a handler and is raised rather than retried until it is dead-lettered.
+RETRYABLE_ERRORS = (DatabaseError, EventError)
+
+
+def _evaluate(user, metric, counter):
+    return achievements.evaluate(user, metric, getattr(counters.get(user), counter))
+
+
+def _book_rated(event):
+    award_points(event.user, 2, "Rated a book")
+    messages, bonus = _evaluate(event.user, achievements.BOOKS_RATED, 'ratings')
+    return messages, 2 + bonus
+
+
+def _review_created(event):
+    award_points(event.user, 5, "Created a book review")
+    messages, bonus = _evaluate(event.user, achievements.REVIEWS_WRITTEN, 'reviews')
+    return messages, 5 + bonus
+
+
+def _reply_created(event):
+    award_points(event.user, 3, "Replied to a review")
+    return [], 3
+
+
+def _readlist_books_added(event):
+    """1 point per regular readlist and 2 for Favorites, plus the matching achievements"""
+    user, payload = event.user, event.payload
+    messages, points = [], 0
+
+    readlists = payload.get('readlists', 0)
+    if readlists:
+        award_points(user, readlists, f"Added '{payload['title']}' to {readlists} readlist(s)")
+        unlocked, bonus = _evaluate(user, achievements.READLIST_ADDITIONS, 'readlist_additions')
+        messages.extend(unlocked)
+        points += readlists + bonus
+
+    if payload.get('favorite'):
+        award_points(user, 2, "Added a book to favorites")
+        unlocked, bonus = _evaluate(user, achievements.FAVORITES_ADDED, 'favorites')
+        messages.extend(unlocked)
+        points += 2 + bonus
+
+    return messages, points
+
+
+def _book_status_changed(event):
+    """Award a first finish and keep Done Reading in step with the book's current status"""
+    user = event.user
+    book = Book.objects.get(id=event.payload['book_id'])
+    messages, points = [], 0
+
+    if event.payload.get('award_finished'):
+        award_points(user, 10, f"Finished reading: {book.title}")
+        messages, bonus = _evaluate(user, achievements.BOOKS_FINISHED, 'books_finished')
+        points = 10 + bonus
+
+    # The current status rather than the one in the payload, so events applied
+    # late or out of order still leave the list right
+    finished = UserBookStatus.objects.filter(user=user, book=book, status='FINISHED').exists()
+    if finished:
+        done_reading, _ = Readlist.objects.get_or_create(
+            user=user, name="Done Reading", defaults={"is_favorites": False}
+        )
+        add_book(done_reading, book)
+    else:
+        done_reading = Readlist.objects.filter(user=user, name="Done Reading").first()
+        if done_reading:
+            remove_book(done_reading, book)
+
+    return messages, points
+
+
+HANDLERS = {
+    BOOK_RATED: _book_rated,
+    REVIEW_CREATED: _review_created,
+    REPLY_CREATED: _reply_created,
+    READLIST_BOOKS_ADDED: _readlist_books_added,
+    BOOK_STATUS_CHANGED: _book_status_changed,
+}
+
+
+def record(user, kind, **payload):
+    """Add an event to the outbox; call inside the transaction that makes the change"""
+    if kind not in HANDLERS:
+        raise ValueError(f"Unknown gamification event: {kind}")
+    return GamificationEvent.objects.create(user=user, kind=kind, payload=payload)
+
+
+def process(event):
+    """Apply one event and mark it processed, returning its result.
+
+    The event is claimed with a conditional UPDATE in the same transaction as
+    its side effects, so two workers never apply it twice and a failing
+    handler leaves it pending.
+    """
+    with transaction.atomic():
+        claimed = GamificationEvent.objects.filter(id=event.id, processed_at__isnull=True).update(
+            processed_at=timezone.now()
+        )
+        if not claimed:
+            return GamificationEvent.objects.values_list('result', flat=True).get(id=event.id)
+
+        messages, points = HANDLERS[event.kind](event)
+        result = {'achievements': messages, 'points': points}
+        GamificationEvent.objects.filter(id=event.id).update(result=result)
+    event.result = result
+    return result
+
+
+def _record_failure(event, error):
+    logger.exception("Gamification event %s (%s) failed", event.id, event.kind)
+    GamificationEvent.objects.filter(id=event.id).update(attempts=F('attempts') + 1, last_error=str(error))
+
+
+def dispatch(event):
+    """Apply ``event`` now unless the worker handles it, and describe the outcome for the response.
+
+    Call after the recording transaction has committed. The result is
+    ``{'pending': False, 'achievements': [...], 'points': n}`` once applied,
+    or ``{'pending': True, 'achievements': [], 'points': None}`` while the
+    event waits for the worker.
+    """
+    if not settings.GAMIFICATION_ASYNC:
+        for _ in range(settings.GAMIFICATION_INLINE_ATTEMPTS):
+            try:
+                return {'pending': False, 'event_id': event.id, **process(event)}
+            except RETRYABLE_ERRORS as e:
+                _record_failure(event, e)
+        # Still pending for the worker rather than failing the user's action
+    return {'pending': True, 'event_id': event.id, 'achievements': [], 'points': None}
+
+
+def pending_events(batch_size):
+    return list(
+        GamificationEvent.objects.filter(
+            processed_at__isnull=True, attempts__lt=settings.GAMIFICATION_MAX_ATTEMPTS
+        ).select_related('user').order_by('id')[:batch_size]
+    )
+
+
+def process_batch(batch_size=None):
+    """Apply up to ``batch_size`` pending events in order. Returns ``(processed, failed)``"""
+    if batch_size is None:
+        batch_size = settings.GAMIFICATION_BATCH_SIZE
+
+    processed = failed = 0
+    for event in pending_events(batch_size):
+        try:
+            process(event)
+            processed += 1
+        except RETRYABLE_ERRORS as e:
+            _record_failure(event, e)
+            failed += 1
+    return processed, failed
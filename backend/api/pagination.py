@@ -0,0 +1,59 @@
+"""Keyset (cursor) pagination helpers shared by the list endpoints.
+
+A cursor is an opaque, URL-safe encoding of the sort key of the last row on a
+page. List responses pass the cursor for the next page in the X-Next-Cursor
+header so the body keeps its existing shape.
+"""
+import base64
+import binascii
+import json
+from datetime import datetime
+
+from django.utils.dateparse import parse_datetime
+
+NEXT_CURSOR_HEADER = 'X-Next-Cursor'
+
+
+class InvalidCursor(ValueError):
+    pass
+
+
+def encode_cursor(*values):
+    values = [value.isoformat() if isinstance(value, datetime) else value for value in values]
+    return base64.urlsafe_b64encode(json.dumps(values).encode()).decode()
+
+
+def decode_cursor(cursor, *types):
+    """Decode a cursor into values of the given types (``datetime``, ``int``, ``float``, ``str``)"""
+    try:
+        values = json.loads(base64.urlsafe_b64decode(cursor.encode()))
+        if not isinstance(values, list) or len(values) != len(types):
+            raise InvalidCursor(cursor)
+
+        decoded = []
+        for value, value_type in zip(values, types):
+            if value_type is datetime:
+                value = parse_datetime(value)
+                if value is None:
+                    raise InvalidCursor(cursor)
+            else:
+                value = value_type(value)
+            decoded.append(value)
+        return decoded
+    except (binascii.Error, UnicodeError, TypeError, ValueError) as e:
+        raise InvalidCursor(cursor) from e
+
+
+def parse_limit(value, default, maximum, minimum=1):
+    """Clamp a client-supplied page size to minimum..maximum"""
+    try:
+        limit = int(value)
+    except (TypeError, ValueError):
+        return default
+    return max(minimum, min(limit, maximum))
+
+
+def with_next_cursor(response, next_cursor):
+    if next_cursor:
+        response[NEXT_CURSOR_HEADER] = next_cursor
+    return response
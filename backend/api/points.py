@@ -0,0 +1,42 @@
+"""Point awards, applied atomically in the database.
+
+``award_points`` increments ``UserPoints`` with a single UPDATE using F()
+expressions and records the ``PointsHistory`` row in the same transaction,
+so concurrent awards for one user never overwrite each other. Once the
+award commits, the user's own following leaderboard is invalidated.
+"""
+from django.db import IntegrityError, transaction
+from django.db.models import F
+from django.db.models.functions import Greatest
+
+from . import leaderboard
+from .models import PointsHistory, UserPoints
+
+POINTS_PER_LEVEL = 100
+
+
+def level_for(total_points):
+    return total_points // POINTS_PER_LEVEL + 1
+
+
+def _add(user, amount):
+    # SET expressions read the row's old values, so the level is derived from the new total
+    return UserPoints.objects.filter(user=user).update(
+        total_points=F('total_points') + amount,
+        level=Greatest(F('level'), (F('total_points') + amount) / POINTS_PER_LEVEL + 1),
+    )
+
+
+def award_points(user, amount, description):
+    """Award points to a user and update their level (1 level per 100 points)"""
+    with transaction.atomic():
+        if not _add(user, amount):
+            try:
+                with transaction.atomic():
+                    UserPoints.objects.create(user=user, total_points=amount, level=level_for(amount))
+            except IntegrityError:
+                # Another request created the row first
+                _add(user, amount)
+
+        PointsHistory.objects.create(user=user, amount=amount, description=description)
+        transaction.on_commit(lambda: leaderboard.invalidate_following([user.id]))
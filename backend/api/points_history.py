@@ -0,0 +1,135 @@
+"""Reading and compacting a user's points history.
+
+Recent awards are kept row by row in ``PointsHistory``. The
+``compact_points_history`` command folds rows older than the retention
+window into daily and weekly ``PointsRollup`` totals and deletes them, so
+the history table only holds recent activity. Rollup reads merge the stored
+totals with the same totals computed from the rows still in the table.
+"""
+from collections import defaultdict
+from datetime import timedelta
+from itertools import chain
+
+from django.db import transaction
+from django.db.models import Count, DateField, Q, Sum
+from django.db.models.functions import TruncDate, TruncWeek
+
+from .models import PointsHistory, PointsRollup
+
+PERIODS = {
+    PointsRollup.DAY: TruncDate,
+    PointsRollup.WEEK: lambda field: TruncWeek(field, output_field=DateField()),
+}
+
+
+def week_start(day):
+    return day - timedelta(days=day.weekday())
+
+
+def page(user, limit, after=None):
+    """Newest-first history rows after the ``(timestamp, id)`` cursor.
+
+    Returns ``(rows, last)`` where ``last`` is the cursor for the next page,
+    or None on the final page.
+    """
+    rows = PointsHistory.objects.filter(user=user).order_by('-timestamp', '-id')
+    if after:
+        timestamp, history_id = after
+        rows = rows.filter(Q(timestamp__lt=timestamp) | Q(timestamp=timestamp, id__lt=history_id))
+    rows = list(rows[:limit + 1])
+
+    if len(rows) <= limit:
+        return rows, None
+    rows = rows[:limit]
+    return rows, (rows[-1].timestamp, rows[-1].id)
+
+
+def rollup(user, period, limit, before=None):
+    """Point totals per day or week, newest first, for periods starting before ``before``.
+
+    Returns ``(totals, last)`` where ``last`` is the period_start to continue
+    from, or None on the final page.
+    """
+    stored = PointsRollup.objects.filter(user=user, period=period)
+    recent = PointsHistory.objects.filter(user=user).annotate(period_start=PERIODS[period]('timestamp'))
+    if before:
+        stored = stored.filter(period_start__lt=before)
+        recent = recent.filter(period_start__lt=before)
+
+    # The newest limit + 1 periods of each source hold the newest limit + 1 overall
+    stored = stored.order_by('-period_start').values('period_start', 'points', 'entries')[:limit + 1]
+    recent = recent.values('period_start').annotate(
+        points=Sum('amount'), entries=Count('id')
+    ).order_by('-period_start')[:limit + 1]
+
+    totals = {}
+    for row in chain(stored, recent):
+        total = totals.setdefault(row['period_start'], {'period_start': row['period_start'], 'points': 0, 'entries': 0})
+        total['points'] += row['points']
+        total['entries'] += row['entries']
+
+    totals = sorted(totals.values(), key=lambda total: total['period_start'], reverse=True)
+    if len(totals) <= limit:
+        return totals, None
+    totals = totals[:limit]
+    return totals, totals[-1]['period_start']
+
+
+def _fold(rows):
+    """Add aggregated ``(user_id, day, points, entries)`` rows onto the daily and weekly rollups"""
+    totals = defaultdict(lambda: [0, 0])
+    for user_id, day, points, entries in rows:
+        for key in ((user_id, PointsRollup.DAY, day), (user_id, PointsRollup.WEEK, week_start(day))):
+            totals[key][0] += points
+            totals[key][1] += entries
+    if not totals:
+        return 0
+
+    starts = [period_start for _, _, period_start in totals]
+    existing = {
+        (rollup.user_id, rollup.period, rollup.period_start): rollup
+        for rollup in PointsRollup.objects.filter(
+            user_id__in={user_id for user_id, _, _ in totals},
+            period_start__range=(min(starts), max(starts))
+        )
+    }
+
+    changed, created = [], []
+    for (user_id, period, period_start), (points, entries) in totals.items():
+        rollup = existing.get((user_id, period, period_start))
+        if rollup is None:
+            created.append(PointsRollup(
+                user_id=user_id, period=period, period_start=period_start, points=points, entries=entries
+            ))
+        else:
+            rollup.points += points
+            rollup.entries += entries
+            changed.append(rollup)
+
+    PointsRollup.objects.bulk_update(changed, ['points', 'entries'], batch_size=500)
+    PointsRollup.objects.bulk_create(created, batch_size=500)
+    return len(totals)
+
+
+def compact(cutoff, users_per_batch=500, dry_run=False):
+    """Fold history rows older than ``cutoff`` into rollups and delete them.
+
+    Users are handled in batches, each in its own transaction. Returns
+    ``(rows, rollups)``: history rows folded and rollup rows written.
+    """
+    old = PointsHistory.objects.filter(timestamp__lt=cutoff)
+    user_ids = list(old.values_list('user_id', flat=True).distinct().order_by('user_id'))
+
+    folded = written = 0
+    for start in range(0, len(user_ids), users_per_batch):
+        batch = old.filter(user_id__in=user_ids[start:start + users_per_batch])
+        with transaction.atomic():
+            rows = list(batch.annotate(day=TruncDate('timestamp')).values('user_id', 'day').annotate(
+                points=Sum('amount'), entries=Count('id')
+            ).values_list('user_id', 'day', 'points', 'entries').order_by())
+            folded += sum(entries for _, _, _, entries in rows)
+            if dry_run:
+                continue
+            written += _fold(rows)
+            batch.delete()
+    return folded, written
@@ -0,0 +1,60 @@
+"""Per-book rating aggregates stored on ``Book``.
+
+``rate_book`` keeps the count, sum and 1-5 histogram in step with ``Rating``
+rows in the same transaction, so reads never aggregate over ``Rating``.
+"""
+from django.db import transaction
+from django.db.models import Count, F, Q, Sum
+
+from . import counters
+from .models import Book, Rating
+
+AGGREGATE_FIELDS = ['rating_count', 'rating_sum'] + [f'rating_{value}' for value in range(1, 6)]
+
+
+def rate(user, book, value):
+    """Create or change a user's rating and update the book's aggregates.
+
+    Returns ``(rating, created)``.
+    """
+    with transaction.atomic():
+        rating = Rating.objects.select_for_update().filter(user=user, book=book).first()
+        created = rating is None
+
+        if created:
+            rating = Rating.objects.create(user=user, book=book, rating=value)
+            counters.bump(user, ratings=1)
+            changes = {
+                'rating_count': F('rating_count') + 1,
+                'rating_sum': F('rating_sum') + value,
+                f'rating_{value}': F(f'rating_{value}') + 1,
+            }
+        elif rating.rating != value:
+            old_value = rating.rating
+            rating.rating = value
+            rating.save(update_fields=['rating'])
+            changes = {
+                'rating_sum': F('rating_sum') + (value - old_value),
+                f'rating_{old_value}': F(f'rating_{old_value}') - 1,
+                f'rating_{value}': F(f'rating_{value}') + 1,
+            }
+        else:
+            changes = {}
+
+        if changes:
+            Book.objects.filter(pk=book.pk).update(**changes)
+    return rating, created
+
+
+def compute_aggregates(book_ids=None):
+    """Recompute aggregates from ``Rating`` rows, keyed by book id"""
+    ratings = Rating.objects.all()
+    if book_ids is not None:
+        ratings = ratings.filter(book_id__in=book_ids)
+
+    rows = ratings.values('book_id').annotate(
+        rating_count=Count('id'),
+        rating_sum=Sum('rating'),
+        **{f'rating_{value}': Count('id', filter=Q(rating=value)) for value in range(1, 6)}
+    )
+    return {row.pop('book_id'): row for row in rows}
@@ -0,0 +1,157 @@
+"""CSV and JSON Lines export and import of readlists.
+
+Exports are streamed row by row from an iterator query. Imports upsert
+``Book`` rows and add ``ReadlistBook`` links in batches inside one transaction.
+"""
+import csv
+import io
+import json
+from itertools import islice
+
+from django.conf import settings
+from django.db import transaction
+from django.db.models import Max
+
+from .memberships import recount, refresh_owner_counters
+from .models import Book, ReadlistBook
+from .readlist_order import ORDER_STEP
+
+EXPORT_FORMATS = {
+    'csv': 'text/csv',
+    'jsonl': 'application/x-ndjson',
+}
+BOOK_FIELDS = ['google_books_id', 'title', 'author', 'genre', 'year', 'image', 'isbn10', 'isbn13', 'description']
+# Fields an import may set on an existing book; empty values never overwrite
+UPDATABLE_FIELDS = BOOK_FIELDS[1:]
+
+
+class ImportFormatError(ValueError):
+    pass
+
+
+class _Echo:
+    """File-like object whose write() returns the line for the streaming response"""
+    def write(self, value):
+        return value
+
+
+def _book_rows(readlist):
+    rows = ReadlistBook.objects.filter(readlist=readlist).order_by('order', 'id').values_list(
+        *[f'book__{field}' for field in BOOK_FIELDS]
+    )
+    for values in rows.iterator(chunk_size=settings.READLIST_IMPORT_BATCH_SIZE):
+        yield dict(zip(BOOK_FIELDS, values))
+
+
+def export_lines(readlist, export_format):
+    """Lines of a readlist export in ``csv`` or ``jsonl``"""
+    if export_format == 'csv':
+        writer = csv.DictWriter(_Echo(), fieldnames=BOOK_FIELDS)
+        yield writer.writeheader()
+        for row in _book_rows(readlist):
+            yield writer.writerow(row)
+    else:
+        for row in _book_rows(readlist):
+            yield json.dumps(row) + '\n'
+
+
+def parse_rows(upload, import_format):
+    """Book dicts from an uploaded ``csv`` or ``jsonl`` file"""
+    text = io.TextIOWrapper(upload, encoding='utf-8-sig')
+    if import_format == 'csv':
+        reader = csv.DictReader(text)
+    else:
+        reader = (json.loads(line) for line in text if line.strip())
+
+    # Stop one row past the limit so an oversized upload is not read in full
+    limit = settings.READLIST_IMPORT_MAX_ROWS
+    try:
+        rows = list(islice(reader, limit + 1))
+    except (UnicodeDecodeError, csv.Error, ValueError) as e:
+        raise ImportFormatError(f"Could not read the file: {e}") from e
+
+    if len(rows) > limit:
+        raise ImportFormatError(f"At most {limit} books can be imported at once")
+
+    books = {}
+    for number, row in enumerate(rows, start=1):
+        if not isinstance(row, dict) or not str(row.get('google_books_id') or '').strip():
+            raise ImportFormatError(f"Row {number} has no google_books_id")
+        books[str(row['google_books_id']).strip()] = {
+            field: _clean(field, row.get(field)) for field in UPDATABLE_FIELDS
+        }
+    return books
+
+
+def _clean(field, value):
+    value = str(value).strip() if value is not None else ''
+    max_length = Book._meta.get_field(field).max_length
+    return value[:max_length] if max_length else value
+
+
+def _new_book(google_books_id, fields):
+    values = {field: value or None for field, value in fields.items()}
+    # title and author are not nullable
+    values['title'], values['author'] = fields['title'], fields['author']
+    return Book(google_books_id=google_books_id, **values)
+
+
+def _upsert_books(rows):
+    """Create missing books and fill in provided fields of existing ones; returns ids by google_books_id"""
+    existing = Book.objects.in_bulk(list(rows), field_name='google_books_id')
+
+    changed_fields = set()
+    for google_books_id, book in existing.items():
+        for field, value in rows[google_books_id].items():
+            if value and getattr(book, field) != value:
+                setattr(book, field, value)
+                changed_fields.add(field)
+    if changed_fields:
+        Book.objects.bulk_update(existing.values(), sorted(changed_fields))
+
+    new_books = []
+    for google_books_id, fields in rows.items():
+        if google_books_id in existing:
+            continue
+        if not fields['title'] or not fields['author']:
+            raise ImportFormatError(f"Book {google_books_id} is new and needs a title and an author")
+        new_books.append(_new_book(google_books_id, fields))
+    Book.objects.bulk_create(new_books, ignore_conflicts=True)
+    return dict(Book.objects.filter(google_books_id__in=list(rows)).values_list('google_books_id', 'id'))
+
+
+def import_books(readlist, books):
+    """Add ``{google_books_id: fields}`` to a readlist after its current books.
+
+    Returns the number of books that were not in the readlist yet. Raises
+    ImportFormatError, with nothing imported, if a book that does not exist
+    yet has no title or author.
+    """
+    batch_size = settings.READLIST_IMPORT_BATCH_SIZE
+    google_books_ids = list(books)
+
+    with transaction.atomic():
+        current = set(ReadlistBook.objects.filter(readlist=readlist).values_list('book__google_books_id', flat=True))
+        last_order = ReadlistBook.objects.filter(readlist=readlist).aggregate(last=Max('order'))['last'] or 0
+
+        added = 0
+        for start in range(0, len(google_books_ids), batch_size):
+            batch = {
+                google_books_id: books[google_books_id]
+                for google_books_id in google_books_ids[start:start + batch_size]
+            }
+            book_ids = _upsert_books(batch)
+
+            links = []
+            for google_books_id in batch:
+                if google_books_id in current:
+                    continue
+                added += 1
+                links.append(ReadlistBook(
+                    readlist=readlist, book_id=book_ids[google_books_id], order=last_order + added * ORDER_STEP
+                ))
+            ReadlistBook.objects.bulk_create(links, ignore_conflicts=True)
+
+        recount([readlist.id])
+        refresh_owner_counters([readlist.id])
+    return added
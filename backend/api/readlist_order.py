@@ -0,0 +1,118 @@
+"""Fractional ordering of books within a readlist.
+
+``ReadlistBook.order`` is a float key. Moving a book between two neighbours
+gives it the midpoint of their keys, so a move writes a single row. When
+neighbouring keys get closer than ORDER_MIN_GAP the readlist is renumbered
+with evenly spaced keys; ``rebalance_readlists`` does the same periodically.
+"""
+from itertools import pairwise
+
+from django.db import transaction
+from django.db.models import F, Q, Window
+from django.db.models.functions import Lag
+
+from .models import ReadlistBook
+
+ORDER_STEP = 1024.0
+ORDER_MIN_GAP = 1e-6
+
+
+class MoveError(ValueError):
+    pass
+
+
+def position_key(index):
+    """Evenly spaced key for the book at ``index`` in a full reorder"""
+    return index * ORDER_STEP
+
+
+def key_between(lower, upper):
+    """A key strictly between two neighbour keys; None stands for the start or end of the list"""
+    if lower is None and upper is None:
+        return 0.0
+    if lower is None:
+        return upper - ORDER_STEP
+    if upper is None:
+        return lower + ORDER_STEP
+    return (lower + upper) / 2
+
+
+def rebalance(readlist):
+    """Renumber a readlist's keys ORDER_STEP apart, keeping the current order"""
+    rows = list(ReadlistBook.objects.filter(readlist=readlist).order_by('order', 'id').only('id', 'order'))
+    for index, row in enumerate(rows):
+        row.order = position_key(index)
+    ReadlistBook.objects.bulk_update(rows, ['order'])
+    return len(rows)
+
+
+def is_dense(keys):
+    """Whether any two neighbouring keys in sorted ``keys`` are closer than ORDER_MIN_GAP"""
+    return any(upper - lower < ORDER_MIN_GAP for lower, upper in pairwise(keys))
+
+
+def dense_readlist_ids():
+    """Ids of readlists with neighbouring keys closer than ORDER_MIN_GAP, found in one query"""
+    previous = Window(Lag('order'), partition_by=F('readlist_id'), order_by=[F('order').asc(), F('id').asc()])
+    return ReadlistBook.objects.annotate(gap=F('order') - previous).filter(
+        gap__lt=ORDER_MIN_GAP
+    ).values_list('readlist_id', flat=True).distinct()
+
+
+def _neighbour_key(readlist, moving_id, anchor, following):
+    """Key of the row next to ``anchor`` (an ``(id, order)`` pair), skipping the moving row"""
+    anchor_id, anchor_order = anchor
+    rows = ReadlistBook.objects.filter(readlist=readlist).exclude(id=moving_id)
+    if following:
+        rows = rows.filter(
+            Q(order__gt=anchor_order) | Q(order=anchor_order, id__gt=anchor_id)
+        ).order_by('order', 'id')
+    else:
+        rows = rows.filter(
+            Q(order__lt=anchor_order) | Q(order=anchor_order, id__lt=anchor_id)
+        ).order_by('-order', '-id')
+    return rows.values_list('order', flat=True).first()
+
+
+def _bounds(readlist, google_books_id, after_id, before_id):
+    rows = {
+        book_id: (row_id, order)
+        for book_id, row_id, order in ReadlistBook.objects.select_for_update().filter(
+            readlist=readlist, book__google_books_id__in=[i for i in (google_books_id, after_id, before_id) if i]
+        ).values_list('book__google_books_id', 'id', 'order')
+    }
+    for book_id in (google_books_id, after_id, before_id):
+        if book_id and book_id not in rows:
+            raise MoveError(f"Book {book_id} is not in this readlist")
+
+    moving_id = rows[google_books_id][0]
+    after, before = rows.get(after_id), rows.get(before_id)
+    if after and before:
+        if (after[1], after[0]) >= (before[1], before[0]):
+            raise MoveError("after_book_id must come before before_book_id")
+        return moving_id, after[1], before[1]
+    if after:
+        return moving_id, after[1], _neighbour_key(readlist, moving_id, after, following=True)
+    return moving_id, _neighbour_key(readlist, moving_id, before, following=False), before[1]
+
+
+def move_book(readlist, google_books_id, after_id=None, before_id=None):
+    """Move a book so it sits after ``after_id`` and/or before ``before_id`` (google_books_ids).
+
+    Only the moved row is written unless its neighbours' keys are too close,
+    in which case the readlist is rebalanced first. Returns the new key.
+    """
+    if not after_id and not before_id:
+        raise MoveError("after_book_id or before_book_id is required")
+    if google_books_id in (after_id, before_id):
+        raise MoveError("A book cannot be moved next to itself")
+
+    with transaction.atomic():
+        moving_id, lower, upper = _bounds(readlist, google_books_id, after_id, before_id)
+        if lower is not None and upper is not None and upper - lower < ORDER_MIN_GAP:
+            rebalance(readlist)
+            moving_id, lower, upper = _bounds(readlist, google_books_id, after_id, before_id)
+
+        key = key_between(lower, upper)
+        ReadlistBook.objects.filter(id=moving_id).update(order=key)
+    return key
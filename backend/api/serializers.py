@@ -1,3 +1,4 @@
+from django.db.models import Prefetch
 from rest_framework import serializers
 from .models import Readlist, ReadlistBook, Book
 
@@ -6,6 +7,13 @@ class BookSerializer(serializers.ModelSerializer):
         model = Book
         fields = "__all__"
 
+def readlist_books_prefetch():
+    """Prefetch for ReadlistSerializer: each readlist's ordered rows with their books in one query"""
+    return Prefetch(
+        "readlist_books",
+        queryset=ReadlistBook.objects.select_related("book").order_by("order", "id"),
+    )
+
 class ReadlistSerializer(serializers.ModelSerializer):
     books = serializers.SerializerMethodField()
 
@@ -14,7 +22,9 @@ class ReadlistSerializer(serializers.ModelSerializer):
         fields = ["id", "name", "books"]
 
     def get_books(self, obj):
-        """Retrieve books from the ReadlistBook relationship."""
-        readlist_books = ReadlistBook.objects.filter(readlist=obj)
-        books = [rb.book for rb in readlist_books]
+        """Retrieve books from the ReadlistBook relationship.
+
+        Use readlist_books_prefetch() on the readlists to avoid a query per readlist.
+        """
+        books = [rb.book for rb in obj.readlist_books.all()]
         return BookSerializer(books, many=True).data  # Serialize book data properly
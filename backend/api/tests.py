@@ -1,15 +1,48 @@
-from django.test import TestCase
+from django.test import TestCase, TransactionTestCase, override_settings
 from django.contrib.auth.models import User
+from django.core.cache import cache
+from django.core.management import call_command
+from django.db import DatabaseError, OperationalError, connection
+from django.test.utils import CaptureQueriesContext
+from django.core.files.uploadedfile import SimpleUploadedFile
 from .models import (
     Book, Favorite, Rating, Review, UserBookStatus, 
     Achievement, UserAchievement, ReadingChallenge, UserChallenge,
-    UserPoints, PointsHistory, ReadingStreak
+    UserPoints, PointsHistory, ReadingStreak, BestsellerSnapshot, BookIdentifier,
+    Readlist, ReadlistBook, UserCounters, UserFollow, GamificationEvent, PointsRollup
 )
+from .cache import TTLCache
+from .catalog import search_local_books
+from .bestsellers import enrich_bestsellers, SNAPSHOT_CACHE_KEY, UNRESOLVED
+from .identifiers import known_resolutions, record_resolutions
+from .readlist_order import ORDER_STEP, dense_readlist_ids, is_dense
+from .memberships import add_book, remove_book
+from .points import award_points
+from . import achievements, counters, upstream, views
+import io
+import json
+import threading
 import time
 from datetime import timedelta, date
+from unittest import mock
+from rest_framework.test import APIClient
 from django.utils.timezone import now as tz_now
 
 
+def logged_in(username):
+    """Create a user and an API client authenticated as them"""
+    user = User.objects.create_user(username=username, password='12345')
+    client = APIClient()
+    client.force_authenticate(user)
+    return user, client
+
+
+def isolate_achievement_cache(test_case):
+    """Start ``test_case`` with an empty achievement cache and clear it again afterwards"""
+    achievements.clear_cache()
+    test_case.addCleanup(achievements.clear_cache)
+
+
 class BookModelTest(TestCase):
     def setUp(self):
         self.user = User.objects.create_user(
@@ -722,4 +755,1000 @@ class ReviewModelTest(TestCase):
         time.sleep(0.05)
         review.review_text = 'Updated text'
         review.save()
-        self.assertGreater(review.updated_at, original_updated_at)
\ No newline at end of file
+        self.assertGreater(review.updated_at, original_updated_at)
+
+
+class SearchCacheTest(TestCase):
+    def setUp(self):
+        views.search_cache.clear()
+        self.upstream_items = [
+            {'id': f'vol{i}', 'volumeInfo': {'title': f'Dune {i}', 'authors': ['Frank Herbert']}}
+            for i in range(25)
+        ]
+
+    def fake_response(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'items': self.upstream_items}
+        return response
+
+    def test_ttl_cache_evicts_least_recently_used(self):
+        """Test that the oldest untouched entry is evicted when the cache is full"""
+        cache = TTLCache(max_entries=2, ttl=60)
+        cache.set('a', 1)
+        cache.set('b', 2)
+        cache.get('a')
+        cache.set('c', 3)
+
+        self.assertEqual(cache.get('a'), 1)
+        self.assertIsNone(cache.get('b'))
+        self.assertEqual(cache.stats()['evictions'], 1)
+
+    def test_ttl_cache_expires_entries(self):
+        """Test that entries are dropped once their TTL has passed"""
+        cache = TTLCache(max_entries=2, ttl=0)
+        cache.set('a', 1)
+        self.assertIsNone(cache.get('a'))
+        self.assertEqual(cache.stats()['misses'], 1)
+
+    def test_pages_share_one_upstream_fetch(self):
+        """Test that paging through one query only calls Google Books once"""
+        with mock.patch('api.upstream.get', return_value=self.fake_response()) as upstream:
+            first = self.client.get('/api/search/', {'q': 'Dune', 'filterType': 'title', 'page': 1})
+            second = self.client.get('/api/search/', {'q': '  dune ', 'filterType': 'title', 'page': 2})
+
+        self.assertEqual(upstream.call_count, 1)
+        self.assertEqual(len(first.json()['books']), 10)
+        self.assertEqual(second.json()['books'][0]['google_books_id'], 'vol10')
+        self.assertEqual(views.search_cache.stats()['hits'], 1)
+
+
+class LocalCatalogSearchTest(TestCase):
+    def setUp(self):
+        views.search_cache.clear()
+        self.dune = Book.objects.create(
+            google_books_id='dune1', title='Dune', author='Frank Herbert', genre='Science Fiction'
+        )
+        self.messiah = Book.objects.create(
+            google_books_id='dune2', title='Dune Messiah', author='Frank Herbert', genre='Science Fiction'
+        )
+        Book.objects.create(
+            google_books_id='found1', title='Foundation', author='Isaac Asimov',
+            description='A story that mentions dune seas'
+        )
+
+    def test_title_search_ranks_saved_books(self):
+        """Test that a title search only matches titles and finds prefixes"""
+        results = search_local_books('dun', 'title')
+        self.assertEqual([book['google_books_id'] for book in results], ['dune1', 'dune2'])
+
+    def test_index_follows_updates_and_deletes(self):
+        """Test that the index stays in sync when books change"""
+        self.dune.title = 'Arrakis'
+        self.dune.save()
+        self.messiah.delete()
+
+        self.assertEqual(search_local_books('dune', 'title'), [])
+        self.assertEqual(search_local_books('arrakis', 'title')[0]['google_books_id'], 'dune1')
+
+    @override_settings(LOCAL_SEARCH_MIN_RESULTS=2)
+    def test_auto_mode_skips_google_when_local_hits_suffice(self):
+        """Test that enough local hits answer the search without an upstream call"""
+        with mock.patch('api.upstream.get') as upstream:
+            response = self.client.get('/api/search/', {'q': 'herbert', 'filterType': 'author', 'mode': 'auto'})
+
+        upstream.assert_not_called()
+        self.assertEqual(response.json()['source'], 'local')
+        self.assertEqual(len(response.json()['books']), 2)
+
+
+class UpstreamClientTest(TestCase):
+    def setUp(self):
+        upstream.reset_stats()
+
+    def test_requests_share_session_and_record_latency(self):
+        """Test that upstream calls reuse one session with timeouts and are timed per host"""
+        session = upstream.get_session()
+        with mock.patch.object(session, 'get', return_value=mock.Mock(status_code=200)) as session_get:
+            upstream.google_books_get('vol1')
+            upstream.google_books_get(params={'q': 'dune'})
+
+        self.assertIs(upstream.get_session(), session)
+        self.assertEqual(session_get.call_count, 2)
+        self.assertIsNotNone(session_get.call_args.kwargs['timeout'])
+        stats = upstream.latency_stats()['www.googleapis.com']
+        self.assertEqual(stats['requests'], 2)
+        self.assertEqual(stats['errors'], 0)
+
+
+class BestsellerEnrichmentTest(TestCase):
+    def nyt_book(self, rank):
+        return {
+            'rank': rank, 'title': f'Book {rank}', 'author': 'Author', 'description': 'NYT description',
+            'book_image': 'http://nyt.example/cover.jpg', 'amazon_product_url': '', 'weeks_on_list': 1,
+            'primary_isbn13': f'97800000000{rank:02d}',
+        }
+
+    def test_slow_lookups_fall_back_to_nyt_data(self):
+        """Test that lookups run concurrently and stragglers miss the deadline"""
+        def lookup(book, *args):
+            if book['rank'] == 2:
+                time.sleep(0.5)
+            else:
+                time.sleep(0.1)
+            return {'google_books_id': f"g{book['rank']}", 'description': 'Google description'}, UNRESOLVED
+
+        started = time.monotonic()
+        with mock.patch('api.bestsellers.lookup_google_info', side_effect=lookup):
+            books = enrich_bestsellers([self.nyt_book(rank) for rank in range(1, 6)], deadline=0.3)
+
+        self.assertLess(time.monotonic() - started, 0.45)
+        self.assertEqual(books[0]['google_books_id'], 'g1')
+        self.assertEqual(books[1]['google_books_id'], '')
+        self.assertEqual(books[1]['description'], 'NYT description')
+        self.assertEqual(books[1]['image'], 'https://nyt.example/cover.jpg')
+
+    def nyt_response(self, published_date):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'results': {
+            'list_name_encoded': 'hardcover-fiction', 'published_date': published_date,
+            'updated': 'WEEKLY', 'books': [self.nyt_book(1)],
+        }}
+        return response
+
+    def test_snapshot_only_enriched_when_list_changes(self):
+        """Test that the refresh command stores one snapshot per list date and the endpoint reads it"""
+        cache.delete(SNAPSHOT_CACHE_KEY)
+        lookup = mock.Mock(return_value=({'google_books_id': 'g1'}, UNRESOLVED))
+        with mock.patch('api.bestsellers.lookup_google_info', lookup), \
+                mock.patch('api.upstream.get', return_value=self.nyt_response('2025-04-27')):
+            call_command('refresh_bestsellers', stdout=mock.Mock())
+            call_command('refresh_bestsellers', stdout=mock.Mock())
+
+        self.assertEqual(lookup.call_count, 1)
+        self.assertEqual(BestsellerSnapshot.objects.count(), 1)
+
+        cache.delete(SNAPSHOT_CACHE_KEY)
+        with mock.patch('api.upstream.get') as upstream_get:
+            response = self.client.get('/api/bestsellers/')
+
+        upstream_get.assert_not_called()
+        self.assertEqual(response.json()['books'][0]['google_books_id'], 'g1')
+        self.assertEqual(response.json()['list_update_date'], 'WEEKLY')
+
+    def volume_response(self, items):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'items': items}
+        return response
+
+    def test_isbn_resolutions_are_stored_and_reused(self):
+        """Test that ISBN lookups, including misses, are recorded and skipped next time"""
+        hit = {'id': 'g1', 'volumeInfo': {'description': 'Google description'}}
+
+        def fake_google_get(path='', params=None):
+            return self.volume_response([hit] if params['q'] == 'isbn:9780000000001' else [])
+
+        with mock.patch('api.upstream.google_books_get', side_effect=fake_google_get) as google_get:
+            enrich_bestsellers([self.nyt_book(1), self.nyt_book(2)])
+
+        self.assertEqual(google_get.call_count, 3)
+        self.assertEqual(known_resolutions(['9780000000001', '9780000000002']),
+                         {'9780000000001': 'g1', '9780000000002': None})
+
+        # The resolved volume was saved, so the next refresh reads it locally
+        self.assertEqual(Book.objects.get(google_books_id='g1').description, 'Google description')
+        Book.objects.filter(google_books_id='g1').update(description='Saved description')
+        with mock.patch('api.upstream.google_books_get', return_value=self.volume_response([])) as google_get:
+            books = enrich_bestsellers([self.nyt_book(1), self.nyt_book(2)])
+
+        # Only the title+author fallback for the known miss goes upstream
+        self.assertEqual(google_get.call_count, 1)
+        self.assertEqual(books[0]['description'], 'Saved description')
+
+        BookIdentifier.objects.filter(google_books_id__isnull=True).update(expires_at=tz_now() - timedelta(days=1))
+        self.assertEqual(known_resolutions(['9780000000002']), {})
+
+    def test_resolved_volume_without_book_is_fetched_once(self):
+        """Test that a stored resolution with no saved Book is fetched by id once and then read locally"""
+        record_resolutions({'9780000000001': 'g1'})
+        volume = mock.Mock(status_code=200)
+        volume.json.return_value = {'id': 'g1', 'volumeInfo': {'title': 'Book 1', 'description': 'Google description'}}
+
+        for expected_calls in (1, 0):
+            with mock.patch('api.upstream.google_books_get', return_value=volume) as google_get:
+                books = enrich_bestsellers([self.nyt_book(1)])
+            self.assertEqual(google_get.call_count, expected_calls)
+            self.assertEqual(books[0]['description'], 'Google description')
+
+
+class BookMetadataFreshnessTest(TestCase):
+    def setUp(self):
+        self.user, self.client = logged_in('reader')
+        self.book = Book.objects.create(
+            google_books_id='vol1', title='Saved Title', author='Author', metadata_refreshed_at=tz_now()
+        )
+
+    def volume_response(self):
+        response = mock.Mock(status_code=200)
+        response.json.return_value = {'volumeInfo': {
+            'title': 'Fresh Title', 'authors': ['Author'],
+            'industryIdentifiers': [{'type': 'ISBN_13', 'identifier': '9780000000001'}],
+        }}
+        return response
+
+    def test_fresh_book_skips_google_books(self):
+        """Test that a recently refreshed book is used without an upstream call"""
+        with mock.patch('api.upstream.google_books_get') as google_get:
+            response = self.client.post('/api/books/vol1/update-status/', {'status': 'READING'}, format='json')
+
+        google_get.assert_not_called()
+        self.assertEqual(response.json()['status'], 'READING')
+
+    def test_stale_book_is_refreshed(self):
+        """Test that metadata older than the TTL is re-fetched before use"""
+        Book.objects.filter(pk=self.book.pk).update(metadata_refreshed_at=tz_now() - timedelta(days=30))
+        with mock.patch('api.upstream.google_books_get', return_value=self.volume_response()) as google_get:
+            self.client.post('/api/books/vol1/update-status/', {'status': 'READING'}, format='json')
+
+        google_get.assert_called_once()
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.title, 'Fresh Title')
+        self.assertEqual(self.book.isbn13, '9780000000001')
+
+
+
+class ReviewThreadTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'reader{i}', password='12345') for i in range(3)]
+        self.book = Book.objects.create(google_books_id='vol1', title='Test Book')
+        self.root = Review.objects.create(user=self.users[0], book=self.book, review_text='Root')
+        self.reply = Review.objects.create(user=self.users[1], book=self.book, review_text='Reply', parent=self.root)
+        self.nested = Review.objects.create(user=self.users[2], book=self.book, review_text='Nested', parent=self.reply)
+
+    def test_replies_record_thread_root(self):
+        """Test that every reply points at the top-level review of its thread"""
+        self.assertIsNone(self.root.thread_root_id)
+        self.assertEqual(self.reply.thread_root_id, self.root.id)
+        self.assertEqual(self.nested.thread_root_id, self.root.id)
+
+    def test_book_reviews_load_one_query_per_reply_level(self):
+        """Test that replies are read level by level, at most replies_limit + 1 per parent"""
+        for i in range(8):
+            Review.objects.create(user=self.users[i % 3], book=self.book, review_text=f'Deep {i}', parent=self.nested)
+
+        # The book, the top-level page, then one query for each of the three reply levels
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get('/api/books/vol1/reviews/', {'replies_limit': 5})
+        self.assertEqual(len(queries), 5)
+
+        nested = response.json()[0]['replies'][0]['replies'][0]
+        self.assertEqual(nested['review_text'], 'Nested')
+        self.assertEqual(len(nested['replies']), 5)
+        self.assertEqual(nested['reply_count'], 8)
+        self.assertTrue(nested['has_more_replies'])
+
+    def test_to_dict_uses_one_query(self):
+        """Test that serializing a reply subtree needs a single query"""
+        with self.assertNumQueries(1):
+            data = self.reply.to_dict()
+
+        self.assertEqual(data['parent'], self.root.id)
+        self.assertEqual(data['replies'][0]['user']['username'], 'reader2')
+
+    def test_top_level_reviews_are_cursor_paginated(self):
+        """Test that top-level reviews are served in pages linked by X-Next-Cursor"""
+        for i in range(4):
+            Review.objects.create(user=self.users[0], book=self.book, review_text=f'Review {i}')
+
+        first = self.client.get('/api/books/vol1/reviews/', {'limit': 3})
+        second = self.client.get('/api/books/vol1/reviews/', {'limit': 3, 'cursor': first['X-Next-Cursor']})
+
+        self.assertEqual([r['review_text'] for r in first.json()], ['Root', 'Review 0', 'Review 1'])
+        self.assertEqual([r['review_text'] for r in second.json()], ['Review 2', 'Review 3'])
+        self.assertNotIn('X-Next-Cursor', second)
+
+    def test_reply_depth_and_per_node_limits(self):
+        """Test that trimmed nodes report their replies and can load more"""
+        extra = [
+            Review.objects.create(user=self.users[0], book=self.book, review_text=f'Reply {i}', parent=self.root)
+            for i in range(2)
+        ]
+
+        response = self.client.get('/api/books/vol1/reviews/', {'depth': 1, 'replies_limit': 2})
+        root = response.json()[0]
+        self.assertEqual(root['reply_count'], 3)
+        self.assertEqual([r['review_text'] for r in root['replies']], ['Reply', 'Reply 0'])
+        self.assertTrue(root['has_more_replies'])
+        self.assertEqual(root['replies'][0]['replies'], [])
+        self.assertEqual(root['replies'][0]['reply_count'], 1)
+
+        more = self.client.get(f'/api/reviews/{self.root.id}/replies/', {'cursor': root['replies_cursor']})
+        self.assertEqual([r['id'] for r in more.json()], [extra[1].id])
+
+        nested = self.client.get(f'/api/reviews/{self.reply.id}/replies/')
+        self.assertEqual(nested.json()[0]['review_text'], 'Nested')
+
+
+class RatingAggregateTest(TestCase):
+    def setUp(self):
+        self.users = [User.objects.create_user(username=f'rater{i}', password='12345') for i in range(2)]
+        self.book = Book.objects.create(google_books_id='vol1', title='Test Book', author='Author')
+        self.client = APIClient()
+
+    def rate(self, user, value):
+        self.client.force_authenticate(user)
+        return self.client.post('/api/rate-book/', {'google_books_id': 'vol1', 'rating': value}, format='json')
+
+    def test_new_and_changed_ratings_update_aggregates(self):
+        """Test that count, sum and histogram follow new and changed ratings"""
+        self.rate(self.users[0], 5)
+        self.rate(self.users[1], 2)
+        self.rate(self.users[1], 4)
+
+        self.book.refresh_from_db()
+        self.assertEqual(self.book.rating_count, 2)
+        self.assertEqual(self.book.rating_sum, 9)
+        self.assertEqual(self.book.rating_histogram, {1: 0, 2: 0, 3: 0, 4: 1, 5: 1})
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/books/vol1/ratings/')
+        self.assertEqual(response.json()['average_rating'], 4.5)
+        self.assertEqual(response.json()['total_ratings'], 2)
+
+    def test_batch_ratings_in_one_query(self):
+        """Test that batch ratings returns every requested id, with zeroes for unknown books"""
+        self.rate(self.users[0], 4)
+        self.rate(self.users[1], 3)
+
+        with self.assertNumQueries(1):
+            response = self.client.get('/api/books/ratings/?ids=vol1,missing')
+        self.assertEqual(response.json(), {
+            'vol1': {'average_rating': 3.5, 'total_ratings': 2},
+            'missing': {'average_rating': 0, 'total_ratings': 0}
+        })
+
+        with override_settings(BATCH_RATINGS_MAX_IDS=1):
+            response = self.client.get('/api/books/ratings/?ids=vol1,missing')
+        self.assertEqual(response.status_code, 400)
+
+    def test_rebuild_command_fixes_drift(self):
+        """Test that the rebuild command recomputes aggregates from Rating rows"""
+        Rating.objects.create(user=self.users[0], book=self.book, rating=3)
+        call_command('rebuild_rating_aggregates', stdout=mock.Mock())
+
+        self.book.refresh_from_db()
+        self.assertEqual((self.book.rating_count, self.book.rating_sum, self.book.rating_3), (1, 3, 1))
+
+
+class ReadlistViewTest(TestCase):
+    def setUp(self):
+        self.user, self.client = logged_in('reader')
+
+    def add_readlist(self, name, book_count):
+        readlist = Readlist.objects.create(user=self.user, name=name)
+        for i in range(book_count):
+            book = Book.objects.create(google_books_id=f'{name}-{i}', title=f'{name} {i}', author='Author')
+            ReadlistBook.objects.create(readlist=readlist, book=book, order=book_count - i)
+        return readlist
+
+    def test_get_readlists_query_count_is_constant(self):
+        """Test that listing readlists does not issue a query per readlist or book"""
+        self.add_readlist('First', 1)
+        self.client.get('/api/readlists/')  # creates the default readlists
+        with self.assertNumQueries(4):
+            self.client.get('/api/readlists/')
+
+        for i in range(3):
+            self.add_readlist(f'Extra{i}', 5)
+        with self.assertNumQueries(4):
+            response = self.client.get('/api/readlists/')
+
+        extra = next(readlist for readlist in response.json() if readlist['name'] == 'Extra0')
+        self.assertEqual([book['title'] for book in extra['books']], [f'Extra0 {i}' for i in range(4, -1, -1)])
+
+    def test_update_readlist_books_applies_membership_diff(self):
+        """Test that checkbox updates add and remove memberships without touching Done Reading"""
+        readlists = [self.add_readlist(f'List{i}', 2 if i == 2 else 0) for i in range(4)]
+        done_reading = Readlist.objects.create(user=self.user, name='Done Reading')
+        book = Book.objects.create(google_books_id='vol1', title='Test Book', author='Author')
+        for readlist in (readlists[0], readlists[1], done_reading):
+            add_book(readlist, book)
+
+        payload = {'book_id': 'vol1', 'readlist_ids': [readlists[1].id, readlists[2].id, done_reading.id]}
+        with mock.patch('api.outbox.award_points'):
+            response = self.client.post('/api/readlists/update/', payload, format='json')
+        self.assertEqual(response.status_code, 200)
+
+        member_ids = set(ReadlistBook.objects.filter(book=book).values_list('readlist_id', flat=True))
+        self.assertEqual(member_ids, {readlists[1].id, readlists[2].id, done_reading.id})
+        # New memberships go after the books already in the list
+        self.assertEqual(readlists[2].readlist_books.order_by('order').last().book, book)
+        self.assertEqual(UserCounters.objects.get(user=self.user).readlist_additions, ReadlistBook.objects.count())
+
+        # Book lookup and save, one readlist lookup, then one delete and the
+        # book count and owner's counter deltas, all in a transaction
+        payload['readlist_ids'] = []
+        with self.assertNumQueries(10):
+            self.client.post('/api/readlists/update/', payload, format='json')
+        member_ids = set(ReadlistBook.objects.filter(book=book).values_list('readlist_id', flat=True))
+        self.assertEqual(member_ids, {done_reading.id})
+        self.assertEqual(Readlist.objects.get(id=readlists[1].id).book_count, 0)
+        self.assertEqual(UserCounters.objects.get(user=self.user).readlist_additions, ReadlistBook.objects.count())
+
+    def test_reorder_books_in_one_update(self):
+        """Test that reordering writes every position at once and rejects mismatched payloads"""
+        readlist = self.add_readlist('Queue', 3)
+        ordered = ['Queue-1', 'Queue-2', 'Queue-0']
+
+        with self.assertNumQueries(5):
+            response = self.client.post('/api/readlists/reorder-books/', {
+                'readlist_id': readlist.id, 'ordered_book_ids': ordered
+            }, format='json')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(
+            list(readlist.readlist_books.order_by('order').values_list('book__google_books_id', flat=True)),
+            ordered
+        )
+
+        for bad_ids in (['Queue-1', 'Queue-2'], ['Queue-1', 'Queue-1', 'Queue-2'], ordered + ['Other']):
+            response = self.client.post('/api/readlists/reorder-books/', {
+                'readlist_id': readlist.id, 'ordered_book_ids': bad_ids
+            }, format='json')
+            self.assertEqual(response.status_code, 400)
+
+    def move(self, readlist, book_id, after=None, before=None):
+        return self.client.post('/api/readlists/move-book/', {
+            'readlist_id': readlist.id, 'book_id': book_id, 'after_book_id': after, 'before_book_id': before
+        }, format='json')
+
+    def order_of(self, readlist):
+        return list(readlist.readlist_books.order_by('order', 'id').values_list('book__google_books_id', flat=True))
+
+    def test_move_book_writes_one_row(self):
+        """Test that moving a book between neighbours only updates the moved row"""
+        readlist = self.add_readlist('Queue', 4)
+        for i in range(4):
+            ReadlistBook.objects.filter(readlist=readlist, book__google_books_id=f'Queue-{i}').update(order=i)
+        self.assertEqual(self.order_of(readlist), ['Queue-0', 'Queue-1', 'Queue-2', 'Queue-3'])
+
+        response = self.move(readlist, 'Queue-3', after='Queue-0', before='Queue-1')
+        self.assertEqual(response.status_code, 200)
+        self.assertEqual(self.order_of(readlist), ['Queue-0', 'Queue-3', 'Queue-1', 'Queue-2'])
+
+        with CaptureQueriesContext(connection) as queries:
+            self.move(readlist, 'Queue-0', after='Queue-2')
+        writes = [query['sql'] for query in queries if query['sql'].startswith('UPDATE')]
+        self.assertEqual(len(writes), 1)
+        self.assertEqual(self.order_of(readlist), ['Queue-3', 'Queue-1', 'Queue-2', 'Queue-0'])
+
+        self.move(readlist, 'Queue-2', before='Queue-3')
+        self.assertEqual(self.order_of(readlist), ['Queue-2', 'Queue-3', 'Queue-1', 'Queue-0'])
+
+        self.assertEqual(self.move(readlist, 'Queue-2', after='Queue-1', before='Queue-3').status_code, 400)
+        self.assertEqual(self.move(readlist, 'Queue-2', after='Other').status_code, 400)
+
+    def test_move_rebalances_dense_keys(self):
+        """Test that a move between keys that are too close renumbers the readlist first"""
+        readlist = self.add_readlist('Queue', 3)
+        ReadlistBook.objects.filter(readlist=readlist).update(order=0)
+
+        self.move(readlist, 'Queue-0', after='Queue-1', before='Queue-2')
+        self.assertEqual(self.order_of(readlist), ['Queue-1', 'Queue-0', 'Queue-2'])
+        keys = list(readlist.readlist_books.order_by('order').values_list('order', flat=True))
+        self.assertFalse(is_dense(keys))
+
+        ReadlistBook.objects.filter(readlist=readlist).update(order=0)
+        self.add_readlist('Spaced', 3)
+        self.assertEqual(list(dense_readlist_ids()), [readlist.id])
+        call_command('rebalance_readlists', stdout=mock.Mock())
+        keys = list(readlist.readlist_books.order_by('order').values_list('order', flat=True))
+        self.assertEqual(keys, [0, ORDER_STEP, 2 * ORDER_STEP])
+
+    def test_shared_readlists_are_prefetched_and_paginated(self):
+        """Test that shared readlists load in constant queries, in book order, with optional paging"""
+        owner = User.objects.create_user(username='owner', password='12345')
+        for i in range(3):
+            readlist = Readlist.objects.create(user=owner, name=f'Shared{i}')
+            readlist.shared_with.add(self.user)
+            for j in range(3):
+                book = Book.objects.create(google_books_id=f'shared-{i}-{j}', title=f'Shared {i} {j}',
+                                           author='Author', description='Long text')
+                ReadlistBook.objects.create(readlist=readlist, book=book, order=3 - j)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/readlists/shared/')
+        data = response.json()
+        self.assertEqual([readlist['owner'] for readlist in data], ['owner'] * 3)
+        self.assertEqual([book['title'] for book in data[0]['books']], ['Shared 0 2', 'Shared 0 1', 'Shared 0 0'])
+        self.assertEqual(data[0]['books'][0]['description'], 'Long text')
+
+        response = self.client.get('/api/readlists/shared/?books=summary&limit=2')
+        self.assertEqual([readlist['name'] for readlist in response.json()], ['Shared0', 'Shared1'])
+        self.assertNotIn('description', response.json()[0]['books'][0])
+
+        response = self.client.get(f"/api/readlists/shared/?books=summary&limit=2&cursor={response['X-Next-Cursor']}")
+        self.assertEqual([readlist['name'] for readlist in response.json()], ['Shared2'])
+        self.assertNotIn('X-Next-Cursor', response)
+        self.assertEqual(self.client.get('/api/readlists/shared/?books=everything').status_code, 400)
+
+    def test_readlist_detail_pages_with_counter(self):
+        """Test that readlist detail pages by cursor, reports the maintained count and omits descriptions"""
+        readlist = Readlist.objects.create(user=self.user, name='Long list')
+        for i in range(5):
+            book = Book.objects.create(google_books_id=f'long-{i}', title=f'Long {i}', author='Author',
+                                       description='Long text')
+            add_book(readlist, book)
+        remove_book(readlist, Book.objects.get(google_books_id='long-4'))
+
+        titles = []
+        cursor = None
+        while True:
+            url = f'/api/readlists/{readlist.id}/?limit=2' + (f'&cursor={cursor}' if cursor else '')
+            with self.assertNumQueries(2):
+                response = self.client.get(url)
+            data = response.json()
+            self.assertEqual(data['total_books'], 4)
+            self.assertNotIn('description', data['books'][0])
+            titles += [book['title'] for book in data['books']]
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+        self.assertEqual(titles, ['Long 0', 'Long 1', 'Long 2', 'Long 3'])
+
+        response = self.client.get(f'/api/readlists/{readlist.id}/?books=full')
+        self.assertEqual(response.json()['books'][0]['description'], 'Long text')
+
+    def test_export_streams_readlist_books(self):
+        """Test that a readlist exports as CSV and JSON Lines in book order"""
+        readlist = self.add_readlist('Export', 2)
+
+        response = self.client.get(f'/api/readlists/{readlist.id}/export/csv/')
+        self.assertTrue(response.streaming)
+        lines = b''.join(response.streaming_content).decode().splitlines()
+        self.assertEqual(lines[0].split(',')[:3], ['google_books_id', 'title', 'author'])
+        self.assertEqual([line.split(',')[0] for line in lines[1:]], ['Export-1', 'Export-0'])
+
+        response = self.client.get(f'/api/readlists/{readlist.id}/export/jsonl/')
+        rows = [json.loads(line) for line in b''.join(response.streaming_content).decode().splitlines()]
+        self.assertEqual([row['title'] for row in rows], ['Export 1', 'Export 0'])
+        self.assertEqual(self.client.get(f'/api/readlists/{readlist.id}/export/xml/').status_code, 400)
+
+    @override_settings(READLIST_IMPORT_BATCH_SIZE=2)
+    def test_import_upserts_books_in_batches(self):
+        """Test that an import creates missing books, keeps existing data and appends new links"""
+        readlist = Readlist.objects.create(user=self.user, name='Imported')
+        existing = Book.objects.create(google_books_id='known', title='Known', author='Author', genre='Fiction')
+        add_book(readlist, existing)
+
+        upload = SimpleUploadedFile('books.csv', (
+            b'google_books_id,title,author,genre\n'
+            b'known,,,History\n'
+            b'new-1,New One,Writer,\n'
+            b'new-2,New Two,Writer,Poetry\n'
+        ))
+        response = self.client.post(f'/api/readlists/{readlist.id}/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.json()['added'], 2)
+
+        existing.refresh_from_db()
+        self.assertEqual((existing.title, existing.genre), ('Known', 'History'))
+        self.assertIsNone(Book.objects.get(google_books_id='new-1').genre)
+        readlist.refresh_from_db()
+        self.assertEqual(readlist.book_count, 3)
+        self.assertEqual(
+            list(readlist.readlist_books.order_by('order', 'id').values_list('book__google_books_id', flat=True)),
+            ['known', 'new-1', 'new-2']
+        )
+
+        upload = SimpleUploadedFile('books.jsonl', b'{"title": "No id"}\n')
+        response = self.client.post(f'/api/readlists/{readlist.id}/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+
+        upload = SimpleUploadedFile('books.csv', b'google_books_id,title,author\nnew-3,,Writer\n')
+        response = self.client.post(f'/api/readlists/{readlist.id}/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertFalse(Book.objects.filter(google_books_id='new-3').exists())
+
+    @override_settings(READLIST_IMPORT_MAX_ROWS=2)
+    def test_import_stops_reading_past_row_limit(self):
+        """Test that an import over the row limit is rejected after reading one row past it"""
+        readlist = Readlist.objects.create(user=self.user, name='Too long')
+        lines = (json.dumps({'google_books_id': f'many-{i}', 'title': 'Many', 'author': 'Writer'}) for i in range(5))
+        upload = SimpleUploadedFile('books.jsonl', ('\n'.join(lines) + '\n{not json').encode())
+
+        response = self.client.post(f'/api/readlists/{readlist.id}/import/', {'file': upload}, format='multipart')
+        self.assertEqual(response.status_code, 400)
+        self.assertIn('At most 2', response.json()['error'])
+        self.assertFalse(readlist.readlist_books.exists())
+
+
+class AwardPointsConcurrencyTest(TransactionTestCase):
+    def test_parallel_awards_are_not_lost(self):
+        """Test that awards made from parallel threads all reach the user's total"""
+        user = User.objects.create_user(username='busy', password='12345')
+        threads_count, awards_per_thread = 4, 10
+        errors = []
+
+        def award():
+            try:
+                for _ in range(awards_per_thread):
+                    award_points(user, 5, "Parallel award")
+            except DatabaseError as e:
+                errors.append(e)
+            finally:
+                connection.close()
+
+        threads = [threading.Thread(target=award) for _ in range(threads_count)]
+        for thread in threads:
+            thread.start()
+        for thread in threads:
+            thread.join()
+
+        self.assertEqual(errors, [])
+        user_points = UserPoints.objects.get(user=user)
+        self.assertEqual(user_points.total_points, threads_count * awards_per_thread * 5)
+        self.assertEqual(user_points.level, 3)
+        self.assertEqual(PointsHistory.objects.filter(user=user).count(), threads_count * awards_per_thread)
+
+
+class AchievementRuleTest(TestCase):
+    def setUp(self):
+        isolate_achievement_cache(self)
+        self.user, self.client = logged_in('achiever')
+
+    def test_evaluate_awards_reached_rules_once(self):
+        """Test that the evaluator awards each reached rule once and skips unrelated metrics"""
+        with self.assertNumQueries(0):
+            self.assertEqual(achievements.evaluate(self.user, achievements.REVIEWS_WRITTEN, 4), ([], 0))
+
+        with self.captureOnCommitCallbacks(execute=True):
+            messages, points = achievements.evaluate(self.user, achievements.REVIEWS_WRITTEN, 15)
+        self.assertEqual(messages, ["🏆 Reviewer: Wrote 5 book reviews!", "🏆 Critic: Wrote 15 book reviews!"])
+        self.assertEqual(points, 55)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 55)
+
+        # Definitions come from the cache; only the user's earned achievements are read
+        with self.assertNumQueries(1):
+            self.assertEqual(achievements.evaluate(self.user, achievements.REVIEWS_WRITTEN, 16), ([], 0))
+
+    def test_review_endpoint_reports_new_achievement(self):
+        """Test that the fifth review earns Reviewer through the rule registry"""
+        book = Book.objects.create(google_books_id='vol1', title='Test Book', author='Author')
+        for i in range(4):
+            Review.objects.create(user=self.user, book=book, review_text=f'Review {i}')
+
+        response = self.client.post('/api/reviews/', {'book': book.id, 'review_text': 'Fifth'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertEqual(response.json()['gamification']['achievements'], ["🏆 Reviewer: Wrote 5 book reviews!"])
+        self.assertTrue(UserAchievement.objects.filter(user=self.user, achievement__name='Reviewer').exists())
+
+
+class UserCountersTest(TestCase):
+    def setUp(self):
+        self.user, self.client = logged_in('counted')
+        self.other, self.other_client = logged_in('other')
+        self.book = Book.objects.create(google_books_id='vol1', title='Test Book', author='Author')
+
+    def test_write_paths_keep_counters_in_step(self):
+        """Test that ratings, reviews, follows and favorites update the counters row"""
+        self.client.post('/api/rate-book/', {'google_books_id': 'vol1', 'rating': 4}, format='json')
+        review = self.client.post('/api/reviews/', {'book': self.book.id, 'review_text': 'Good'}, format='json').json()
+        self.client.post('/api/users/follow/', {'username': 'other'}, format='json')
+        Readlist.objects.create(user=self.user, name='Favorites', is_favorites=True)
+        self.client.post('/api/favorites/add/', {'google_books_id': 'vol1'}, format='json')
+
+        self.other_client.post(f"/api/reviews/{review['id']}/reply/", {'review_text': 'Agreed'}, format='json')
+
+        user_counters = UserCounters.objects.get(user=self.user)
+        self.assertEqual(
+            (user_counters.ratings, user_counters.reviews, user_counters.following, user_counters.favorites),
+            (1, 1, 1, 1)
+        )
+        self.assertEqual(UserCounters.objects.get(user=self.other).followers, 1)
+        self.assertEqual(UserCounters.objects.get(user=self.other).replies, 1)
+
+        # Deleting the review also removes the other user's reply
+        self.client.delete(f"/api/reviews/{review['id']}/delete/")
+        self.assertEqual(UserCounters.objects.get(user=self.user).reviews, 0)
+        self.assertEqual(UserCounters.objects.get(user=self.other).replies, 0)
+
+        with self.assertNumQueries(2):
+            response = self.client.get('/api/user/points/')
+        self.assertEqual(response.json()['reviews_written'], 0)
+
+    def test_reconcile_command_fixes_drift(self):
+        """Test that the reconcile command recomputes counters from the source tables"""
+        counters.get(self.user)
+        Rating.objects.create(user=self.user, book=self.book, rating=3)
+        UserFollow.objects.create(follower=self.other, followed=self.user)
+
+        out = io.StringIO()
+        call_command('reconcile_counters', '--dry-run', stdout=out)
+        self.assertIn('ratings 0 -> 1', out.getvalue())
+        self.assertEqual(UserCounters.objects.get(user=self.user).ratings, 0)
+
+        call_command('reconcile_counters', stdout=io.StringIO())
+        user_counters = UserCounters.objects.get(user=self.user)
+        self.assertEqual((user_counters.ratings, user_counters.followers), (1, 1))
+
+
+class GamificationOutboxTest(TestCase):
+    def setUp(self):
+        isolate_achievement_cache(self)
+        self.user, self.client = logged_in('outboxuser')
+        self.book = Book.objects.create(
+            google_books_id='vol1', title='Test Book', author='Author', metadata_refreshed_at=tz_now()
+        )
+
+    def drain(self):
+        with self.captureOnCommitCallbacks(execute=True):
+            call_command('process_gamification_events', '--once', stdout=io.StringIO())
+
+    @override_settings(GAMIFICATION_ASYNC=True)
+    def test_async_review_is_pending_until_worker_runs(self):
+        """Test that the response reports base points as pending and the worker applies them once"""
+        for i in range(4):
+            Review.objects.create(user=self.user, book=self.book, review_text=f'Review {i}')
+
+        response = self.client.post('/api/reviews/', {'book': self.book.id, 'review_text': 'Fifth'}, format='json')
+        gamification = response.json()['gamification']
+        self.assertEqual(gamification['notification']['points'], 5)
+        self.assertEqual((gamification['pending'], gamification['achievements']), (True, []))
+        self.assertFalse(PointsHistory.objects.filter(user=self.user).exists())
+
+        event_url = f"/api/user/gamification/events/{gamification['event_id']}/"
+        self.assertTrue(self.client.get(event_url).json()['pending'])
+
+        self.drain()
+        event = self.client.get(event_url).json()
+        self.assertEqual(event['pending'], False)
+        self.assertEqual(event['achievements'], ["🏆 Reviewer: Wrote 5 book reviews!"])
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, event['points'])
+
+        # Already processed events are not applied again
+        self.drain()
+        self.assertEqual(PointsHistory.objects.filter(user=self.user, description="Created a book review").count(), 1)
+
+    @override_settings(GAMIFICATION_ASYNC=True)
+    def test_worker_maintains_done_reading(self):
+        """Test that finishing a book awards points once and Done Reading follows the latest status"""
+        url = '/api/books/vol1/update-status/'
+        response = self.client.post(url, {'status': 'FINISHED'}, format='json')
+        self.assertEqual(response.json()['gamification']['points_earned'], 10)
+        self.assertTrue(response.json()['gamification']['pending'])
+        self.assertFalse(Readlist.objects.filter(user=self.user, name='Done Reading').exists())
+
+        self.drain()
+        done_reading = Readlist.objects.get(user=self.user, name='Done Reading')
+        self.assertTrue(ReadlistBook.objects.filter(readlist=done_reading, book=self.book).exists())
+
+        # Two queued changes: the worker leaves the list matching the final status
+        self.client.post(url, {'status': 'READING'}, format='json')
+        response = self.client.post(url, {'status': 'FINISHED'}, format='json')
+        self.assertNotIn('gamification', response.json())
+        self.client.post(url, {'status': 'READING'}, format='json')
+        self.drain()
+        self.assertFalse(ReadlistBook.objects.filter(readlist=done_reading, book=self.book).exists())
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+
+    @override_settings(GAMIFICATION_INLINE_ATTEMPTS=2)
+    def test_failed_inline_event_is_left_for_worker(self):
+        """Test that a failing side effect does not fail the action and is retried by the worker"""
+        with mock.patch('api.outbox.award_points', side_effect=OperationalError('points store down')), \
+                self.assertLogs('api.outbox', 'ERROR'):
+            response = self.client.post('/api/reviews/', {'book': self.book.id, 'review_text': 'Good'}, format='json')
+        self.assertEqual(response.status_code, 201)
+        self.assertTrue(response.json()['gamification']['pending'])
+
+        event = GamificationEvent.objects.get(user=self.user)
+        self.assertEqual((event.attempts, event.last_error, event.processed_at), (2, 'points store down', None))
+
+        self.drain()
+        event.refresh_from_db()
+        self.assertIsNotNone(event.processed_at)
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 5)
+
+    @override_settings(GAMIFICATION_INLINE_ATTEMPTS=2)
+    def test_inline_event_is_retried_in_the_request(self):
+        """Test that Done Reading upkeep failing once is applied by the next inline attempt"""
+        calls = []
+
+        def flaky_add_book(readlist, book):
+            calls.append(book)
+            if len(calls) == 1:
+                raise OperationalError('deadlock')
+            return add_book(readlist, book)
+
+        with mock.patch('api.outbox.add_book', side_effect=flaky_add_book), self.assertLogs('api.outbox', 'ERROR'):
+            response = self.client.post('/api/books/vol1/update-status/', {'status': 'FINISHED'}, format='json')
+        self.assertNotIn('pending', response.json()['gamification'])
+
+        done_reading = Readlist.objects.get(user=self.user, name='Done Reading')
+        self.assertTrue(ReadlistBook.objects.filter(readlist=done_reading, book=self.book).exists())
+        self.assertEqual(UserPoints.objects.get(user=self.user).total_points, 10)
+        event = GamificationEvent.objects.get(user=self.user)
+        self.assertEqual((event.attempts, event.last_error), (1, 'deadlock'))
+        self.assertIsNotNone(event.processed_at)
+
+    @override_settings(GAMIFICATION_ASYNC=True)
+    def test_handler_bug_is_raised_not_retried(self):
+        """Test that a programming error in a handler reaches the worker instead of counting as an attempt"""
+        self.client.post('/api/reviews/', {'book': self.book.id, 'review_text': 'Good'}, format='json')
+        with mock.patch('api.outbox.award_points', side_effect=TypeError('bad call')), \
+                self.assertRaises(TypeError):
+            self.drain()
+
+        event = GamificationEvent.objects.get(user=self.user)
+        self.assertEqual((event.attempts, event.processed_at), (0, None))
+
+
+class LeaderboardTest(TestCase):
+    def setUp(self):
+        isolate_achievement_cache(self)
+        self.users = []
+        for i, points in enumerate([50, 40, 40, 30, 20, 10]):
+            user = User.objects.create_user(username=f'reader{i}', password='12345')
+            UserPoints.objects.create(user=user, total_points=points, level=1, achievement_count=i)
+            self.users.append(user)
+        self.client = APIClient()
+
+    def test_top_pages_share_ranks_across_ties(self):
+        """Test that each page is one query and tied users keep the same rank across pages"""
+        pages = []
+        url = '/api/leaderboard/?limit=2'
+        while True:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            pages.append([(entry['rank'], entry['username'], entry['achievements']) for entry in response.json()])
+            cursor = response.get('X-Next-Cursor')
+            if not cursor:
+                break
+            url = f'/api/leaderboard/?limit=2&cursor={cursor}'
+
+        self.assertEqual(pages, [
+            [(1, 'reader0', 0), (2, 'reader1', 1)],
+            [(2, 'reader2', 2), (4, 'reader3', 3)],
+            [(5, 'reader4', 4), (6, 'reader5', 5)],
+        ])
+        self.assertEqual(self.client.get('/api/leaderboard/?cursor=bogus').status_code, 400)
+
+    def test_rank_with_neighbours(self):
+        """Test that the around-me window reports competition ranks for the user and their neighbours"""
+        self.client.force_authenticate(self.users[2])
+        response = self.client.get('/api/leaderboard/me/?neighbours=2')
+        self.assertEqual(response.json()['rank'], 2)
+        self.assertEqual(
+            [(entry['rank'], entry['username']) for entry in response.json()['entries']],
+            [(1, 'reader0'), (2, 'reader1'), (2, 'reader2'), (4, 'reader3'), (5, 'reader4')]
+        )
+
+        # A window starting inside a tie reports the tie's rank
+        self.client.force_authenticate(self.users[3])
+        response = self.client.get('/api/leaderboard/me/?neighbours=1')
+        self.assertEqual([entry['rank'] for entry in response.json()['entries']], [2, 4, 5])
+
+        newcomer = User.objects.create_user(username='newcomer', password='12345')
+        self.client.force_authenticate(newcomer)
+        self.assertEqual(self.client.get('/api/leaderboard/me/').json(), {'rank': None, 'entries': []})
+
+    def test_achievement_count_follows_awards(self):
+        """Test that earning achievements updates the denormalized count"""
+        with self.captureOnCommitCallbacks(execute=True):
+            achievements.evaluate(self.users[0], achievements.REVIEWS_WRITTEN, 15)
+        self.assertEqual(UserPoints.objects.get(user=self.users[0]).achievement_count, 2)
+
+
+class FollowingLeaderboardTest(TestCase):
+    def setUp(self):
+        cache.clear()
+        self.addCleanup(cache.clear)
+        self.user, self.client = logged_in('me')
+        self.others = {}
+        for username, points in [('alice', 30), ('bob', 20), ('carol', 10), ('stranger', 100)]:
+            other = User.objects.create_user(username=username, password='12345')
+            UserPoints.objects.create(user=other, total_points=points)
+            self.others[username] = other
+        UserPoints.objects.create(user=self.user, total_points=15)
+        for username in ('alice', 'bob', 'carol'):
+            UserFollow.objects.create(follower=self.user, followed=self.others[username])
+
+    def board(self, url='/api/leaderboard/following/'):
+        return [(entry['rank'], entry['username'], entry['total_points']) for entry in self.client.get(url).json()]
+
+    def board_reads(self, url):
+        """Queries against the leaderboard table while fetching ``url``; cache reads are not counted"""
+        with CaptureQueriesContext(connection) as queries:
+            response = self.client.get(url)
+        return response, len([query for query in queries if 'api_userpoints' in query['sql']])
+
+    def test_board_is_paginated_and_cached(self):
+        """Test that the board holds the user and the people they follow, and repeat reads hit the cache"""
+        response, reads = self.board_reads('/api/leaderboard/following/?limit=3')
+        self.assertEqual(reads, 1)
+        self.assertEqual(
+            [(entry['rank'], entry['username']) for entry in response.json()],
+            [(1, 'alice'), (2, 'bob'), (3, 'me')]
+        )
+        next_url = f"/api/leaderboard/following/?limit=3&cursor={response['X-Next-Cursor']}"
+        self.assertEqual(self.board(next_url), [(4, 'carol', 10)])
+
+        response, reads = self.board_reads('/api/leaderboard/following/?limit=3')
+        self.assertEqual((reads, response.json()[0]['username']), (0, 'alice'))
+
+    def test_follow_changes_and_own_awards_invalidate(self):
+        """Test that follows, unfollows and the user's own awards replace the cached board"""
+        self.board()
+        self.client.post('/api/users/follow/', {'username': 'stranger'}, format='json')
+        self.assertEqual(self.board()[0], (1, 'stranger', 100))
+
+        self.client.post('/api/users/unfollow/', {'username': 'alice'}, format='json')
+        self.assertNotIn('alice', [username for _, username, _ in self.board()])
+
+        # An award refreshes the awardee's own board, not those of everyone following them
+        with self.captureOnCommitCallbacks(execute=True):
+            award_points(self.user, 200, "Test award")
+        self.assertEqual(self.board()[0], (1, 'me', 215))
+        with self.captureOnCommitCallbacks(execute=True):
+            award_points(self.others['carol'], 300, "Test award")
+        self.assertEqual(self.board()[0], (1, 'me', 215))
+        cache.clear()
+        self.assertEqual(self.board()[0], (1, 'carol', 310))
+
+
+class PointsHistoryTest(TestCase):
+    def setUp(self):
+        self.user, self.client = logged_in('historian')
+
+    def add_history(self, amount, days_ago):
+        entry = PointsHistory.objects.create(user=self.user, amount=amount, description=f'{amount} points')
+        PointsHistory.objects.filter(pk=entry.pk).update(timestamp=tz_now() - timedelta(days=days_ago))
+        return entry
+
+    def test_keyset_pages_cover_ties_once(self):
+        """Test that paging by (timestamp, id) returns every row once, newest first, one query a page"""
+        entries = [self.add_history(i, 0) for i in range(5)]
+        PointsHistory.objects.update(timestamp=tz_now())
+
+        amounts, url = [], '/api/user/points/history/?limit=2'
+        while url:
+            with self.assertNumQueries(1):
+                response = self.client.get(url)
+            amounts.extend(entry['amount'] for entry in response.json())
+            cursor = response.get('X-Next-Cursor')
+            url = f'/api/user/points/history/?limit=2&cursor={cursor}' if cursor else None
+
+        self.assertEqual(amounts, [entry.amount for entry in reversed(entries)])
+        self.assertEqual(self.client.get('/api/user/points/history/?cursor=bogus').status_code, 400)
+
+    def test_compaction_folds_old_rows_into_rollups(self):
+        """Test that compaction moves old rows into rollups and rollup reads merge both sources"""
+        self.add_history(5, 40)
+        self.add_history(3, 40)
+        self.add_history(2, 0)
+        old_day = (tz_now() - timedelta(days=40)).date()
+
+        call_command('compact_points_history', '--days', '30', '--dry-run', stdout=io.StringIO())
+        self.assertEqual(PointsHistory.objects.count(), 3)
+
+        call_command('compact_points_history', '--days', '30', stdout=io.StringIO())
+        self.assertEqual(list(PointsHistory.objects.values_list('amount', flat=True)), [2])
+        self.assertEqual(
+            PointsRollup.objects.get(user=self.user, period=PointsRollup.DAY, period_start=old_day).points, 8
+        )
+
+        # A later compaction adds to the existing rollups
+        self.add_history(4, 40)
+        call_command('compact_points_history', '--days', '30', stdout=io.StringIO())
+
+        response = self.client.get('/api/user/points/history/?rollup=day')
+        self.assertEqual(
+            [(total['period_start'], total['points'], total['entries']) for total in response.json()],
+            [(tz_now().date().isoformat(), 2, 1), (old_day.isoformat(), 12, 3)]
+        )
+
+        response = self.client.get('/api/user/points/history/?rollup=week&limit=1')
+        self.assertEqual(response.json()[0]['points'], 2)
+        response = self.client.get(f"/api/user/points/history/?rollup=week&limit=1&cursor={response['X-Next-Cursor']}")
+        self.assertEqual(
+            [(total['period_start'], total['points']) for total in response.json()],
+            [((old_day - timedelta(days=old_day.weekday())).isoformat(), 12)]
+        )
+        self.assertEqual(self.client.get('/api/user/points/history/?rollup=month').status_code, 400)
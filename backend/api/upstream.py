@@ -0,0 +1,106 @@
+"""Shared HTTP client for the Google Books and NYT APIs.
+
+All upstream calls go through one pooled ``requests.Session`` so connections
+are kept alive between requests, every call has connect/read timeouts, and
+idempotent GETs are retried with exponential backoff. Latency is recorded per
+host so it can be inspected at runtime.
+"""
+import threading
+import time
+from urllib.parse import urlsplit
+
+import requests
+from django.conf import settings
+from requests.adapters import HTTPAdapter
+from urllib3.util.retry import Retry
+
+GOOGLE_BOOKS_VOLUMES_URL = 'https://www.googleapis.com/books/v1/volumes'
+
+_session = None
+_session_lock = threading.Lock()
+
+_latency = {}
+_latency_lock = threading.Lock()
+
+
+def _build_session():
+    retry = Retry(
+        total=settings.UPSTREAM_MAX_RETRIES,
+        backoff_factor=settings.UPSTREAM_BACKOFF_FACTOR,
+        status_forcelist=(429, 500, 502, 503, 504),
+        allowed_methods=frozenset(['GET']),
+        raise_on_status=False,
+    )
+    adapter = HTTPAdapter(
+        pool_connections=settings.UPSTREAM_POOL_CONNECTIONS,
+        pool_maxsize=settings.UPSTREAM_POOL_MAXSIZE,
+        max_retries=retry,
+    )
+    session = requests.Session()
+    session.mount('https://', adapter)
+    session.mount('http://', adapter)
+    return session
+
+
+def get_session():
+    global _session
+    if _session is None:
+        with _session_lock:
+            if _session is None:
+                _session = _build_session()
+    return _session
+
+
+def _record(host, elapsed, failed):
+    with _latency_lock:
+        stats = _latency.setdefault(host, {'requests': 0, 'errors': 0, 'total_ms': 0.0, 'max_ms': 0.0})
+        stats['requests'] += 1
+        stats['errors'] += int(failed)
+        stats['total_ms'] += elapsed
+        stats['max_ms'] = max(stats['max_ms'], elapsed)
+
+
+def get(url, params=None, timeout=None):
+    """GET ``url`` through the shared session.
+
+    Raises ``requests.RequestException`` when the host cannot be reached
+    within the configured timeouts and retries.
+    """
+    if timeout is None:
+        timeout = (settings.UPSTREAM_CONNECT_TIMEOUT, settings.UPSTREAM_READ_TIMEOUT)
+
+    host = urlsplit(url).netloc
+    started = time.monotonic()
+    failed = True
+    try:
+        response = get_session().get(url, params=params, timeout=timeout)
+        failed = response.status_code >= 500
+        return response
+    finally:
+        _record(host, (time.monotonic() - started) * 1000, failed)
+
+
+def google_books_get(path='', params=None, timeout=None):
+    """GET a Google Books ``volumes`` resource, adding the API key"""
+    params = dict(params or {})
+    params['key'] = settings.GOOGLE_BOOKS_API_KEY
+    url = f"{GOOGLE_BOOKS_VOLUMES_URL}/{path}" if path else GOOGLE_BOOKS_VOLUMES_URL
+    return get(url, params=params, timeout=timeout)
+
+
+def latency_stats():
+    with _latency_lock:
+        return {
+            host: {
+                'requests': stats['requests'],
+                'errors': stats['errors'],
+                'avg_ms': round(stats['total_ms'] / stats['requests'], 1),
+                'max_ms': round(stats['max_ms'], 1),
+            }
+            for host, stats in _latency.items()
+        }
+
+
+def reset_stats():
+    with _latency_lock:
+        _latency.clear()
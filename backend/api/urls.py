@@ -7,6 +7,8 @@ urlpatterns = [
     path('login/', views.login_user, name='login'),
     path('logout/', views.logout_user, name='logout'),
     path('search/', views.search_books, name='search_books'),
+    path('search/cache-stats/', views.search_cache_stats, name='search_cache_stats'),
+    path('upstream/stats/', views.upstream_stats, name='upstream_stats'),
     path('profile/', views.profile_view, name='profile'),
     path('profile/update/', views.update_profile, name='update_profile'),
     path('token/refresh/', TokenRefreshView.as_view(), name='token_refresh'),
@@ -16,6 +18,8 @@ urlpatterns = [
     path('reviews/<int:review_id>/', views.update_review, name='update_review'),
     path('reviews/<int:review_id>/delete/', views.delete_review, name='delete_review'),
     path('reviews/<int:review_id>/reply/', views.create_reply, name='create_reply'),
+    path('reviews/<int:review_id>/replies/', views.get_review_replies, name='get_review_replies'),
+    path('books/ratings/', views.get_batch_ratings, name='get_batch_ratings'),
     path('books/<str:google_books_id>/ratings/', views.get_book_ratings, name='get_book_ratings'),
     path('books/create-or-get/', views.create_or_get_book, name='create_or_get_book'),
     
@@ -48,6 +52,8 @@ urlpatterns = [
     path("readlists/", views.get_readlists, name="get_readlists"),
     path("readlists/create/", views.create_readlist, name="create_readlist"),
     path("readlists/<int:readlist_id>/", views.readlist_detail, name="readlist_detail"),
+    path("readlists/<int:readlist_id>/export/<str:export_format>/", views.export_readlist, name="export_readlist"),
+    path("readlists/<int:readlist_id>/import/", views.import_readlist, name="import_readlist"),
     path("readlists/update/", views.update_readlist_books, name="update_readlist_books"),
 
     # Gamification routes
@@ -55,12 +61,15 @@ urlpatterns = [
     path('user/achievements/', views.get_user_achievements, name='get_user_achievements'),
     path('user/points/', views.get_user_points, name='get_user_points'),
     path('user/points/history/', views.get_points_history, name='get_points_history'),
+    path('user/gamification/events/<int:event_id>/', views.get_gamification_event, name='get_gamification_event'),
     path('challenges/', views.get_challenges, name='get_challenges'),
     path('challenges/join/', views.join_challenge, name='join_challenge'),
     path('user/challenges/', views.get_user_challenges, name='get_user_challenges'),
     path('challenges/initialize-samples/', views.initialize_sample_challenges, name='initialize_sample_challenges'),
     path('user/streak/', views.get_reading_streak, name='get_reading_streak'),
     path('leaderboard/', views.get_leaderboard, name='get_leaderboard'),
+    path('leaderboard/me/', views.get_leaderboard_around_me, name='get_leaderboard_around_me'),
+    path('leaderboard/following/', views.get_following_leaderboard, name='get_following_leaderboard'),
 
     path('readlists/share/', views.share_readlist, name='share_readlist'),
     path('readlists/shared/', views.get_shared_readlists, name='get_shared_readlists'),
@@ -68,6 +77,7 @@ urlpatterns = [
     path('readlists/rename/', views.rename_readlist, name='rename_readlist'),
 
     path('readlists/reorder-books/', views.reorder_books_in_readlist, name='reorder_books_in_readlist'),
+    path('readlists/move-book/', views.move_book_in_readlist, name='move_book_in_readlist'),
 
     path('readlists/remove_book/', views.remove_book_from_readlist, name='remove_book_from_readlist'),
 ]
\ No newline at end of file
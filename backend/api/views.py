@@ -1,20 +1,22 @@
 from django.conf import settings
 from django.contrib.auth.models import User
 from django.contrib.auth import authenticate
-from django.http import JsonResponse
+from django.http import JsonResponse, StreamingHttpResponse
 from django.views.decorators.csrf import csrf_exempt
-from django.db import models
 from django.shortcuts import get_object_or_404
-from django.db.models import Q
+from django.db import transaction
+from django.db.models import Count, Exists, F, OuterRef, Prefetch, Q, Subquery, Window, prefetch_related_objects
+from django.db.models.functions import Coalesce, RowNumber
 
 import requests
 import base64
 import os
 import time
+from datetime import date, datetime
 from django.utils import timezone
 
 from rest_framework.decorators import api_view, permission_classes
-from rest_framework.permissions import IsAuthenticated
+from rest_framework.permissions import IsAuthenticated, IsAdminUser
 from rest_framework.response import Response
 from rest_framework import status
 from rest_framework_simplejwt.tokens import RefreshToken
@@ -22,13 +24,21 @@ from rest_framework_simplejwt.authentication import JWTAuthentication
 from rest_framework_simplejwt.exceptions import InvalidToken, TokenError
 
 from .models import (
-    Profile, Rating, Book, Review, UserBookStatus, UserFollow,
+    Profile, Book, Review, UserBookStatus, UserFollow,
     Readlist, ReadlistBook, Achievement, UserAchievement, ReadingChallenge,
-    UserChallenge, UserPoints, PointsHistory, ReadingStreak
+    UserChallenge, UserPoints, ReadingStreak, GamificationEvent, build_review_tree
 )
-from .serializers import ReadlistSerializer
-
-GOOGLE_BOOKS_API_KEY = settings.GOOGLE_BOOKS_API_KEY
+from .serializers import ReadlistSerializer, readlist_books_prefetch
+from .cache import TTLCache
+from .catalog import search_local_books
+from . import counters, leaderboard, outbox, points_history, ratings, readlist_io, readlist_order, upstream
+from .memberships import MEMBERSHIP_COUNTERS, add_book, add_to_readlists, remove_book, remove_from_readlists
+from .pagination import InvalidCursor, decode_cursor, encode_cursor, parse_limit, with_next_cursor
+from .bestsellers import latest_bestsellers
+from .books import is_fresh, refresh_in_background, save_volume
+
+# Parsed Google Books results keyed by normalized (filterType, query)
+search_cache = TTLCache(max_entries=settings.SEARCH_CACHE_MAX_ENTRIES, ttl=settings.SEARCH_CACHE_TTL)
 
 @api_view(['POST'])
 def register_user(request):
@@ -168,6 +178,43 @@ def profile_view(request):
         'profile_image': request.build_absolute_uri(profile.profile_image.url) if profile.profile_image else None
     })
 
+def _search_cache_key(filter_type, query):
+    """Normalize a search so that casing and spacing variants share one cache entry"""
+    return (filter_type, ' '.join(query.lower().split()))
+
+def _fetch_search_results(filter_type, query):
+    """Fetch up to 40 results for a query from Google Books, or None on an upstream error"""
+    if filter_type == 'author':
+        formatted_query = f'inauthor:"{query}"'
+    elif filter_type == 'title':
+        formatted_query = f'intitle:"{query}"'
+    elif filter_type == 'genre':
+        formatted_query = f'subject:"{query}"'
+    else:
+        formatted_query = query
+
+    try:
+        response = upstream.google_books_get(params={'q': formatted_query, 'maxResults': 40})
+    except requests.RequestException:
+        return None
+    if response.status_code != 200:
+        return None
+
+    data = response.json()
+    books = []
+    for item in data.get('items', []):
+        volume_info = item.get('volumeInfo', {})
+        books.append({
+            'google_books_id': item.get('id'),
+            'title': volume_info.get('title', 'No Title'),
+            'genre': ', '.join(volume_info.get('categories', ['Unknown Genre'])),
+            'author': ', '.join(volume_info.get('authors', ['Unknown Author'])),
+            'year': volume_info.get('publishedDate', 'N/A')[:4] if volume_info.get('publishedDate') else 'N/A',
+            'description': volume_info.get('description', 'No Description'),
+            'image': volume_info.get('imageLinks', {}).get('thumbnail', ''),
+        })
+    return books
+
 @csrf_exempt
 def search_books(request):
     if request.method == 'GET':
@@ -177,41 +224,63 @@ def search_books(request):
         max_results = 10
         start_index = (page - 1) * max_results
 
-        if query:
-            if filter_type == 'author':
-                formatted_query = f'inauthor:"{query}"'
-            elif filter_type == 'title':
-                formatted_query = f'intitle:"{query}"'
-            elif filter_type == 'genre':
-                formatted_query = f'subject:"{query}"'
-            else:
-                formatted_query = query
+        mode = request.GET.get('mode', settings.SEARCH_DEFAULT_MODE)
+        if mode not in ('auto', 'local', 'remote'):
+            return JsonResponse({'error': 'Invalid search mode'}, status=400)
 
-            url = f"https://www.googleapis.com/books/v1/volumes?q={formatted_query}&key={GOOGLE_BOOKS_API_KEY}&maxResults=40"
-            
-            response = requests.get(url)
-            if response.status_code == 200:
-                data = response.json()
-                books = []
-                for item in data.get('items', []):
-                    volume_info = item.get('volumeInfo', {})
-                    books.append({
-                        'google_books_id': item.get('id'),
-                        'title': volume_info.get('title', 'No Title'),
-                        'genre': ', '.join(volume_info.get('categories', ['Unknown Genre'])),
-                        'author': ', '.join(volume_info.get('authors', ['Unknown Author'])),
-                        'year': volume_info.get('publishedDate', 'N/A')[:4] if volume_info.get('publishedDate') else 'N/A',
-                        'description': volume_info.get('description', 'No Description'),
-                        'image': volume_info.get('imageLinks', {}).get('thumbnail', ''),
-                    })
-
-                paginated_books = books[start_index:start_index + max_results]
-                return JsonResponse({'books': paginated_books, 'page': page})
-            else:
-                return JsonResponse({'error': 'Error fetching data from Google Books API'}, status=500)
+        if query:
+            books = None
+            source = 'google'
+
+            # Answer from saved books when they cover the query well enough
+            if mode in ('auto', 'local'):
+                local_books = search_local_books(query, filter_type)
+                if mode == 'local' or len(local_books) >= settings.LOCAL_SEARCH_MIN_RESULTS:
+                    books = local_books
+                    source = 'local'
+
+            if books is None:
+                # Every page of a query is served from a single upstream fetch
+                cache_key = _search_cache_key(filter_type, query)
+                books = search_cache.get(cache_key)
+                if books is None:
+                    books = _fetch_search_results(filter_type, query)
+                    if books is None:
+                        return JsonResponse({'error': 'Error fetching data from Google Books API'}, status=500)
+                    search_cache.set(cache_key, books)
+
+            paginated_books = books[start_index:start_index + max_results]
+            return JsonResponse({'books': paginated_books, 'page': page, 'source': source})
         return JsonResponse({'error': 'No search query provided'}, status=400)
     return JsonResponse({'error': 'Invalid request method'}, status=405)
 
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def search_cache_stats(request):
+    """Report hit/miss counters for the search result cache"""
+    return Response(search_cache.stats())
+
+@api_view(['GET'])
+@permission_classes([IsAdminUser])
+def upstream_stats(request):
+    """Report per-host latency of Google Books and NYT calls"""
+    return Response(upstream.latency_stats())
+
+def _gamification_data(outcome, message, points):
+    """Gamification payload for an outbox event: the base points are known up front,
+    achievements once the event is applied (``pending`` until the worker runs it)"""
+    return {
+        "notification": {
+            "show": True,
+            "message": message,
+            "points": points,
+            "type": "success"
+        },
+        "achievements": outcome['achievements'],
+        "pending": outcome['pending'],
+        "event_id": outcome['event_id']
+    }
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def rate_book(request):
@@ -227,43 +296,14 @@ def rate_book(request):
 
     try:
         book = Book.objects.get(google_books_id=book_id)
-        rating, created = Rating.objects.update_or_create(
-            user=user, book=book, defaults={'rating': rating_value}
-        )
-        
-        # Only award points if this is a new rating, not an update
+        with transaction.atomic():
+            rating, created = ratings.rate(user, book, int(rating_value))
+            # Only award points if this is a new rating, not an update
+            event = outbox.record(user, outbox.BOOK_RATED) if created else None
+
         gamification_data = {}
-        if created:
-            # Award 2 points for rating a book
-            award_points(user, 2, "Rated a book")
-            
-            # Get total ratings count
-            ratings_count = Rating.objects.filter(user=user).count()
-            achievement_messages = []
-            
-            # Check for milestones
-            if ratings_count == 10:
-                achievement, _ = Achievement.objects.get_or_create(
-                    name="Opinionated",
-                    defaults={
-                        "description": "Rated 10 books",
-                        "points": 15
-                    }
-                )
-                user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-                if created:
-                    award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                    achievement_messages.append("🏆 Opinionated: Rated 10 books!")
-            
-            gamification_data = {
-                "notification": {
-                    "show": True,
-                    "message": "Rating submitted! +2 points",
-                    "points": 2,
-                    "type": "success"
-                },
-                "achievements": achievement_messages
-            }
+        if event:
+            gamification_data = _gamification_data(outbox.dispatch(event), "Rating submitted! +2 points", 2)
         
         return Response({
             'message': 'Rating submitted successfully.', 
@@ -276,69 +316,152 @@ def rate_book(request):
 @api_view(['GET'])
 def get_book_ratings(request, google_books_id):
     try:
-        book = Book.objects.get(google_books_id=google_books_id)
-        ratings = Rating.objects.filter(book=book)
-        avg_rating = ratings.aggregate(models.Avg('rating'))['rating__avg']
+        book = Book.objects.only(*ratings.AGGREGATE_FIELDS).get(google_books_id=google_books_id)
         return Response({
-            'average_rating': round(avg_rating, 1) if avg_rating else 0,
-            'total_ratings': ratings.count()
+            'average_rating': book.average_rating,
+            'total_ratings': book.rating_count,
+            'histogram': book.rating_histogram
         })
     except Book.DoesNotExist:
         return Response({
             'average_rating': 0,
-            'total_ratings': 0
+            'total_ratings': 0,
+            'histogram': dict.fromkeys(range(1, 6), 0)
         })
 
+@api_view(['GET'])
+def get_batch_ratings(request):
+    """Average and count for each of a comma-separated list of google_books_ids"""
+    ids = list(dict.fromkeys(i for i in request.GET.get('ids', '').split(',') if i))
+    if len(ids) > settings.BATCH_RATINGS_MAX_IDS:
+        return Response(
+            {'error': f'At most {settings.BATCH_RATINGS_MAX_IDS} ids are allowed.'},
+            status=status.HTTP_400_BAD_REQUEST
+        )
+
+    books = Book.objects.filter(google_books_id__in=ids).only('google_books_id', 'rating_count', 'rating_sum')
+    found = {book.google_books_id: book for book in books}
+    return Response({
+        google_books_id: {
+            'average_rating': found[google_books_id].average_rating if google_books_id in found else 0,
+            'total_ratings': found[google_books_id].rating_count if google_books_id in found else 0
+        }
+        for google_books_id in ids
+    })
+
+def _after_cursor(queryset, cursor):
+    """Restrict reviews to those after an (added_date, id) cursor"""
+    added_date, review_id = decode_cursor(cursor, datetime, int)
+    return queryset.filter(Q(added_date__gt=added_date) | Q(added_date=added_date, id__gt=review_id))
+
+def _review_page_params(request):
+    return (
+        parse_limit(request.GET.get('limit'), settings.REVIEWS_PAGE_SIZE, settings.REVIEWS_MAX_PAGE_SIZE),
+        parse_limit(request.GET.get('depth'), settings.REVIEW_REPLY_DEPTH, settings.REVIEW_MAX_REPLY_DEPTH, minimum=0),
+        parse_limit(request.GET.get('replies_limit'), settings.REVIEW_REPLIES_PER_NODE, settings.REVIEWS_MAX_PAGE_SIZE),
+    )
+
+def _with_reply_counts(reviews):
+    """Annotate each review with how many direct replies it has"""
+    counts = Review.objects.filter(parent=OuterRef('pk')).order_by().values('parent').annotate(
+        total=Count('id')
+    ).values('total')
+    return reviews.select_related('user').annotate(reply_count=Coalesce(Subquery(counts), 0))
+
+def _load_replies(parents, depth, replies_limit):
+    """Fetch up to `depth` levels of replies below `parents`, one query per level.
+
+    Each level reads at most `replies_limit + 1` replies per parent; the extra
+    row only tells whether the parent has more. Returns the shown replies and
+    the ids of the parents that have more.
+    """
+    shown, has_more = [], set()
+    level = [review for review in parents if review.reply_count]
+    for _ in range(depth):
+        if not level:
+            break
+        position = Window(RowNumber(), partition_by=F('parent_id'), order_by=[F('added_date').asc(), F('id').asc()])
+        first_replies = Review.objects.filter(parent_id__in=[review.id for review in level]).annotate(
+            position=position
+        ).filter(position__lte=replies_limit + 1).values('id')
+        # Reply counts are only computed for the rows kept by the window
+        children = _with_reply_counts(Review.objects.filter(id__in=first_replies)).annotate(
+            position=position
+        ).order_by('added_date', 'id')
+
+        level = []
+        for child in children:
+            if child.position > replies_limit:
+                has_more.add(child.parent_id)
+            else:
+                level.append(child)
+        shown.extend(level)
+    return shown, has_more
+
+def _review_nodes(reviews, depth, replies_limit):
+    """Serialize `reviews` with reply trees of `depth` levels and `replies_limit` replies per node.
+
+    Every node reports its `reply_count`. Trimmed nodes get a `replies_cursor`
+    for reviews/<id>/replies/; it is null when no replies were shown, meaning
+    start from the first reply.
+    """
+    replies, has_more = _load_replies(reviews, depth, replies_limit)
+    nodes = build_review_tree([*reviews, *replies])
+    for review in [*reviews, *replies]:
+        node = nodes[review.id]
+        shown = node['replies']
+        node['reply_count'] = review.reply_count
+        node['has_more_replies'] = review.id in has_more or (review.reply_count > 0 and not shown)
+        node['replies_cursor'] = (
+            encode_cursor(shown[-1]['added_date'], shown[-1]['id']) if node['has_more_replies'] and shown else None
+        )
+    return [nodes[review.id] for review in reviews]
+
 @api_view(['GET'])
 def get_book_reviews(request, google_books_id):
+    """Top-level reviews of a book in (added_date, id) order with bounded reply trees.
+
+    Query params: cursor, limit, depth (reply levels) and replies_limit (per node).
+    The next page's cursor is returned in the X-Next-Cursor header.
+    """
     try:
         book = Book.objects.get(google_books_id=google_books_id)
-        reviews = Review.objects.filter(book=book, parent=None)
-        reviews_data = []
-
-        for review in reviews:
-            review_data = {
-                'id': review.id,
-                'user': {
-                    'id': review.user.id,
-                    'username': review.user.username
-                },
-                'review_text': review.review_text,
-                'added_date': review.added_date,
-                'updated_at': review.updated_at,
-                'parent': None,
-                'replies': []
-            }
-            
-            def add_replies(parent_review):
-                replies_data = []
-                replies = parent_review.replies.all()
-                
-                for reply in replies:
-                    reply_data = {
-                        'id': reply.id,
-                        'user': {
-                            'id': reply.user.id,
-                            'username': reply.user.username
-                        },
-                        'review_text': reply.review_text,
-                        'added_date': reply.added_date,
-                        'updated_at': reply.updated_at,
-                        'parent': parent_review.id,
-                        'replies': add_replies(reply)
-                    }
-                    replies_data.append(reply_data)
-                
-                return replies_data
-            
-            review_data['replies'] = add_replies(review)
-            reviews_data.append(review_data)
-            
-        return Response(reviews_data)
-        
     except Book.DoesNotExist:
         return Response([])
 
+    limit, depth, replies_limit = _review_page_params(request)
+    top_level = _with_reply_counts(Review.objects.filter(book=book, parent=None)).order_by('added_date', 'id')
+    try:
+        if request.GET.get('cursor'):
+            top_level = _after_cursor(top_level, request.GET['cursor'])
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    page = list(top_level[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].added_date, page[limit - 1].id) if len(page) > limit else None
+    page = page[:limit]
+
+    return with_next_cursor(Response(_review_nodes(page, depth, replies_limit)), next_cursor)
+
+@api_view(['GET'])
+def get_review_replies(request, review_id):
+    """Load more replies of one review, continuing from its `replies_cursor`"""
+    review = get_object_or_404(Review, id=review_id)
+    limit, depth, replies_limit = _review_page_params(request)
+
+    children = _with_reply_counts(Review.objects.filter(parent=review)).order_by('added_date', 'id')
+    try:
+        if request.GET.get('cursor'):
+            children = _after_cursor(children, request.GET['cursor'])
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    page = list(children[:limit + 1])
+    next_cursor = encode_cursor(page[limit - 1].added_date, page[limit - 1].id) if len(page) > limit else None
+    page = page[:limit]
+
+    return with_next_cursor(Response(_review_nodes(page, max(depth - 1, 0), replies_limit)), next_cursor)
+
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def create_book_review(request):
@@ -354,71 +477,18 @@ def create_book_review(request):
         
         book = Book.objects.get(id=book_id)
         
-        review = Review.objects.create(
-            user=request.user,
-            book=book,
-            review_text=review_text
-        )
-        
-        # Award 5 points for creating a review
-        award_points(request.user, 5, "Created a book review")
-        
-        # Check for review count achievements
-        reviews_count = Review.objects.filter(user=request.user, parent_review=None).count()
-        achievement_messages = []
-        
-        # 5 reviews achievement
-        if reviews_count == 5:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Reviewer",
-                defaults={
-                    "description": "Wrote 5 book reviews",
-                    "points": 20
-                }
-            )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=request.user, achievement=achievement)
-            if created:
-                award_points(request.user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Reviewer: Wrote 5 book reviews!")
-                
-        # 15 reviews achievement
-        if reviews_count == 15:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Critic",
-                defaults={
-                    "description": "Wrote 15 book reviews",
-                    "points": 35
-                }
-            )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=request.user, achievement=achievement)
-            if created:
-                award_points(request.user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Critic: Wrote 15 book reviews!")
-                
-        # 30 reviews achievement
-        if reviews_count == 30:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Literary Voice",
-                defaults={
-                    "description": "Wrote 30 book reviews",
-                    "points": 50
-                }
+        with transaction.atomic():
+            review = Review.objects.create(
+                user=request.user,
+                book=book,
+                review_text=review_text
             )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=request.user, achievement=achievement)
-            if created:
-                award_points(request.user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Literary Voice: Wrote 30 book reviews!")
-        
+            counters.bump(request.user, reviews=1)
+            # 5 points for creating a review, plus review count achievements
+            event = outbox.record(request.user, outbox.REVIEW_CREATED)
+
         response_data = review.to_dict()
-        response_data['gamification'] = {
-            "notification": {
-                "show": True,
-                "message": "Review posted! +5 points",
-                "points": 5,
-                "type": "success"
-            },
-            "achievements": achievement_messages
-        }
+        response_data['gamification'] = _gamification_data(outbox.dispatch(event), "Review posted! +5 points", 5)
         
         return Response(response_data, status=status.HTTP_201_CREATED)
         
@@ -445,15 +515,16 @@ def create_reply(request, review_id):
         except Review.DoesNotExist:
             return Response({'error': 'Parent review not found.'}, status=status.HTTP_404_NOT_FOUND)
 
-        reply = Review.objects.create(
-            user=request.user,
-            book=parent_review.book,
-            review_text=review_text,
-            parent=parent_review
-        )
-        
-        # Award 3 points for replying to a review
-        award_points(request.user, 3, "Replied to a review")
+        with transaction.atomic():
+            reply = Review.objects.create(
+                user=request.user,
+                book=parent_review.book,
+                review_text=review_text,
+                parent=parent_review
+            )
+            counters.bump(request.user, replies=1)
+            # 3 points for replying to a review
+            event = outbox.record(request.user, outbox.REPLY_CREATED)
 
         response_data = {
             'id': reply.id,
@@ -469,14 +540,7 @@ def create_reply(request, review_id):
         }
         
         # Add gamification data
-        response_data['gamification'] = {
-            "notification": {
-                "show": True,
-                "message": "Reply posted! +3 points",
-                "points": 3,
-                "type": "success"
-            }
-        }
+        response_data['gamification'] = _gamification_data(outbox.dispatch(event), "Reply posted! +3 points", 3)
 
         return Response(response_data, status=status.HTTP_201_CREATED)
 
@@ -497,46 +561,8 @@ def update_review(request, review_id):
         
         review.review_text = review_text
         review.save()
-        
-
-        response_data = {
-            'id': review.id,
-            'user': {
-                'id': review.user.id,
-                'username': review.user.username
-            },
-            'review_text': review.review_text,
-            'added_date': review.added_date,
-            'updated_at': review.updated_at,
-            'parent': review.parent.id if review.parent else None,
-            'replies': []
-        }
-        
 
-        if review.parent is None and review.replies.exists():
-            def add_replies(parent_review):
-                replies_data = []
-                replies = parent_review.replies.all()
-                
-                for reply in replies:
-                    reply_data = {
-                        'id': reply.id,
-                        'user': {
-                            'id': reply.user.id,
-                            'username': reply.user.username
-                        },
-                        'review_text': reply.review_text,
-                        'added_date': reply.added_date,
-                        'updated_at': reply.updated_at,
-                        'parent': parent_review.id,
-                        'replies': add_replies(reply)
-                    }
-                    replies_data.append(reply_data)
-                
-                return replies_data
-            
-            response_data['replies'] = add_replies(review)
-        
+        response_data = review.to_dict()
         return Response(response_data)
         
     except Review.DoesNotExist:
@@ -550,7 +576,14 @@ def update_review(request, review_id):
 def delete_review(request, review_id):
     try:
         review = Review.objects.get(id=review_id, user=request.user)
-        review.delete()
+        with transaction.atomic():
+            # Replies by other users are deleted with the review, so recount everyone in the thread
+            root_id = review.thread_root_id or review.id
+            authors = set(
+                Review.objects.filter(Q(id=root_id) | Q(thread_root_id=root_id)).values_list('user_id', flat=True)
+            )
+            review.delete()
+            counters.refresh(authors, ['reviews', 'replies'])
         return Response(
             {'message': 'Review deleted successfully.'}, 
             status=status.HTTP_204_NO_CONTENT
@@ -618,7 +651,7 @@ def get_favorites(request):
 @api_view(['POST'])
 @permission_classes([IsAuthenticated])
 def add_favorite(request):
-    """Add a book to the 'Favorites' readlist and award points + achievements inline"""
+    """Add a book to the 'Favorites' readlist, queueing its points and achievements"""
     book_data = request.data
     user = request.user
 
@@ -637,65 +670,15 @@ def add_favorite(request):
 
     try:
         favorites_readlist = Readlist.objects.get(user=user, is_favorites=True)
-        _, added = ReadlistBook.objects.get_or_create(readlist=favorites_readlist, book=book)
+        with transaction.atomic():
+            added = add_book(favorites_readlist, book)
+            # 2 base points for adding a favorite, plus favorites thresholds
+            event = None
+            if added:
+                event = outbox.record(user, outbox.READLIST_BOOKS_ADDED, title=book.title, favorite=True)
 
         if added:
-            # Award 2 base points for adding a favorite
-            award_points(user, 2, "Added a book to favorites")
-
-            # Get current favorite count
-            favorites_count = favorites_readlist.books.count()
-            achievement_messages = []
-
-            # Check each threshold
-            if favorites_count == 5:
-                achievement, _ = Achievement.objects.get_or_create(
-                    name="Collector",
-                    defaults={
-                        "description": "Added 5 books to favorites",
-                        "points": 10
-                    }
-                )
-                user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-                if created:
-                    award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                    achievement_messages.append("🏆 Collector: Added 5 books to favorites!")
-
-            if favorites_count >= 25:
-                achievement, _ = Achievement.objects.get_or_create(
-                    name="Enthusiast",
-                    defaults={
-                        "description": "Added 25 books to favorites",
-                        "points": 25
-                    }
-                )
-                user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-                if created:
-                    award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                    achievement_messages.append("🏆 Enthusiast: Added 25 books to favorites!")
-
-            if favorites_count >= 50:
-                achievement, _ = Achievement.objects.get_or_create(
-                    name="Book Lover",
-                    defaults={
-                        "description": "Added 50 books to favorites",
-                        "points": 50
-                    }
-                )
-                user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-                if created:
-                    award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                    achievement_messages.append("🏆 Book Lover: Added 50 books to favorites!")
-
-            gamification_data = {
-                "notification": {
-                    "show": True,
-                    "message": "Book added to favorites!",
-                    "points": 2,
-                    "type": "success"
-                },
-                "achievements": achievement_messages
-            }
+            gamification_data = _gamification_data(outbox.dispatch(event), "Book added to favorites!", 2)
 
             return Response({
                 'message': 'Book added to favorites',
@@ -718,10 +701,7 @@ def remove_favorite(request):
     try:
         book = Book.objects.get(google_books_id=book_id)
         favorites_readlist = Readlist.objects.get(user=user, is_favorites=True)
-        readlist_book = ReadlistBook.objects.filter(readlist=favorites_readlist, book=book)
-
-        if readlist_book.exists():
-            readlist_book.delete()
+        if remove_book(favorites_readlist, book):
 
             gamification_data = {
                 "notification": {
@@ -765,90 +745,14 @@ def verify_token(request):
 
 @api_view(['GET'])
 def get_bestsellers(request):
+    """Serve the stored bestseller snapshot kept fresh by `manage.py refresh_bestsellers`"""
     try:
-        params = {
-            'api-key': settings.NYT_API_KEY
-        }
-        
-        response = requests.get(settings.NYT_BESTSELLERS_URL, params=params)
-        
-        if response.status_code == 200:
-            data = response.json()
-            books = []
-            
-            for book in data['results']['books']:
-                # First try using primary_isbn13 or primary_isbn10 for a precise match
-                isbn = book.get('primary_isbn13') or book.get('primary_isbn10')
-                google_book_info = {}
-                
-                if isbn:
-                    google_url = f"https://www.googleapis.com/books/v1/volumes?q=isbn:{isbn}&key={GOOGLE_BOOKS_API_KEY}"
-                    google_response = requests.get(google_url)
-                    google_data = google_response.json()
-                    
-                    if google_response.status_code == 200 and google_data.get('items'):
-                        volume_info = google_data['items'][0]['volumeInfo']
-                        google_book_info = {
-                            'google_books_id': google_data['items'][0]['id'],
-                            'description': volume_info.get('description', ''),
-                            'categories': volume_info.get('categories', []),
-                            'image': volume_info.get('imageLinks', {}).get('thumbnail', ''),
-                            'year': volume_info.get('publishedDate', 'N/A')[:4] if volume_info.get('publishedDate') else 'N/A'
-                        }
-                
-                # Fallback to title+author search only if ISBN search failed or no ISBN
-                if not google_book_info:
-                    google_query = f"{book['title']} {book['author']}"
-                    google_url = f"https://www.googleapis.com/books/v1/volumes?q={google_query}&key={GOOGLE_BOOKS_API_KEY}"
-                    google_response = requests.get(google_url)
-                    google_data = google_response.json()
-                    
-                    if google_response.status_code == 200 and google_data.get('items'):
-                        volume_info = google_data['items'][0]['volumeInfo']
-                        google_book_info = {
-                            'google_books_id': google_data['items'][0]['id'],
-                            'description': volume_info.get('description', ''),
-                            'categories': volume_info.get('categories', []),
-                            'image': volume_info.get('imageLinks', {}).get('thumbnail', ''),
-                            'year': volume_info.get('publishedDate', 'N/A')[:4] if volume_info.get('publishedDate') else 'N/A'
-                        }
-
-                # Use NYT image if Google Books doesn't have one or has an invalid one
-                book_image = book['book_image']
-                if google_book_info.get('image'):
-                    # Validate Google image URL before using it
-                    google_image = google_book_info['image']
-                    if google_image and len(google_image) > 10:  # Basic validation
-                        book_image = google_image
-
-                # Ensure all image URLs use https
-                if book_image and book_image.startswith('http:'):
-                    book_image = book_image.replace('http:', 'https:')
-
-                books.append({
-                    'rank': book['rank'],
-                    'title': book['title'],
-                    'author': book['author'],
-                    'description': google_book_info.get('description', book['description']),
-                    'google_books_id': google_book_info.get('google_books_id', ''),
-                    'genre': ', '.join(google_book_info.get('categories', [])),
-                    'image': book_image,
-                    'year': google_book_info.get('year', ''),
-                    'amazon_link': book['amazon_product_url'],
-                    'weeks_on_list': book['weeks_on_list']
-                })
-            
-            return Response({
-                'status': 'success',
-                'books': books,
-                'list_update_date': data['results']['updated']
-            })
-        else:
-            return Response({
-                'status': 'error',
-                'message': 'Failed to fetch bestsellers'
-            }, status=status.HTTP_500_INTERNAL_SERVER_ERROR)
-            
+        payload = latest_bestsellers()
+        return Response({
+            'status': 'success',
+            'books': payload['books'],
+            'list_update_date': payload['list_update_date']
+        })
     except Exception as e:
         return Response({
             'status': 'error',
@@ -878,129 +782,70 @@ def update_book_status(request, google_books_id):
     if new_status not in dict(UserBookStatus.STATUS_CHOICES).keys():
         return Response({"error": "Invalid status"}, status=status.HTTP_400_BAD_REQUEST)
 
-    # Get or create the book object
-    # ... (existing book creation/retrieval logic remains the same) ...
-    url = f"https://www.googleapis.com/books/v1/volumes/{google_books_id}?key={GOOGLE_BOOKS_API_KEY}"
-    response = requests.get(url)
-    if response.status_code != 200:
-        return Response(
-            {"error": "Book not found in Google Books API"},
-            status=status.HTTP_404_NOT_FOUND
-        )
-
-    book_data = response.json()
-    volume_info = book_data.get('volumeInfo', {})
-    if not volume_info:
-        return Response(
-            {"error": "No book data found in Google Books API response"},
-            status=status.HTTP_404_NOT_FOUND
-        )
+    # Only go to Google Books when the saved metadata is missing or stale
+    book = Book.objects.filter(google_books_id=google_books_id).first()
+    if book is not None and not is_fresh(book) and settings.BOOK_METADATA_ASYNC_REFRESH:
+        refresh_in_background(google_books_id)
+    elif book is None or not is_fresh(book):
+        try:
+            response = upstream.google_books_get(google_books_id)
+        except requests.RequestException:
+            return Response(
+                {"error": "Error contacting Google Books API"},
+                status=status.HTTP_502_BAD_GATEWAY
+            )
+        if response.status_code != 200:
+            return Response(
+                {"error": "Book not found in Google Books API"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-    title = volume_info.get('title', 'No Title')
-    authors = volume_info.get('authors', ['Unknown Author'])
-    description = volume_info.get('description', 'No Description')
-    categories = volume_info.get('categories', ['Unknown Genre'])
-    image_links = volume_info.get('imageLinks', {})
-    published_date = volume_info.get('publishedDate', '')
+        book_data = response.json()
+        volume_info = book_data.get('volumeInfo', {})
+        if not volume_info:
+            return Response(
+                {"error": "No book data found in Google Books API response"},
+                status=status.HTTP_404_NOT_FOUND
+            )
 
-    book, _ = Book.objects.update_or_create(
-        google_books_id=google_books_id,
-        defaults={
-            'title': title,
-            'author': ', '.join(authors),
-            'description': description,
-            'genre': ', '.join(categories),
-            'image': image_links.get('thumbnail', ''),
-            'year': published_date[:4] if published_date else 'N/A'
-        }
-    )
+        book = save_volume(google_books_id, volume_info)
     # --- End book creation/retrieval ---
 
-    # Get or create the UserBookStatus record
-    user_book_status, created = UserBookStatus.objects.get_or_create(
-        user=user,
-        book=book,
-        defaults={'status': new_status, 'finished_points_awarded': False} # Ensure default for flag
-    )
+    # The status, its counter and the event that awards points and updates
+    # 'Done Reading' are written together, from a locked read of the current
+    # status so parallel updates cannot both count or award the same finish
+    with transaction.atomic():
+        user_book_status, created = UserBookStatus.objects.get_or_create(
+            user=user,
+            book=book,
+            defaults={'status': new_status, 'finished_points_awarded': False} # Ensure default for flag
+        )
+        if not created:
+            user_book_status = UserBookStatus.objects.select_for_update().get(id=user_book_status.id)
 
-    # Update status regardless of points logic
-    user_book_status.status = new_status
+        # Update status regardless of points logic
+        was_finished = not created and user_book_status.status == 'FINISHED'
+        user_book_status.status = new_status
+
+        # Points are awarded ONLY when changing to FINISHED for the first time
+        award_finished = new_status == 'FINISHED' and not user_book_status.finished_points_awarded
+        user_book_status.finished_points_awarded = user_book_status.finished_points_awarded or award_finished
+
+        user_book_status.save()
+        counters.bump(user, books_finished=int(new_status == 'FINISHED') - int(was_finished))
+        event = outbox.record(user, outbox.BOOK_STATUS_CHANGED, book_id=book.id, award_finished=award_finished)
+    outcome = outbox.dispatch(event)
 
-    # --- Start Points Logic --- 
-    gamification_data = {}
     response_data = {}
-    
-    # Award points ONLY if changing to FINISHED and points haven't been awarded before
-    if new_status == 'FINISHED' and not user_book_status.finished_points_awarded:
-        # Award base points
-        award_points(user, 10, f"Finished reading: {book.title}")
-        
-        # Check for achievements
-        finished_books_count = UserBookStatus.objects.filter(user=user, status='FINISHED').count()
-        achievement_messages = []
-        total_achievement_points = 0
-        
-        # Beginner Reader (3 books)
-        if finished_books_count == 3:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Beginner Reader",
-                defaults={"description": "Finished reading 3 books", "points": 15}
-            )
-            user_achievement, created_ua = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created_ua:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append(f"🏆 {achievement.name}: {achievement.description}!")
-                total_achievement_points += achievement.points
-        
-        # Avid Reader (10 books)
-        if finished_books_count == 10:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Avid Reader",
-                defaults={"description": "Finished reading 10 books", "points": 30}
-            )
-            user_achievement, created_ua = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created_ua:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append(f"🏆 {achievement.name}: {achievement.description}!")
-                total_achievement_points += achievement.points
-        
-        # Bookworm (25 books)
-        if finished_books_count == 25:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Bookworm",
-                defaults={"description": "Finished reading 25 books", "points": 75}
-            )
-            user_achievement, created_ua = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created_ua:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append(f"🏆 {achievement.name}: {achievement.description}!")
-                total_achievement_points += achievement.points
-
-        # Mark points as awarded for this UserBookStatus
-        user_book_status.finished_points_awarded = True
-        
-        # Prepare gamification data for response
-        gamification_data['points_earned'] = 10 + total_achievement_points
-        if achievement_messages:
-            gamification_data['achievements_unlocked'] = achievement_messages
+    if award_finished:
+        gamification_data = {'points_earned': 10 if outcome['pending'] else outcome['points']}
+        if outcome['achievements']:
+            gamification_data['achievements_unlocked'] = outcome['achievements']
+        if outcome['pending']:
+            gamification_data['pending'] = True
+            gamification_data['event_id'] = event.id
         response_data['gamification'] = gamification_data
-    # --- End Points Logic ---
-
-    # Save the UserBookStatus object with updated status and potentially the flag
-    user_book_status.save()
 
-    # Add/Remove from 'Done Reading' Readlist
-    if new_status == 'FINISHED':
-        done_reading, _ = Readlist.objects.get_or_create(
-            user=user, name="Done Reading", defaults={"is_favorites": False}
-        )
-        ReadlistBook.objects.get_or_create(readlist=done_reading, book=book)
-    else:
-        # If status is NOT 'FINISHED', remove from 'Done Reading' list if it exists
-        done_reading = Readlist.objects.filter(user=user, name="Done Reading").first()
-        if done_reading:
-            ReadlistBook.objects.filter(readlist=done_reading, book=book).delete()
-    
     # Final response preparation
     response_data['status'] = user_book_status.status
     
@@ -1056,10 +901,14 @@ def follow_user(request):
             })
             
         # Create the follow relationship
-        follow = UserFollow.objects.create(
-            follower=request.user,
-            followed=user_to_follow
-        )
+        with transaction.atomic():
+            follow = UserFollow.objects.create(
+                follower=request.user,
+                followed=user_to_follow
+            )
+            counters.bump(request.user, following=1)
+            counters.bump(user_to_follow, followers=1)
+        leaderboard.invalidate_following([request.user.id])
         print(f"Created follow relationship: {follow.id}")
             
         return Response({
@@ -1096,8 +945,11 @@ def unfollow_user(request):
         )
         
         if follow.exists():
-            follow_count = follow.count()
-            follow.delete()
+            with transaction.atomic():
+                follow_count, _ = follow.delete()
+                counters.bump(request.user, following=-follow_count)
+                counters.bump(user_to_unfollow, followers=-follow_count)
+            leaderboard.invalidate_following([request.user.id])
             print(f"Deleted {follow_count} follow relationship(s)")
             return Response({
                 'message': f'Unfollowed {username}',
@@ -1209,8 +1061,9 @@ def get_user_profile(request, username):
             print(f"Created new profile for user {username}")
         
         # Count followers and following
-        followers_count = UserFollow.objects.filter(followed=user).count()
-        following_count = UserFollow.objects.filter(follower=user).count()
+        user_counters = counters.get(user)
+        followers_count = user_counters.followers
+        following_count = user_counters.following
         print(f"Followers: {followers_count}, Following: {following_count}")
         
         # Get recent reviews by the user
@@ -1250,8 +1103,8 @@ def get_user_profile(request, username):
             print(f"No points data found for user {username}, using defaults")
         
         # Get user statistics for the profile
-        books_read = UserBookStatus.objects.filter(user=user, status='FINISHED').count()
-        reviews_written = Review.objects.filter(user=user).count()
+        books_read = user_counters.books_finished
+        reviews_written = user_counters.reviews + user_counters.replies
             
         # Prepare response data
         response_data = {
@@ -1308,6 +1161,18 @@ def search_users(request):
     return Response(results)
 
 # Readlist views
+READLIST_BOOK_FIELDS = {
+    'summary': ("id", "google_books_id", "title", "author", "genre", "year", "image"),
+    'full': ("id", "google_books_id", "title", "author", "genre", "year", "image", "description"),
+}
+
+def _book_fields(projection, default):
+    """Book fields for a books=summary|full query param, or None if it is not recognised"""
+    return READLIST_BOOK_FIELDS.get(projection or default)
+
+def _readlist_book_data(book, fields):
+    return {field: getattr(book, field) for field in fields}
+
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_readlists(request):
@@ -1319,6 +1184,7 @@ def get_readlists(request):
 
     # Fetch all readlists, ensuring "Favorites" is included
     readlists = Readlist.objects.filter(user=user).order_by("is_favorites")  # Ensures "Favorites" appears first
+    readlists = readlists.prefetch_related(readlist_books_prefetch())
     serializer = ReadlistSerializer(readlists, many=True)
     return Response(serializer.data)
 
@@ -1330,6 +1196,7 @@ def create_readlist(request):
         return Response({"error": "Readlist name is required"}, status=status.HTTP_400_BAD_REQUEST)
 
     readlist, created = Readlist.objects.get_or_create(user=request.user, name=name, defaults={"is_favorites": False})
+    prefetch_related_objects([readlist], readlist_books_prefetch())
     return Response(ReadlistSerializer(readlist).data, status=status.HTTP_201_CREATED)
 
 @api_view(['DELETE'])
@@ -1341,7 +1208,9 @@ def delete_readlist(request, readlist_id):
         if readlist.is_favorites or readlist.name == "Done Reading":
             return Response({"error": "This readlist cannot be deleted."}, status=status.HTTP_403_FORBIDDEN)
 
-        readlist.delete()
+        with transaction.atomic():
+            readlist.delete()
+            counters.refresh([readlist.user_id], MEMBERSHIP_COUNTERS)
         return Response({"message": "Readlist deleted"}, status=status.HTTP_204_NO_CONTENT)
 
     except Readlist.DoesNotExist:
@@ -1393,8 +1262,9 @@ def get_user_points(request):
     )
     
     # Get user statistics for the profile
-    books_read = UserBookStatus.objects.filter(user=user, status='FINISHED').count()
-    reviews_written = Review.objects.filter(user=user).count()
+    user_counters = counters.get(user)
+    books_read = user_counters.books_finished
+    reviews_written = user_counters.reviews + user_counters.replies
     
     response_data = {
         'total_points': user_points.total_points,
@@ -1408,44 +1278,58 @@ def get_user_points(request):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_points_history(request):
-    """Get the history of points earned by the current user"""
+    """Get the points earned by the current user, newest first and a page at a time.
+
+    ``rollup=day`` or ``rollup=week`` returns point totals per period instead
+    of individual awards.
+    """
     user = request.user
-    history = PointsHistory.objects.filter(user=user).order_by('-timestamp')
-    
+    period = request.GET.get('rollup')
+    cursor = request.GET.get('cursor')
+
+    if period:
+        if period not in points_history.PERIODS:
+            return Response({'error': 'rollup must be "day" or "week".'}, status=status.HTTP_400_BAD_REQUEST)
+        limit = parse_limit(
+            request.GET.get('limit'), settings.POINTS_ROLLUP_PAGE_SIZE, settings.POINTS_ROLLUP_MAX_PAGE_SIZE
+        )
+        try:
+            before = date.fromisoformat(decode_cursor(cursor, str)[0]) if cursor else None
+        except (InvalidCursor, ValueError):
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        totals, last = points_history.rollup(user, period, limit, before)
+        return with_next_cursor(Response(totals), encode_cursor(last.isoformat()) if last else None)
+
+    limit = parse_limit(
+        request.GET.get('limit'), settings.POINTS_HISTORY_PAGE_SIZE, settings.POINTS_HISTORY_MAX_PAGE_SIZE
+    )
+    try:
+        after = decode_cursor(cursor, datetime, int) if cursor else None
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    history, last = points_history.page(user, limit, after)
     history_data = [{
         'amount': entry.amount,
         'description': entry.description,
         'timestamp': entry.timestamp
     } for entry in history]
-    
-    return Response(history_data)
 
-# Helper function to award points to a user
-def award_points(user, amount, description):
-    """Award points to a user and update their level"""
-    user_points, created = UserPoints.objects.get_or_create(
-        user=user,
-        defaults={'total_points': 0, 'level': 1}
-    )
-    
-    # Add points
-    user_points.total_points += amount
-    
-    # Update level (1 level per 100 points)
-    new_level = (user_points.total_points // 100) + 1
-    if new_level > user_points.level:
-        user_points.level = new_level
-    
-    user_points.save()
-    
-    # Record in history
-    PointsHistory.objects.create(
-        user=user,
-        amount=amount,
-        description=description
-    )
-    
-    return user_points
+    return with_next_cursor(Response(history_data), encode_cursor(*last) if last else None)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_gamification_event(request, event_id):
+    """Report whether a queued gamification event has been applied and what it awarded"""
+    event = get_object_or_404(GamificationEvent, id=event_id, user=request.user)
+    result = event.result or {}
+    return Response({
+        'event_id': event.id,
+        'pending': event.processed_at is None,
+        'achievements': result.get('achievements', []),
+        'points': result.get('points')
+    })
 
 @api_view(['GET'])
 def get_challenges(request):
@@ -1632,56 +1516,45 @@ def get_reading_streak(request):
 # Leaderboard view
 @api_view(['GET'])
 def get_leaderboard(request):
-    """Get the top users sorted by points"""
-    top_users = UserPoints.objects.select_related('user').order_by('-total_points')[:10]
-    
-    leaderboard_data = [{
-        'username': entry.user.username,
-        'level': entry.level,
-        'total_points': entry.total_points,
-        # Count achievements
-        'achievements': UserAchievement.objects.filter(user=entry.user).count()
-    } for entry in top_users]
-    
-    return Response(leaderboard_data)
+    """Get users sorted by points, a page at a time (top 10 by default)"""
+    limit = parse_limit(request.GET.get('limit'), settings.LEADERBOARD_PAGE_SIZE, settings.LEADERBOARD_MAX_PAGE_SIZE)
+    cursor = request.GET.get('cursor')
+    try:
+        after = decode_cursor(cursor, int, int, int, int) if cursor else None
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
 
-# Process achievement for finishing a book
-def process_finished_book_achievements(user):
-    """Check and award achievements related to finishing books"""
-    # Count finished books
-    finished_books_count = UserBookStatus.objects.filter(user=user, status='FINISHED').count()
-    
-    # Define achievement thresholds
-    achievement_thresholds = [
-        (1, "First Book", "Finished reading your first book", 10),
-        (5, "Bookworm", "Finished reading 5 books", 20),
-        (10, "Book Enthusiast", "Finished reading 10 books", 30),
-        (25, "Bibliophile", "Finished reading 25 books", 50),
-        (50, "Book Master", "Finished reading 50 books", 100),
-        (100, "Literary Legend", "Finished reading 100 books", 200)
-    ]
-    
-    # Check each threshold and award achievements
-    for count, name, description, points in achievement_thresholds:
-        if finished_books_count >= count:
-            # Try to get the achievement or create it if it doesn’t exist
-            achievement, created = Achievement.objects.get_or_create(
-                name=name,
-                defaults={
-                    'description': description,
-                    'points': points
-                }
-            )
-            
-            # Award the achievement if the user doesn’t have it yet
-            user_achievement, achievement_created = UserAchievement.objects.get_or_create(
-                user=user,
-                achievement=achievement
-            )
-            
-            # If this is a new achievement for the user, award points
-            if achievement_created:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
+    entries, last = leaderboard.top(limit, after)
+    return with_next_cursor(Response(entries), encode_cursor(*last) if last else None)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_following_leaderboard(request):
+    """Get the current user and the people they follow sorted by points, a page at a time"""
+    limit = parse_limit(request.GET.get('limit'), settings.LEADERBOARD_PAGE_SIZE, settings.LEADERBOARD_MAX_PAGE_SIZE)
+    cursor = request.GET.get('cursor')
+    try:
+        after = decode_cursor(cursor, int, int, int, int) if cursor else None
+    except InvalidCursor:
+        return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+    entries, last = leaderboard.following_top(request.user.id, limit, after)
+    return with_next_cursor(Response(entries), encode_cursor(*last) if last else None)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def get_leaderboard_around_me(request):
+    """Get the current user's rank with the readers just above and below them"""
+    neighbours = parse_limit(
+        request.GET.get('neighbours'), settings.LEADERBOARD_NEIGHBOURS, settings.LEADERBOARD_MAX_NEIGHBOURS, minimum=0
+    )
+    user_points = UserPoints.objects.select_related('user').filter(user=request.user).first()
+    if user_points is None:
+        # Users without points are not on the leaderboard yet
+        return Response({'rank': None, 'entries': []})
+
+    rank, entries = leaderboard.around(user_points, neighbours)
+    return Response({'rank': rank, 'entries': entries})
 
 # Initialize challenges (admin function)
 @api_view(['POST'])
@@ -1762,112 +1635,54 @@ def update_readlist_books(request):
     user = request.user
     newly_added_readlists = []
 
-    # Handle ReadlistBook relationships
-    for readlist in Readlist.objects.filter(user=request.user):
-        if readlist.id in readlist_ids:
-            if readlist.name == "Done Reading":
-                # Block manual adding to Done Reading
-                continue
-            obj, created = ReadlistBook.objects.get_or_create(readlist=readlist, book=book)
-            if created:
-                newly_added_readlists.append(readlist.name)
-                if readlist.is_favorites:
-                    added_to_favorites = True
-                else:
-                    added_to_regular_readlist = True
+    # Load the user's readlists with whether each already holds the book, then apply the difference
+    readlists = {
+        readlist.id: readlist
+        for readlist in Readlist.objects.filter(user=user).annotate(
+            has_book=Exists(ReadlistBook.objects.filter(readlist=OuterRef('pk'), book=book))
+        )
+    }
+    current_ids = {readlist_id for readlist_id, readlist in readlists.items() if readlist.has_book}
+    # Done Reading is managed through the book status, not manually
+    editable_ids = {readlist_id for readlist_id, readlist in readlists.items() if readlist.name != "Done Reading"}
+    wanted_ids = editable_ids & set(readlist_ids)
+
+    added_ids = wanted_ids - current_ids
+    removed_ids = (current_ids & editable_ids) - wanted_ids
+
+    for readlist_id in added_ids:
+        readlist = readlists[readlist_id]
+        newly_added_readlists.append(readlist.name)
+        if readlist.is_favorites:
+            added_to_favorites = True
         else:
-            if readlist.name != "Done Reading" :
-                ReadlistBook.objects.filter(readlist=readlist, book=book).delete()
+            added_to_regular_readlist = True
 
-    # Handle gamification logic
-    achievement_messages = []
-    points_awarded = 0
+    # 1 point per regular readlist and 2 for favorites
+    regular_readlists_count = len([name for name in newly_added_readlists if name != "Favorites"])
+    points_awarded = regular_readlists_count + (2 if added_to_favorites else 0)
     notification_message = ""
-    
-    # Award points for regular readlists (1 point each)
-    if added_to_regular_readlist:
-        # Count the number of new regular readlists (non-favorites) the book was added to
-        regular_readlists_count = len([name for name in newly_added_readlists if name != "Favorites"])
-        if regular_readlists_count > 0:
-            readlists_points = regular_readlists_count
-            award_points(user, readlists_points, f"Added '{book.title}' to {regular_readlists_count} readlist(s)")
-            points_awarded += readlists_points
-            notification_message += f"Book added to {regular_readlists_count} readlist(s)! +{readlists_points} points. "
-            
-            # Achievement for adding books to multiple readlists
-            total_readlist_additions = ReadlistBook.objects.filter(readlist__user=user, readlist__is_favorites=False).count()
-            if total_readlist_additions == 20:
-                achievement, _ = Achievement.objects.get_or_create(
-                    name="Organized Reader",
-                    defaults={
-                        "description": "Added 20 books to readlists",
-                        "points": 25
-                    }
-                )
-                user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-                if created:
-                    award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                    achievement_messages.append("🏆 Organized Reader: Added 20 books to readlists!")
-    
-    # Award points for favorites (2 points each)
+    if added_to_regular_readlist and regular_readlists_count > 0:
+        notification_message += (
+            f"Book added to {regular_readlists_count} readlist(s)! +{regular_readlists_count} points. "
+        )
     if added_to_favorites:
-        award_points(user, 2, "Added a book to favorites")
-        points_awarded += 2
         notification_message += "Book added to favorites! +2 points"
 
-        # Check for favorites achievements
-        favorites_readlist = Readlist.objects.get(user=user, is_favorites=True)
-        favorites_count = favorites_readlist.books.count()
-
-        if favorites_count == 5:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Collector",
-                defaults={
-                    "description": "Added 5 books to favorites",
-                    "points": 10
-                }
+    event = None
+    with transaction.atomic():
+        add_to_readlists(book, [readlists[readlist_id] for readlist_id in added_ids])
+        remove_from_readlists(book, [readlists[readlist_id] for readlist_id in removed_ids])
+        if points_awarded > 0:
+            event = outbox.record(
+                user, outbox.READLIST_BOOKS_ADDED,
+                title=book.title, readlists=regular_readlists_count, favorite=added_to_favorites
             )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Collector: Added 5 books to favorites!")
-        elif favorites_count == 25:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Enthusiast",
-                defaults={
-                    "description": "Added 25 books to favorites",
-                    "points": 25
-                }
-            )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Enthusiast: Added 25 books to favorites!")
-        elif favorites_count == 50:
-            achievement, _ = Achievement.objects.get_or_create(
-                name="Book Lover",
-                defaults={
-                    "description": "Added 50 books to favorites",
-                    "points": 50
-                }
-            )
-            user_achievement, created = UserAchievement.objects.get_or_create(user=user, achievement=achievement)
-            if created:
-                award_points(user, achievement.points, f"Earned achievement: {achievement.name}")
-                achievement_messages.append("🏆 Book Lover: Added 50 books to favorites!")
 
     # Prepare gamification data if any points were awarded
     gamification_data = {}
-    if points_awarded > 0:
-        gamification_data = {
-            "notification": {
-                "show": True,
-                "message": notification_message,
-                "points": points_awarded,
-                "type": "success"
-            },
-            "achievements": achievement_messages
-        }
+    if event:
+        gamification_data = _gamification_data(outbox.dispatch(event), notification_message, points_awarded)
 
     return Response({
         "message": "Book readlist associations updated",
@@ -1911,33 +1726,50 @@ def get_readlist_books(request, readlist_id):
 @api_view(['GET'])
 @permission_classes([IsAuthenticated])
 def get_shared_readlists(request):
-    """Retrieve all readlists shared with the current user."""
+    """Retrieve all readlists shared with the current user.
+
+    Query params: books=full|summary (summary leaves out descriptions), and optionally limit
+    and cursor to page through the readlists; the next page's cursor is returned in the
+    X-Next-Cursor header.
+    """
     user = request.user
-    shared_readlists = Readlist.objects.filter(shared_with=user)
+    book_fields = _book_fields(request.GET.get('books'), default='full')
+    if book_fields is None:
+        return Response({'error': 'books must be "summary" or "full".'}, status=status.HTTP_400_BAD_REQUEST)
+
+    shared_readlists = Readlist.objects.filter(shared_with=user).select_related('user').order_by('id').prefetch_related(
+        Prefetch(
+            'readlist_books',
+            queryset=ReadlistBook.objects.select_related('book').only(
+                'readlist_id', 'order', *[f'book__{field}' for field in book_fields]
+            ).order_by('order', 'id')
+        )
+    )
+
+    next_cursor = None
+    if request.GET.get('limit') or request.GET.get('cursor'):
+        limit = parse_limit(request.GET.get('limit'), settings.READLISTS_PAGE_SIZE, settings.READLISTS_MAX_PAGE_SIZE)
+        try:
+            if request.GET.get('cursor'):
+                shared_readlists = shared_readlists.filter(id__gt=decode_cursor(request.GET['cursor'], int)[0])
+        except InvalidCursor:
+            return Response({'error': 'Invalid cursor.'}, status=status.HTTP_400_BAD_REQUEST)
+
+        shared_readlists = list(shared_readlists[:limit + 1])
+        next_cursor = encode_cursor(shared_readlists[limit - 1].id) if len(shared_readlists) > limit else None
+        shared_readlists = shared_readlists[:limit]
 
     readlist_data = [
         {
             "id": readlist.id,
             "name": readlist.name,
             "owner": readlist.user.username,
-            "books": [
-                {
-                    "id": book.id,
-                    "google_books_id": book.google_books_id,
-                    "title": book.title,
-                    "author": book.author,
-                    "genre": book.genre,
-                    "year": book.year,
-                    "image": book.image,
-                    "description": book.description,
-                }
-                for book in readlist.books.all()
-            ],
+            "books": [_readlist_book_data(rb.book, book_fields) for rb in readlist.readlist_books.all()],
         }
         for readlist in shared_readlists
     ]
 
-    return Response(readlist_data, status=status.HTTP_200_OK)
+    return with_next_cursor(Response(readlist_data, status=status.HTTP_200_OK), next_cursor)
 
     
 @api_view(['POST'])
@@ -2025,33 +1857,47 @@ def readlist_detail(request, readlist_id):
         readlist = Readlist.objects.filter(
             Q(user=user) | Q(shared_with=user),
             id=readlist_id
-        ).first()
+        ).select_related('user').first()
 
         if not readlist:
             return Response({"error": "Readlist not found or access denied"}, status=404)
 
         if request.method == 'GET':
-            books = readlist.books.all().order_by('readlistbook__order')
-            book_data = [
-                {
-                    "id": book.id,
-                    "google_books_id": book.google_books_id,
-                    "title": book.title,
-                    "author": book.author,
-                    "genre": book.genre,
-                    "year": book.year,
-                    "image": book.image,
-                    "description": book.description,
-                }
-                for book in books
-            ]
-            return Response({"name": readlist.name, "owner": readlist.user.username, "books": book_data})
+            # Pages of books in (order, id) order; the next page's cursor is in the X-Next-Cursor header
+            book_fields = _book_fields(request.GET.get('books'), default='summary')
+            if book_fields is None:
+                return Response({"error": 'books must be "summary" or "full".'}, status=400)
+            limit = parse_limit(
+                request.GET.get('limit'), settings.READLIST_BOOKS_PAGE_SIZE, settings.READLIST_BOOKS_MAX_PAGE_SIZE
+            )
+
+            rows = ReadlistBook.objects.filter(readlist=readlist).select_related('book').only(
+                'order', *[f'book__{field}' for field in book_fields]
+            ).order_by('order', 'id')
+            if request.GET.get('cursor'):
+                try:
+                    order, row_id = decode_cursor(request.GET['cursor'], float, int)
+                except InvalidCursor:
+                    return Response({"error": "Invalid cursor."}, status=400)
+                rows = rows.filter(Q(order__gt=order) | Q(order=order, id__gt=row_id))
+
+            page = list(rows[:limit + 1])
+            next_cursor = encode_cursor(page[limit - 1].order, page[limit - 1].id) if len(page) > limit else None
+            book_data = [_readlist_book_data(rb.book, book_fields) for rb in page[:limit]]
+            return with_next_cursor(Response({
+                "name": readlist.name,
+                "owner": readlist.user.username,
+                "total_books": readlist.book_count,
+                "books": book_data
+            }), next_cursor)
 
         elif request.method == 'DELETE':
             if readlist.is_favorites:
                 return Response({"error": "Favorites readlist cannot be deleted."}, status=403)
 
-            readlist.delete()
+            with transaction.atomic():
+                readlist.delete()
+                counters.refresh([readlist.user_id], MEMBERSHIP_COUNTERS)
             return Response({"message": "Readlist deleted"}, status=204)
 
     except Exception as e:
@@ -2063,14 +1909,51 @@ def reorder_books_in_readlist(request):
     readlist_id = request.data.get('readlist_id')
     ordered_ids = request.data.get('ordered_book_ids')
 
+    if not isinstance(ordered_ids, list):
+        return Response({"error": "ordered_book_ids must be a list"}, status=status.HTTP_400_BAD_REQUEST)
+
     readlist = get_object_or_404(Readlist, id=readlist_id, user=request.user)
-    for idx, book_id in enumerate(ordered_ids):
-        ReadlistBook.objects.filter(
-            readlist=readlist, book__google_books_id=book_id
-        ).update(order=idx)
+    with transaction.atomic():
+        # Resolve every google_books_id to its ReadlistBook row in one query
+        row_ids = dict(
+            ReadlistBook.objects.select_for_update()
+            .filter(readlist=readlist)
+            .values_list('book__google_books_id', 'id')
+        )
+        if len(ordered_ids) != len(row_ids) or set(ordered_ids) != set(row_ids):
+            return Response(
+                {"error": "ordered_book_ids must list every book in the readlist exactly once"},
+                status=status.HTTP_400_BAD_REQUEST
+            )
+
+        ReadlistBook.objects.bulk_update(
+            [
+                ReadlistBook(id=row_ids[book_id], order=readlist_order.position_key(idx))
+                for idx, book_id in enumerate(ordered_ids)
+            ],
+            ['order']
+        )
 
     return Response({"message": "Order updated."})
 
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def move_book_in_readlist(request):
+    """Move one book between its new neighbours, given as after_book_id and/or before_book_id"""
+    book_id = request.data.get('book_id')
+    if not book_id:
+        return Response({"error": "book_id is required"}, status=status.HTTP_400_BAD_REQUEST)
+
+    readlist = get_object_or_404(Readlist, id=request.data.get('readlist_id'), user=request.user)
+    try:
+        order = readlist_order.move_book(
+            readlist, book_id, request.data.get('after_book_id'), request.data.get('before_book_id')
+        )
+    except readlist_order.MoveError as e:
+        return Response({"error": str(e)}, status=status.HTTP_400_BAD_REQUEST)
+
+    return Response({"message": "Book moved.", "order": order})
+
 @api_view(['DELETE'])
 @permission_classes([IsAuthenticated])
 def remove_book_from_readlist(request):
@@ -2083,13 +1966,59 @@ def remove_book_from_readlist(request):
     try:
         readlist = Readlist.objects.get(id=readlist_id, user=request.user)
         book = Book.objects.get(google_books_id=book_id)
-        rb = ReadlistBook.objects.filter(readlist=readlist, book=book)
-        if rb.exists():
-            rb.delete()
+        if remove_book(readlist, book):
             return Response({"message": "Book removed from readlist"}, status=200)
         else:
             return Response({"error": "Book not in this readlist"}, status=404)
     except Readlist.DoesNotExist:
         return Response({"error": "Readlist not found"}, status=404)
     except Book.DoesNotExist:
-        return Response({"error": "Book not found"}, status=404)
\ No newline at end of file
+        return Response({"error": "Book not found"}, status=404)
+
+@api_view(['GET'])
+@permission_classes([IsAuthenticated])
+def export_readlist(request, readlist_id, export_format):
+    """Stream a readlist's books as CSV or JSON Lines"""
+    if export_format not in readlist_io.EXPORT_FORMATS:
+        return Response({"error": "Export format must be csv or jsonl"}, status=400)
+
+    readlist = Readlist.objects.filter(
+        Q(user=request.user) | Q(shared_with=request.user),
+        id=readlist_id
+    ).first()
+    if not readlist:
+        return Response({"error": "Readlist not found or access denied"}, status=404)
+
+    response = StreamingHttpResponse(
+        readlist_io.export_lines(readlist, export_format),
+        content_type=readlist_io.EXPORT_FORMATS[export_format]
+    )
+    response['Content-Disposition'] = f'attachment; filename="readlist-{readlist.id}.{export_format}"'
+    return response
+
+@api_view(['POST'])
+@permission_classes([IsAuthenticated])
+def import_readlist(request, readlist_id):
+    """Add the books of an uploaded CSV or JSON Lines file (`file`) to a readlist.
+
+    The file type comes from `file_type` or the file name's extension.
+    """
+    readlist = get_object_or_404(Readlist, id=readlist_id, user=request.user)
+    if readlist.name == "Done Reading":
+        return Response({"error": "Books cannot be imported into Done Reading"}, status=400)
+
+    upload = request.FILES.get('file')
+    if upload is None:
+        return Response({"error": "file is required"}, status=400)
+    import_format = request.data.get('file_type') or upload.name.rsplit('.', 1)[-1].lower()
+    if import_format not in readlist_io.EXPORT_FORMATS:
+        return Response({"error": "File type must be csv or jsonl"}, status=400)
+
+    try:
+        books = readlist_io.parse_rows(upload, import_format)
+        added = readlist_io.import_books(readlist, books)
+    except readlist_io.ImportFormatError as e:
+        return Response({"error": str(e)}, status=400)
+
+    return Response({"message": "Readlist imported", "books": len(books), "added": added})
+
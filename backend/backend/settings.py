@@ -28,6 +28,86 @@ SECRET_KEY = os.getenv('SECRET_KEY')
 GOOGLE_BOOKS_API_KEY = os.getenv('GOOGLE_BOOKS_API_KEY')
 NYT_API_KEY = os.getenv('NYT_API_KEY')
 NYT_BESTSELLERS_URL = 'https://api.nytimes.com/svc/books/v3/lists/current/hardcover-fiction.json'
+
+# Shared upstream HTTP client (timeouts in seconds)
+UPSTREAM_CONNECT_TIMEOUT = float(os.getenv('UPSTREAM_CONNECT_TIMEOUT', '3.05'))
+UPSTREAM_READ_TIMEOUT = float(os.getenv('UPSTREAM_READ_TIMEOUT', '10'))
+UPSTREAM_MAX_RETRIES = int(os.getenv('UPSTREAM_MAX_RETRIES', '2'))
+UPSTREAM_BACKOFF_FACTOR = float(os.getenv('UPSTREAM_BACKOFF_FACTOR', '0.3'))
+UPSTREAM_POOL_CONNECTIONS = int(os.getenv('UPSTREAM_POOL_CONNECTIONS', '4'))
+UPSTREAM_POOL_MAXSIZE = int(os.getenv('UPSTREAM_POOL_MAXSIZE', '20'))
+
+# Concurrent Google Books lookups for the NYT list (deadline in seconds)
+BESTSELLER_ENRICH_WORKERS = int(os.getenv('BESTSELLER_ENRICH_WORKERS', '8'))
+BESTSELLER_ENRICH_DEADLINE = float(os.getenv('BESTSELLER_ENRICH_DEADLINE', '4'))
+# How long a web process reuses the stored snapshot before re-reading the DB
+BESTSELLER_CACHE_TTL = int(os.getenv('BESTSELLER_CACHE_TTL', '300'))
+
+# How long a failed ISBN -> Google Books lookup is remembered (seconds)
+ISBN_NEGATIVE_TTL = int(os.getenv('ISBN_NEGATIVE_TTL', str(7 * 24 * 60 * 60)))
+
+# Saved book metadata is re-fetched from Google Books once older than this (seconds).
+# With async refresh, stale books are served as-is and refreshed after the response.
+BOOK_METADATA_TTL = int(os.getenv('BOOK_METADATA_TTL', str(7 * 24 * 60 * 60)))
+BOOK_METADATA_ASYNC_REFRESH = os.getenv('BOOK_METADATA_ASYNC_REFRESH', 'False') == 'True'
+
+# Most google_books_ids accepted by one batch ratings request
+BATCH_RATINGS_MAX_IDS = int(os.getenv('BATCH_RATINGS_MAX_IDS', '100'))
+
+# Page size for paginated readlist listings
+READLISTS_PAGE_SIZE = int(os.getenv('READLISTS_PAGE_SIZE', '20'))
+READLISTS_MAX_PAGE_SIZE = 100
+# Books per page of a single readlist
+READLIST_BOOKS_PAGE_SIZE = int(os.getenv('READLIST_BOOKS_PAGE_SIZE', '100'))
+READLIST_BOOKS_MAX_PAGE_SIZE = 500
+# Readlist imports: rows written per batch and the largest accepted file
+READLIST_IMPORT_BATCH_SIZE = int(os.getenv('READLIST_IMPORT_BATCH_SIZE', '500'))
+READLIST_IMPORT_MAX_ROWS = int(os.getenv('READLIST_IMPORT_MAX_ROWS', '10000'))
+
+# Gamification side effects (points, achievements, Done Reading) are recorded as
+# outbox events. With async processing they are applied by the
+# process_gamification_events worker instead of inside the request.
+GAMIFICATION_ASYNC = os.getenv('GAMIFICATION_ASYNC', 'False') == 'True'
+GAMIFICATION_BATCH_SIZE = int(os.getenv('GAMIFICATION_BATCH_SIZE', '100'))
+# Without async processing an event is tried this many times in the request;
+# one that still fails stays queued for the worker
+GAMIFICATION_INLINE_ATTEMPTS = int(os.getenv('GAMIFICATION_INLINE_ATTEMPTS', '2'))
+# Failed events are retried by the worker until they have this many attempts
+GAMIFICATION_MAX_ATTEMPTS = int(os.getenv('GAMIFICATION_MAX_ATTEMPTS', '5'))
+
+# Leaderboard page size and the readers shown either side of the current user
+LEADERBOARD_PAGE_SIZE = int(os.getenv('LEADERBOARD_PAGE_SIZE', '10'))
+LEADERBOARD_MAX_PAGE_SIZE = 100
+LEADERBOARD_NEIGHBOURS = int(os.getenv('LEADERBOARD_NEIGHBOURS', '5'))
+LEADERBOARD_MAX_NEIGHBOURS = 50
+# Seconds a page of a user's following leaderboard is cached. A user's own
+# awards refresh it; this is how stale the scores of people they follow can be
+LEADERBOARD_FOLLOWING_CACHE_TTL = int(os.getenv('LEADERBOARD_FOLLOWING_CACHE_TTL', '60'))
+
+# Points history page sizes: individual rows, and days or weeks in rollup mode
+POINTS_HISTORY_PAGE_SIZE = int(os.getenv('POINTS_HISTORY_PAGE_SIZE', '50'))
+POINTS_HISTORY_MAX_PAGE_SIZE = 200
+POINTS_ROLLUP_PAGE_SIZE = int(os.getenv('POINTS_ROLLUP_PAGE_SIZE', '30'))
+POINTS_ROLLUP_MAX_PAGE_SIZE = 366
+# compact_points_history folds history rows older than this many days into rollups
+POINTS_HISTORY_RETENTION_DAYS = int(os.getenv('POINTS_HISTORY_RETENTION_DAYS', '90'))
+
+# Review thread pagination: top-level page size, reply levels and replies per node
+REVIEWS_PAGE_SIZE = int(os.getenv('REVIEWS_PAGE_SIZE', '20'))
+REVIEWS_MAX_PAGE_SIZE = 100
+REVIEW_REPLY_DEPTH = int(os.getenv('REVIEW_REPLY_DEPTH', '3'))
+REVIEW_MAX_REPLY_DEPTH = 10
+REVIEW_REPLIES_PER_NODE = int(os.getenv('REVIEW_REPLIES_PER_NODE', '5'))
+
+# Google Books search result cache (seconds / number of distinct queries)
+SEARCH_CACHE_TTL = int(os.getenv('SEARCH_CACHE_TTL', '600'))
+SEARCH_CACHE_MAX_ENTRIES = int(os.getenv('SEARCH_CACHE_MAX_ENTRIES', '512'))
+
+# Search mode used when the client does not pass one: 'auto' answers from the
+# local catalog index and only calls Google Books when it has too few hits
+SEARCH_DEFAULT_MODE = os.getenv('SEARCH_DEFAULT_MODE', 'auto')
+LOCAL_SEARCH_MIN_RESULTS = int(os.getenv('LOCAL_SEARCH_MIN_RESULTS', '10'))
+
 # SECURITY WARNING: don't run with debug turned on in production!
 DEBUG = os.getenv('DEBUG')
 
@@ -89,6 +169,23 @@ DATABASES = {
     'default': {
         'ENGINE': 'django.db.backends.sqlite3',
         'NAME': BASE_DIR / 'db.sqlite3',
+        # Tests only: a file lets threads in the concurrency tests wait on
+        # SQLite's busy timeout, where the shared in-memory database fails at
+        # once. The test runner creates and deletes it.
+        'TEST': {'NAME': BASE_DIR / 'test_db.sqlite3'},
+    }
+}
+
+
+# The default cache is local to each server process. Set CACHE_BACKEND (and
+# CACHE_LOCATION) to share it between processes, e.g.
+# django.core.cache.backends.db.DatabaseCache with a table created by
+# `python manage.py createcachetable`.
+CACHES = {
+    'default': {
+        'BACKEND': os.getenv('CACHE_BACKEND', 'django.core.cache.backends.locmem.LocMemCache'),
+        'LOCATION': os.getenv('CACHE_LOCATION', ''),
+        'OPTIONS': {'MAX_ENTRIES': int(os.getenv('CACHE_MAX_ENTRIES', '10000'))},
     }
 }
 
@@ -139,6 +236,9 @@ DEFAULT_AUTO_FIELD = 'django.db.models.BigAutoField'
 
 CORS_ALLOWED_ORIGINS = [os.getenv('WEBAPP_BASE_URL'),]
 
+# Lets the frontend read the cursor of the next page on paginated lists
+CORS_EXPOSE_HEADERS = ['X-Next-Cursor']
+
 CSRF_TRUSTED_ORIGINS = [os.getenv('WEBAPP_BASE_URL'),]
 
 
@@ -10,28 +10,40 @@ const BookList = ({ apiEndpoint, title, allowRemove = false, handleRemove, handl
   const { user } = useContext(AuthContext);
   const navigate = useNavigate();
   const [books, setBooks] = useState([]);
+  const [nextCursor, setNextCursor] = useState(null);
   const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
   const [activeFilters, setActiveFilters] = useState({
     decade: "all",
     genre: "all",
   });
 
-  const fetchBooks = useCallback(async () => {
+  // Paginated endpoints return the next page's cursor in the X-Next-Cursor header
+  const fetchPage = useCallback(async (cursor) => {
     if (!user?.token) return;
     try {
-      const response = await fetch(apiEndpoint, {
+      const url = new URL(apiEndpoint, window.location.origin);
+      if (cursor) url.searchParams.set("cursor", cursor);
+      const response = await fetch(url.toString(), {
         headers: { Authorization: `Bearer ${user.token}` },
       });
+      if (!response.ok) return;
 
-      if (response.ok) {
-        const data = await response.json();
-        setBooks(data.books || data); 
-      }
+      const data = await response.json();
+      const page = data.books || data;
+      setBooks((prev) => (cursor ? [...prev, ...page] : page));
+      setNextCursor(response.headers.get("X-Next-Cursor"));
     } catch (error) {
       console.error("Error fetching books:", error);
     }
   }, [user, apiEndpoint]);
 
+  // Reloads from the first page, e.g. after a book is removed
+  const fetchBooks = useCallback(() => fetchPage(null), [fetchPage]);
+
+  const loadMoreBooks = () => {
+    if (nextCursor) fetchPage(nextCursor);
+  };
+
   useEffect(() => {
     fetchBooks();
   }, [fetchBooks]);
@@ -115,7 +127,10 @@ const BookList = ({ apiEndpoint, title, allowRemove = false, handleRemove, handl
 
     if (readlistId) {
       try {
-        await fetch(`${apiBaseUrl}/readlists/reorder-books/`, {
+        // Only the moved book is sent, along with its new neighbours
+        const after = reordered[destination.index - 1];
+        const before = reordered[destination.index + 1];
+        await fetch(`${apiBaseUrl}/readlists/move-book/`, {
           method: "POST",
           headers: {
             Authorization: `Bearer ${user.token}`,
@@ -123,7 +138,9 @@ const BookList = ({ apiEndpoint, title, allowRemove = false, handleRemove, handl
           },
           body: JSON.stringify({
             readlist_id: readlistId,
-            ordered_book_ids: reordered.map((book) => book.google_books_id),
+            book_id: moved.google_books_id,
+            after_book_id: after ? after.google_books_id : null,
+            before_book_id: before ? before.google_books_id : null,
           }),
         });
       } catch (error) {
@@ -244,6 +261,14 @@ const BookList = ({ apiEndpoint, title, allowRemove = false, handleRemove, handl
   </Droppable>
 </DragDropContext>
 
+      {nextCursor && (
+        <button
+          className={`nav-button ${theme === 'dark' ? 'dark-button' : ''}`}
+          onClick={loadMoreBooks}
+        >
+          Load more books
+        </button>
+      )}
 
 
       {/* Readlist Popup: Opens when a book is selected */}
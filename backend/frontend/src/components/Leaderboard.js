@@ -11,6 +11,8 @@ const Leaderboard = () => {
   const [loading, setLoading] = useState(true);
   const [showLoader, setShowLoader] = useState(false);
   const [userRank, setUserRank] = useState(null);
+  const [userEntry, setUserEntry] = useState(null);
+  const [scope, setScope] = useState('global');
   const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
 
   const fetchLeaderboard = useCallback(async () => {
@@ -25,21 +27,21 @@ const Leaderboard = () => {
     }, 500);
     
     try {
-      const response = await fetch(`${apiBaseUrl}/leaderboard/`, {
-        headers: {
-          'Authorization': `Bearer ${user.token}`,
-        }
-      });
+      const headers = { 'Authorization': `Bearer ${user.token}` };
+      const [response, rankResponse] = await Promise.all([
+        fetch(`${apiBaseUrl}/leaderboard/${scope === 'following' ? 'following/' : ''}`, { headers }),
+        fetch(`${apiBaseUrl}/leaderboard/me/?neighbours=0`, { headers })
+      ]);
       
       if (response.ok) {
-        const data = await response.json();
-        setLeaderboardData(data);
-        
-        // Find user's rank in the leaderboard
-        const currentUserIndex = data.findIndex(entry => entry.username === user.username);
-        if (currentUserIndex !== -1) {
-          setUserRank(currentUserIndex + 1);
-        }
+        setLeaderboardData(await response.json());
+      }
+
+      // The user's rank comes from the server, so it is known even outside the top 10
+      if (rankResponse.ok) {
+        const rankData = await rankResponse.json();
+        setUserRank(rankData.rank);
+        setUserEntry(rankData.entries.find(entry => entry.username === user.username) || null);
       }
     } catch (error) {
       console.error('Error fetching leaderboard:', error);
@@ -48,7 +50,7 @@ const Leaderboard = () => {
       setLoading(false);
       setShowLoader(false);
     }
-  }, [user]);
+  }, [user, scope]);
 
   useEffect(() => {
     if (user?.token) {
@@ -61,6 +63,18 @@ const Leaderboard = () => {
       <Navigation />
       <div className="max-w-7xl mx-auto px-4 py-6">
         <h1 className={`text-3xl font-bold mb-6 ${theme === 'dark' ? 'dark-title' : ''}`}>Readers Leaderboard</h1>
+
+        <div className="flex gap-2 mb-6">
+          {[['global', 'Everyone'], ['following', 'Following']].map(([value, label]) => (
+            <button
+              key={value}
+              onClick={() => setScope(value)}
+              className={`px-4 py-2 rounded-lg font-medium ${scope === value ? 'bg-blue-500 text-white' : (theme === 'dark' ? 'dark-card dark-text' : 'bg-white text-gray-700')}`}
+            >
+              {label}
+            </button>
+          ))}
+        </div>
         
         {loading && showLoader ? (
           <div className={`text-center py-10 ${theme === 'dark' ? 'dark-text' : ''}`}>
@@ -77,7 +91,7 @@ const Leaderboard = () => {
                   <div>
                     <p className="font-medium">{user.username}</p>
                     <p className="text-sm opacity-80">
-                      Level {leaderboardData[userRank - 1]?.level || 0} • {leaderboardData[userRank - 1]?.total_points || 0} points
+                      Level {userEntry?.level || 0} • {userEntry?.total_points || 0} points
                     </p>
                   </div>
                 </div>
@@ -100,10 +114,10 @@ const Leaderboard = () => {
                   {leaderboardData.map((entry, index) => (
                     <tr key={index} className={entry.username === user.username ? (theme === 'dark' ? 'dark-highlight-row' : 'bg-blue-50') : ''}>
                       <td className={`px-6 py-4 whitespace-nowrap ${theme === 'dark' ? 'dark-cell' : ''}`}>
-                        {index === 0 ? (
+                        {entry.rank === 1 ? (
                           <span className="inline-flex items-center justify-center w-8 h-8 bg-yellow-400 text-white rounded-full">1</span>
                         ) : (
-                          <span>{index + 1}</span>
+                          <span>{entry.rank}</span>
                         )}
                       </td>
                       <td className={`px-6 py-4 whitespace-nowrap font-medium ${theme === 'dark' ? 'dark-cell' : ''}`}>{entry.username}</td>
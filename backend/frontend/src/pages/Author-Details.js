@@ -6,6 +6,25 @@ import DisplayBooks from "../components/DisplayBooks.js";
 import { ThemeContext } from '../ThemeContext';
 import '../styles/AuthorDetails.css';
 
+// Average of the rated books on a page, fetched with the batch ratings endpoint
+const fetchAverageRating = async (books) => {
+  const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
+  const ids = books.map((book) => book.google_books_id).filter(Boolean);
+  if (ids.length === 0) return 0;
+
+  try {
+    const response = await fetch(`${apiBaseUrl}/books/ratings/?ids=${ids.map(encodeURIComponent).join(',')}`);
+    if (!response.ok) return 0;
+    const rated = Object.values(await response.json()).filter((rating) => rating.average_rating > 0);
+    return rated.length > 0
+      ? rated.reduce((total, rating) => total + rating.average_rating, 0) / rated.length
+      : 0;
+  } catch (error) {
+    console.error("Error fetching book ratings:", error);
+    return 0;
+  }
+};
+
 const AuthorDetails = () => {
   const locationRouter = useLocation();
   const { theme } = useContext(ThemeContext);
@@ -35,32 +54,11 @@ const AuthorDetails = () => {
           const fetchedBooks = await FetchBooks(data.author, 1, 'author');
           setBooks(fetchedBooks);
           
-          // Fetch individual book ratings from our backend
-          const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
-          let totalRating = 0;
-          let ratedBookCount = 0;
-          
-          // For each book, try to get the ratings
-          for (const book of fetchedBooks) {
-            if (book.google_books_id) {
-              try {
-                const ratingResponse = await fetch(`${apiBaseUrl}/books/${book.google_books_id}/ratings/`);
-                if (ratingResponse.ok) {
-                  const ratingData = await ratingResponse.json();
-                  if (ratingData.average_rating > 0) {
-                    totalRating += ratingData.average_rating;
-                    ratedBookCount++;
-                  }
-                }
-              } catch (error) {
-                console.error("Error fetching book rating:", error);
-              }
-            }
-          }
+          const averageRating = await fetchAverageRating(fetchedBooks);
           
           const stats = {
             totalBooks: fetchedBooks.length,
-            averageRating: ratedBookCount > 0 ? totalRating / ratedBookCount : 0,
+            averageRating,
             genres: [...new Set(fetchedBooks.map(book => book.genre).filter(Boolean))]
           };
           setAuthorStats(stats);
@@ -86,32 +84,11 @@ const AuthorDetails = () => {
         setBooks(newBooks);
         setPage(prev => prev + 1);
         
-        // Fetch individual book ratings from our backend
-        const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
-        let totalRating = 0;
-        let ratedBookCount = 0;
-        
-        // For each book, try to get the ratings
-        for (const book of newBooks) {
-          if (book.google_books_id) {
-            try {
-              const ratingResponse = await fetch(`${apiBaseUrl}/books/${book.google_books_id}/ratings/`);
-              if (ratingResponse.ok) {
-                const ratingData = await ratingResponse.json();
-                if (ratingData.average_rating > 0) {
-                  totalRating += ratingData.average_rating;
-                  ratedBookCount++;
-                }
-              }
-            } catch (error) {
-              console.error("Error fetching book rating:", error);
-            }
-          }
-        }
+        const averageRating = await fetchAverageRating(newBooks);
         
         const stats = {
           totalBooks: newBooks.length,
-          averageRating: ratedBookCount > 0 ? totalRating / ratedBookCount : 0,
+          averageRating,
           genres: [...new Set(newBooks.map(book => book.genre).filter(Boolean))]
         };
         setAuthorStats(stats);
@@ -133,32 +110,11 @@ const AuthorDetails = () => {
         setBooks(newBooks);
         setPage(prev => prev - 1);
         
-        // Fetch individual book ratings from our backend
-        const apiBaseUrl = process.env.REACT_APP_API_BASE_URL;
-        let totalRating = 0;
-        let ratedBookCount = 0;
-        
-        // For each book, try to get the ratings
-        for (const book of newBooks) {
-          if (book.google_books_id) {
-            try {
-              const ratingResponse = await fetch(`${apiBaseUrl}/books/${book.google_books_id}/ratings/`);
-              if (ratingResponse.ok) {
-                const ratingData = await ratingResponse.json();
-                if (ratingData.average_rating > 0) {
-                  totalRating += ratingData.average_rating;
-                  ratedBookCount++;
-                }
-              }
-            } catch (error) {
-              console.error("Error fetching book rating:", error);
-            }
-          }
-        }
+        const averageRating = await fetchAverageRating(newBooks);
         
         const stats = {
           totalBooks: newBooks.length,
-          averageRating: ratedBookCount > 0 ? totalRating / ratedBookCount : 0,
+          averageRating,
           genres: [...new Set(newBooks.map(book => book.genre).filter(Boolean))]
         };
         setAuthorStats(stats);
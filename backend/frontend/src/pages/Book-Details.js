@@ -23,6 +23,8 @@ function BookDetails() {
   const [totalRatings, setTotalRatings] = useState(0);
   
   const [reviews, setReviews] = useState([]); 
+  // Cursor for the next page of top-level reviews (from the X-Next-Cursor header)
+  const [reviewsCursor, setReviewsCursor] = useState(null);
   const [newReviewText, setNewReviewText] = useState('');
   const [selectedReview, setSelectedReview] = useState(null);
   const [bookStatus, setBookStatus] = useState('NOT_ADDED');
@@ -195,39 +197,75 @@ function BookDetails() {
       created_at: review.created_at || review.date_created || review.date || new Date().toISOString(),
       replies: Array.isArray(review.replies) 
         ? review.replies.map(normalizeReview) 
-        : []
+        : [],
+      reply_count: review.reply_count || 0,
+      has_more_replies: Boolean(review.has_more_replies),
+      replies_cursor: review.replies_cursor || null
     };
   };
 
+  // Fetch one page of top-level reviews; the next page's cursor comes back in X-Next-Cursor
+  const fetchReviewsPage = async (cursor = null) => {
+    const response = await axios.get(`${apiBaseUrl}/books/${book.google_books_id}/reviews/`, {
+      params: cursor ? { cursor } : {}
+    });
+    const data = Array.isArray(response.data) ? response.data : (response.data.results || []);
+    return {
+      reviews: data.map(normalizeReview),
+      nextCursor: response.headers['x-next-cursor'] || null
+    };
+  };
+
+  const loadMoreReviews = async () => {
+    if (!reviewsCursor) return;
+    try {
+      const page = await fetchReviewsPage(reviewsCursor);
+      setReviews(prevReviews => [...prevReviews, ...page.reviews]);
+      setReviewsCursor(page.nextCursor);
+    } catch (error) {
+      console.error("Error loading more reviews:", error);
+    }
+  };
+
+  // Load the next replies of one review, continuing from its replies_cursor
+  const loadMoreReplies = async (reviewId, cursor) => {
+    try {
+      const response = await axios.get(`${apiBaseUrl}/reviews/${reviewId}/replies/`, {
+        params: cursor ? { cursor } : {}
+      });
+      const moreReplies = response.data.map(normalizeReview);
+      const nextCursor = response.headers['x-next-cursor'] || null;
+
+      const addReplies = (reviewsList) => reviewsList.map(review => {
+        if (review.id === reviewId) {
+          return {
+            ...review,
+            replies: [...review.replies, ...moreReplies],
+            has_more_replies: Boolean(nextCursor),
+            replies_cursor: nextCursor
+          };
+        }
+        return { ...review, replies: addReplies(review.replies || []) };
+      });
+      setReviews(prevReviews => addReplies(prevReviews));
+    } catch (error) {
+      console.error("Error loading more replies:", error);
+    }
+  };
+
   useEffect(() => {
     if (book && book.google_books_id) {
       const fetchReviews = async () => {
         try {
           console.log(`Fetching reviews for book: ${book.title} (ID: ${book.google_books_id})`);
-          const response = await axios.get(`${apiBaseUrl}/books/${book.google_books_id}/reviews/`);
-          console.log("Reviews API raw response:", response);
-          console.log("Reviews data:", response.data);
-          
-          let normalizedReviews = [];
-          
-          // Check if response data is an array
-          if (Array.isArray(response.data)) {
-            normalizedReviews = response.data.map(normalizeReview);
-            console.log(`Set ${response.data.length} reviews in state`);
-          } else if (response.data.results && Array.isArray(response.data.results)) {
-            // Some APIs nest data in a results field
-            normalizedReviews = response.data.results.map(normalizeReview);
-            console.log(`Set ${response.data.results.length} reviews from results field`);
-          } else {
-            console.error("Unexpected review data format:", response.data);
-            normalizedReviews = [];
-          }
-          
-          console.log("Normalized reviews:", normalizedReviews);
-          setReviews(normalizedReviews);
+          const page = await fetchReviewsPage();
+          console.log(`Set ${page.reviews.length} reviews in state`);
+          setReviews(page.reviews);
+          setReviewsCursor(page.nextCursor);
         } catch (error) {
           console.error("Error fetching reviews:", error);
           setReviews([]);
+          setReviewsCursor(null);
         }
       };
   
@@ -370,17 +408,12 @@ function BookDetails() {
       if (book && book.google_books_id) {
         try {
           console.log('Attempting to refresh reviews after error...');
-          const refreshResponse = await axios.get(`${apiBaseUrl}/books/${book.google_books_id}/reviews/`);
-          let refreshedReviews = [];
-          
-          if (Array.isArray(refreshResponse.data)) {
-            refreshedReviews = refreshResponse.data.map(normalizeReview);
-          } else if (refreshResponse.data.results && Array.isArray(refreshResponse.data.results)) {
-            refreshedReviews = refreshResponse.data.results.map(normalizeReview);
-          }
+          const refreshed = await fetchReviewsPage();
+          const refreshedReviews = refreshed.reviews;
           
           if (refreshedReviews.length > reviews.length) {
             setReviews(refreshedReviews);
+            setReviewsCursor(refreshed.nextCursor);
             setNewReviewText(''); // Clear the text area since the review was saved
             console.log('Review was likely saved successfully despite the error');
             
@@ -784,6 +817,17 @@ function BookDetails() {
             ))}
           </div>
         )}
+
+        {review.has_more_replies && (
+          <button
+            onClick={() => loadMoreReplies(review.id, review.replies_cursor)}
+            className={`reply-button ${theme === 'dark' ? 'dark-reply-button' : ''}`}
+          >
+            {review.replies.length === 0
+              ? `Show ${review.reply_count} ${review.reply_count === 1 ? 'reply' : 'replies'}`
+              : 'Load more replies'}
+          </button>
+        )}
       </div>
     );
   };
@@ -1039,6 +1083,14 @@ function BookDetails() {
                       <ReviewItem key={review.id} review={review} />
                     ))
                   )}
+                  {reviewsCursor && (
+                    <button
+                      onClick={loadMoreReviews}
+                      className={`submit-review-button mt-2 ${theme === 'dark' ? 'dark-submit-review-button' : ''}`}
+                    >
+                      Load more reviews
+                    </button>
+                  )}
                 </div>
 
                 <div className={`add-review mt-4 ${theme === 'dark' ? 'dark-add-review' : ''}`}>
@@ -100,7 +100,7 @@ const Readlist = () => {
   const fetchSharedReadlists = useCallback(async () => {
     if (!user?.token) return;
     try {
-      const response = await fetch(`${apiBaseUrl}/readlists/shared/`, {
+      const response = await fetch(`${apiBaseUrl}/readlists/shared/?books=summary`, {
         headers: { Authorization: `Bearer ${user.token}` },
       });
       if (response.ok) {